@@ -1,64 +1,521 @@
-from hpp.corbaserver.manipulation import ProblemSolver, ConstraintGraph, Rule, ConstraintGraphFactory
-from render import PyPhysXTaskRender
+import os
+from hpp.corbaserver.manipulation import ProblemSolver, Client
 from models.robot import PandaRobot
 from models.table import Table
 from models.cuboid import Cuboid
-from utils import get_trans_quat_hpp, generate_joint_bounds_unlimited_rot
+from utils import get_trans_quat_hpp, sampling_stats
+from graph_cache import scene_fingerprint
+from scene import SceneBuilder
+from box_collision import boxes_overlap
+from kinematics import quaternion_to_matrix
+from configuration import ConfigurationLayout, Configuration, ConfigurationBatch
 import numpy as np
+import time
+
+
+DEFAULT_PROBLEM = 'default'  # name of the problem context the server starts with
 
 
 class BasicTask():
-    def __init__(self, robot_base_pose=None, error_threshold=1e-3, max_iter_projection=40, graph_name='graph'):
+    # name of the problem context selected in each server (by host and port) by tasks of this process
+    _selected_problems = {}
+
+    def __init__(self, robot_base_pose=None, error_threshold=1e-3, max_iter_projection=40, graph_name='graph',
+                 graph_cache=None, roadmap_store=None, plan_cache=None, furniture=None, objects=None, lazy_graph=False,
+                 placement_region=None, reachability_map=None, render=True, problem_name=None,
+                 mesh_cache=None):
+        """
+        Task with Panda robot, furniture and movable objects and the constraint graph for their manipulation.
+
+        :param robot_base_pose: 4x4 pose of the robot base, identity if None
+        :param error_threshold: error threshold of the problem solver
+        :param max_iter_projection: maximum number of iterations of projection onto constraints
+        :param graph_name: name of the constraint graph
+        :param graph_cache: optional GraphCache; if the scene is found in the cache, graph is rebuilt from it and
+            graph generation and validation are skipped
+        :param roadmap_store: optional RoadmapStore; stored roadmap of the scene is loaded when the graph is built and
+            can be grown by solve(..., clear_roadmap=False) and saved by save_roadmap()
+        :param plan_cache: optional PlanCache used by plan() and direct_path() to reuse discretized paths of queries
+            with the same scene and (up to quantization) the same endpoint configurations
+        :param furniture: list of (name, item) tuples, e.g. [('table', Table())] which is used if None
+        :param objects: list of (name, item) or (name, item, handles) tuples, see SceneBuilder.add_object;
+            two cuboids of sizes 0.05 and 0.07 named 'cuboid' and 'cuboid2' if None
+        :param lazy_graph: build the graph of the whole scene on the first use of cg instead of in the constructor;
+            use select_subproblem to build a smaller graph with only some objects movable
+        :param placement_region: tuple of lower and upper [x, y, z] bounds of expected positions of the default
+            cuboids; if given, the cuboids have only the handles reachable in this region, see Cuboid.reachable_handles
+        :param reachability_map: optional ReachabilityMap of the robot; solve() then rejects queries in which a moved
+            object cannot be grasped in its initial or goal pose, see is_feasible_query
+        :param render: if False, the task is headless and render is not available; otherwise the rendering stack is
+            imported and PyPhysXTaskRender created on the first access of render
+        :param problem_name: name of the problem context of the server the task is built in, DEFAULT_PROBLEM (the
+            context the server starts with) if None; tasks with different names share one server and each method of
+            the task (as well as access of robot, ps and cg) selects its context first (see activate), so switching
+            between the tasks costs one call; an existing context is not reset, a task built in it replaces the robot
+            of the previous task of the same name
+        :param mesh_cache: optional MeshCache passed to PyPhysXTaskRender; its meshcat viewers then load robot meshes
+            from preprocessed binary arrays
+        """
+        self.problem_name = DEFAULT_PROBLEM if problem_name is None else problem_name
+        self._client = Client()
+        self._server = self._server_key()
+        self._client.problem.selectProblem(self.problem_name)
+        self._selected_problems[self._server] = self.problem_name
+
         # load robot and objects
         self.robot = PandaRobot()
         if robot_base_pose is None:
             robot_base_pose = np.eye(4)
         self.robot.setRootJointPosition(self.robot.name, get_trans_quat_hpp(robot_base_pose))
-        self.grippers = [self.robot.get_gripper_name(), ]
-        self.furniture = [Table()]
-        self.furniture_names = ['table']
-        self.objects = [Cuboid(0.05), Cuboid(0.07)]
-        self.object_names = ['cuboid', 'cuboid2']
+        self.robot_base_pose = robot_base_pose
+        self.reachability_map = reachability_map
+        self.scene = SceneBuilder(self.robot)
+        for name, item in [('table', Table())] if furniture is None else furniture:
+            self.scene.add_furniture(name, item)
+        if objects is None and placement_region is None:
+            objects = [('cuboid', Cuboid(0.05)), ('cuboid2', Cuboid(0.07))]
+        elif objects is None:
+            surfaces = [item.desk_box() for item in self.scene.furniture if hasattr(item, 'desk_box')]
+            reachability = dict(robot_base_pose=robot_base_pose, reach_m=self.robot.reach_m, region=placement_region,
+                                surface_height=max([c[2] + np.abs(r[2]) @ h for c, r, h in surfaces], default=None))
+            objects = [('cuboid', Cuboid.with_reachable_handles(0.05, **reachability)),
+                       ('cuboid2', Cuboid.with_reachable_handles(0.07, **reachability))]
+        for obj in objects:
+            self.scene.add_object(*obj)
+        self.grippers = self.scene.grippers
+        self.furniture, self.furniture_names = self.scene.furniture, self.scene.furniture_names
+        self.objects, self.object_names = self.scene.objects, self.scene.object_names
+        self.handles_names, self.object_surfaces = self.scene.handles_names, self.scene.object_surfaces
+        self.env_contact_surfaces = self.scene.env_contact_surfaces
 
         # setup problem
         self.ps = ProblemSolver(self.robot)
         self.ps.setErrorThreshold(error_threshold)
         self.ps.setMaxIterProjection(max_iter_projection)
 
-        self.render = PyPhysXTaskRender(self.robot)
-
-        # load furniture and movable objects
-        self.env_contact_surfaces = []
-        for item, name in zip(self.furniture, self.furniture_names):
-            prefix = name + '/'
-            self.robot.loadEnvironmentModel(item.urdfFilename, item.srdfFilename, prefix)
-            self.env_contact_surfaces += item.contact_surfaces(prefix)
-            self.render.add_pyphysx_obstacle(item.urdfFilename)
-
-        self.handles_names = []
-        self.object_surfaces = []
-        for item, name in zip(self.objects, self.object_names):
-            prefix = name + '/'
-            self.handles_names.append(item.handles(prefix))
-            self.object_surfaces.append(item.contact_surfaces(prefix))
-            self.robot.insertRobotModel(name, item.rootJointType, item.urdfFilename, item.srdfFilename)
-            self.robot.setJointBounds(f'{name}/root_joint', generate_joint_bounds_unlimited_rot([-5] * 3, [5] * 3))
-            self.render._create_pyphysx_actor_box(item.lengths)
-
-        # create graph
-        rules = [Rule([".*"], [".*"], True), ]
-        self.cg = ConstraintGraph(self.robot, graphName=graph_name)
-        factory = ConstraintGraphFactory(self.cg)
-        factory.setGrippers(self.grippers)  # Define the set of grippers used for manipulation
-        factory.environmentContacts(self.env_contact_surfaces)
-        factory.setObjects(self.object_names, self.handles_names, self.object_surfaces)
-        factory.setRules(rules)
-        factory.generate()
-        self.cg.initialize()
-
-        # validate graph
-        cproblem = self.ps.hppcorba.problem.getProblem()
-        cgraph = cproblem.getConstraintGraph()
-        cgraph.initialize()
-        graphValidation = self.ps.client.manipulation.problem.createGraphValidation()
-        assert graphValidation.validate(cgraph)
+        self.render_enabled = render
+        self.mesh_cache = mesh_cache
+        self._render = None
+        self.scene.load()
+        self.layout = ConfigurationLayout.from_robot(self.robot, self.object_names)
+
+        self.graph_name = graph_name
+        self.graph_cache = graph_cache
+        self._fingerprint_extra = dict(robot_base_pose=robot_base_pose, error_threshold=error_threshold,
+                                       max_iter_projection=max_iter_projection, graph_name=graph_name)
+        self.fingerprint = self.scene.fingerprint(**self._fingerprint_extra)
+        self.movable_objects = None
+        self.plan_cache = plan_cache
+        # settings of configure_planner, part of the keys of plan_cache; None stands for the server default
+        self.planner_settings = dict(planner=None, optimizers=None, seed=None)
+        self.roadmap_store = roadmap_store
+        self.roadmap_stats = dict(nodes_reused=0, edges_reused=0, nodes_added=0, edges_added=0)
+        self._cg = None
+        if not lazy_graph:
+            self.select_subproblem()
+
+    @staticmethod
+    def _server_key():
+        return os.environ.get('HPP_HOST'), os.environ.get('HPP_PORT')
+
+    def activate(self):
+        """
+        Select the problem context of the task in the server, unless it is already selected by a task of this process.
+        Contexts selected by other processes or clients are not tracked, call
+        ps.client.manipulation.problem.selectProblem then.
+        """
+        if self._selected_problems.get(self._server) != self.problem_name:
+            self._client.problem.selectProblem(self.problem_name)
+            self._selected_problems[self._server] = self.problem_name
+        return self
+
+    @property
+    def robot(self):
+        """ Robot of the task, its problem context is selected first. """
+        return self.activate()._robot
+
+    @robot.setter
+    def robot(self, robot):
+        self._robot = robot
+
+    @property
+    def ps(self):
+        """ Problem solver of the task, its problem context is selected first. """
+        return self.activate()._ps
+
+    @ps.setter
+    def ps(self, ps):
+        self._ps = ps
+
+    @property
+    def render(self):
+        """ Renderer of the task, created on the first access; not available if the task was created headless. """
+        if self._render is None:
+            assert self.render_enabled, "BasicTask was created with render=False."
+            from render import PyPhysXTaskRender
+            self._render = PyPhysXTaskRender(self.robot, self.robot_base_pose, mesh_cache=self.mesh_cache)
+            self.scene.add_to_render(self._render)
+        return self._render
+
+    @property
+    def cg(self):
+        """
+        Constraint graph of the current (sub)problem, the graph of the whole scene is built on the first use; the
+        problem context of the task is selected first.
+        """
+        if self._cg is None:
+            self.select_subproblem()
+        self.activate()
+        return self._cg
+
+    def select_subproblem(self, objects=None, q=None):
+        """
+        Build the constraint graph in which only the given objects are movable, the other objects are locked at their
+        poses in q. Fingerprint, roadmap and plan cache keys then refer to the subproblem.
+
+        :param objects: names of the movable objects, all objects if None
+        :param q: configuration defining the poses of the locked objects; required if some object is locked
+        """
+        self.activate()
+        graph_fingerprint = self.scene.fingerprint(objects, **self._fingerprint_extra)
+        if self._cg is not None:
+            self.ps.clearRoadmap()
+        self._cg = self.scene.build_graph(self.ps, self.graph_name, objects, q, self.graph_cache, graph_fingerprint)
+        self.movable_objects = objects
+        self.fingerprint = graph_fingerprint
+        if objects is not None:
+            q = Configuration(q, self.layout)
+            locked = [q.object_pose(name).tolist() for name in self.object_names if name not in objects]
+            self.fingerprint = scene_fingerprint(graph=graph_fingerprint, locked=locked)
+        if self.roadmap_store is not None:
+            self.roadmap_store.load(self.ps, self.fingerprint)
+
+    def config_bounds(self):
+        """
+        Return lower and upper bounds of all configuration variables; bounds are queried from the server only once.
+
+        :return: tuple of arrays of shape (nq,) with lower and upper bounds and list of (rank, size) of joints whose
+            configuration ends with a quaternion, i.e. freeflyer joints
+        """
+        if getattr(self, '_config_bounds', None) is None:
+            self.activate()
+            nq = self.robot.getConfigSize()
+            lower, upper = np.zeros(nq), np.zeros(nq)
+            quaternion_joints = []
+            for name in self.robot.getJointNames():
+                size = self.robot.getJointConfigSize(name)
+                if size == 0:
+                    continue
+                rank = self.robot.rankInConfiguration[name]
+                bounds = np.asarray(self.robot.getJointBounds(name)).reshape(-1, 2)
+                lower[rank:rank + size], upper[rank:rank + size] = bounds[:, 0], bounds[:, 1]
+                if size == 7:
+                    quaternion_joints.append((rank, size))
+            self._config_bounds = (lower, upper, quaternion_joints)
+        return self._config_bounds
+
+    def shoot_random_configs(self, n, rng=None):
+        """
+        Sample random configurations uniformly within joint bounds locally, i.e. without calling the server.
+        Rotations of freeflyer joints are sampled uniformly.
+
+        :param n: number of configurations
+        :param rng: numpy random Generator, default generator if None
+        :return: array of shape (n, nq)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        lower, upper, quaternion_joints = self.config_bounds()
+        configs = rng.uniform(lower, upper, size=(n, len(lower)))
+        for rank, size in quaternion_joints:
+            q = rng.normal(size=(n, 4))
+            configs[:, rank + size - 4:rank + size] = q / np.linalg.norm(q, axis=1, keepdims=True)
+        return configs
+
+    def prefilter_object_placements(self, configs, tolerance=1e-3):
+        """
+        Reject configurations with objects obviously in collision without calling the server: cuboids overlapping
+        each other or the table desk (which spans down to the floor); other objects and furniture are ignored.
+        Objects outside of the table footprint are accepted at any height, e.g. below the edge of the table.
+        Robot is not checked, configurations passing the filter still have to be checked by robot.isConfigValid.
+
+        :param configs: array of shape (N, nq)
+        :param tolerance: penetrations smaller than tolerance are accepted (e.g. objects resting on the table)
+        :return: boolean array of N values, False for configurations that are certainly in collision
+        """
+        configs = ConfigurationBatch(np.atleast_2d(np.asarray(configs, dtype=np.float64)), self.layout)
+        boxes = []
+        for i, item in enumerate(self.objects):
+            if not hasattr(item, 'lengths'):
+                continue
+            boxes.append((configs.object_position(i), quaternion_to_matrix(configs.object_quaternion(i)),
+                          np.asarray(item.lengths) / 2))
+
+        passed = np.ones(len(configs), dtype=bool)
+        for i, box in enumerate(boxes):
+            for other in boxes[i + 1:]:
+                passed &= ~boxes_overlap(*box, *other, tolerance=tolerance)
+            for item in self.furniture:
+                if not hasattr(item, 'desk_box'):
+                    continue
+                center, rotation, half = item.desk_box()
+                passed &= ~boxes_overlap(center, rotation, half, *box, tolerance=tolerance)
+        return passed
+
+    def sample_transition(self, transition, q_from, n_samples=1, max_attempts=100, open_gripper=True, rng=None):
+        """
+        Sample valid configurations reachable from q_from by the given transition of the constraint graph.
+        Random configurations are shot locally, so each attempt costs at most two server calls (projection and
+        collision checking).
+
+        :param transition: name of the edge of the constraint graph, e.g. 'Loop | f'
+        :param q_from: configuration lying in the state the transition starts from
+        :param n_samples: number of valid configurations to return
+        :param max_attempts: maximum number of attempts
+        :param open_gripper: open the gripper fingers before collision checking, see Configuration.open_gripper
+        :param rng: numpy random Generator, default generator if None
+        :return: tuple of array of shape (k, nq), k <= n_samples, and dictionary with statistics of the sampling:
+            see sampling_stats
+        """
+        self.activate()
+        q_from = list(q_from)
+        samples = []
+        attempts, projection_failures, collision_failures = 0, 0, 0
+        generate_target_config = self.cg.generateTargetConfig
+        is_config_valid = self.robot.isConfigValid
+        for q_rand in self.shoot_random_configs(max_attempts, rng):
+            if len(samples) >= n_samples:
+                break
+            attempts += 1
+            succ, q, err = generate_target_config(transition, q_from, q_rand.tolist())
+            if not succ:
+                projection_failures += 1
+                continue
+            q = Configuration(q, self.layout)
+            if open_gripper:
+                q.open_gripper()
+            if not self.prefilter_object_placements(q.data)[0]:
+                collision_failures += 1
+                continue
+            res, msg = is_config_valid(q.tolist())
+            if not res:
+                collision_failures += 1
+                continue
+            samples.append(q.data)
+
+        samples = np.array(samples, dtype=np.float64).reshape(-1, self.layout.nq)
+        return samples, sampling_stats(attempts, projection_failures, collision_failures)
+
+    def project_configurations(self, configs, node='free', check_collisions=True, chunk_size=1000):
+        """
+        Project many configurations onto the constraints of the state and check collisions of the projections.
+
+        :param configs: array of shape (N, nq)
+        :param node: name of the state of the constraint graph
+        :param check_collisions: check collisions of successfully projected configurations
+        :param chunk_size: number of configurations converted to python lists at once, bounds temporary memory
+        :return: dictionary of arrays: 'configs' (N, nq) projected configurations, 'success' (N,) projection success,
+            'errors' (N,) residual errors of projection and 'valid' (N,) collision free (False if not projected or
+            if collisions are not checked)
+        """
+        configs = np.asarray(configs, dtype=np.float64)
+        n = configs.shape[0]
+        result = dict(configs=np.empty_like(configs), success=np.zeros(n, dtype=bool), errors=np.empty(n),
+                      valid=np.zeros(n, dtype=bool))
+        self.activate()
+        apply_node_constraints = self.cg.graph.applyNodeConstraints
+        is_config_valid = self.robot.isConfigValid
+        node_id = self.cg.nodes[node]
+        for start in range(0, n, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            for i, q in enumerate(configs[chunk].tolist(), start):
+                succ, q_proj, err = apply_node_constraints(node_id, q)
+                result['configs'][i], result['success'][i], result['errors'][i] = q_proj, succ, err
+            if check_collisions:
+                candidates = result['success'][chunk] & self.prefilter_object_placements(result['configs'][chunk])
+                for i in start + np.flatnonzero(candidates):
+                    result['valid'][i] = is_config_valid(result['configs'][i].tolist())[0]
+        return result
+
+    def configure_planner(self, planner=None, optimizers=None, seed=None):
+        """
+        Select the path planner, path optimizers and random seed used by solve.
+
+        :param planner: name of the path planner, e.g. 'M-RRT'; unchanged if None
+        :param optimizers: list of path optimizer names applied in the given order, e.g. ['RandomShortcut'];
+            unchanged if None
+        :param seed: seed of the random number generator of the server; unchanged if None
+        """
+        self.activate()
+        settings = dict(planner=planner, optimizers=None if optimizers is None else list(optimizers), seed=seed)
+        self.planner_settings.update({k: v for k, v in settings.items() if v is not None})
+        if planner is not None:
+            self.ps.selectPathPlanner(planner)
+        if optimizers is not None:
+            self.ps.clearPathOptimizers()
+            for optimizer in optimizers:
+                self.ps.addPathOptimizer(optimizer)
+        if seed is not None:
+            self.ps.hppcorba.problem.setRandomSeed(seed)
+
+    def object_grasp_scores(self, q):
+        """
+        Look up the handles of objects in the reachability map, no server call is made; all handles of all given
+        configurations are looked up by a single ReachabilityMap.grasp_scores call.
+
+        :param q: configuration, or array (..., nq) of configurations, defining the poses of objects
+        :return: array (..., n_objects) with the best reachability score among the handles of each object; objects
+            without handle frames (i.e. other than Cuboid) are not checked and score infinity
+        """
+        assert self.reachability_map is not None, "BasicTask was created without reachability_map."
+        if getattr(self, '_handle_table', None) is None:
+            handle_objects, positions, directions = [], [np.zeros((0, 3))], [np.zeros((0, 3))]
+            for i, item in enumerate(self.objects):
+                if hasattr(item, 'handle_frames'):
+                    names, p, d = item.handle_frames(item.lengths, item.max_handles_depth)
+                    selected = [k for k, h in enumerate(names) if h in item.handle_names]
+                    handle_objects += [i] * len(selected)
+                    positions.append(p[selected])
+                    directions.append(-d[selected])
+            self._handle_table = (np.array(handle_objects, dtype=int), np.concatenate(positions),
+                                  np.concatenate(directions), np.linalg.inv(self.robot_base_pose),
+                                  np.add.outer(self.layout.object_ranks, np.arange(7)))
+
+        handle_objects, positions, directions, base_inv, pose_columns = self._handle_table
+        poses = np.asarray(q, dtype=np.float64)[..., pose_columns]
+        scores = np.full(poses.shape[:-1], np.inf)
+        if len(handle_objects) > 0:
+            with_handles = np.unique(handle_objects)
+            scores[..., with_handles] = self.reachability_map.grasp_scores(
+                poses, handle_objects, positions, directions, base_inv)[..., with_handles]
+        return scores
+
+    def is_feasible_query(self, q_init, q_goal, min_score=0., tolerance=1e-6):
+        """
+        Check in the reachability map that each object moved between q_init and q_goal can be grasped by at least one
+        of its handles in both poses; it takes about 0.15 ms, while an infeasible solve takes until its timeout.
+
+        :param q_init: initial configuration
+        :param q_goal: goal configuration
+        :param min_score: minimum reachability score of a handle, see ReachabilityMap
+        :param tolerance: objects whose configurations differ by less than tolerance are considered not moved
+        :return: True if the query is not rejected
+        """
+        q = np.stack([np.asarray(q_init, dtype=np.float64), np.asarray(q_goal, dtype=np.float64)])
+        scores = self.object_grasp_scores(q)
+        pose_columns = self._handle_table[-1]
+        moved = np.abs(q[0, pose_columns] - q[1, pose_columns]).max(axis=-1) > tolerance
+        return bool(np.all(scores.min(axis=0)[moved] > min_score))
+
+    def solve(self, q_init, q_goal, clear_roadmap=True):
+        """
+        Solve the planning problem between two configurations; all previously stored paths are cleared.
+
+        :param q_init: initial configuration
+        :param q_goal: goal configuration
+        :param clear_roadmap: clear the roadmap before solving; if False, the roadmap of previous queries (or loaded
+            from roadmap_store) is reused and grown, see roadmap_stats for reused and added nodes and edges
+        :return: id of the solution path in the problem solver
+        :raises ValueError: if the query is rejected by the reachability map, see is_feasible_query
+        """
+        if self.reachability_map is not None and not self.is_feasible_query(q_init, q_goal):
+            raise ValueError("Query rejected: a moved object is not reachable in its initial or goal pose.")
+        self.activate()
+        if clear_roadmap:
+            self.ps.clearRoadmap()
+        nodes, edges = self.ps.numberNodes(), self.ps.numberEdges()
+        self.ps.setInitialConfig(list(q_init))
+        self.ps.resetGoalConfigs()
+        self.ps.addGoalConfig(list(q_goal))
+        for i in range(self.ps.numberPaths() - 1, -1, -1):
+            self.ps.erasePath(i)
+        self.ps.solve()
+        self.roadmap_stats = dict(nodes_reused=nodes, edges_reused=edges, nodes_added=self.ps.numberNodes() - nodes,
+                                  edges_added=self.ps.numberEdges() - edges)
+        return self.ps.numberPaths() - 1
+
+    def plan(self, q_init, q_goal, fps=10):
+        """
+        Solve the planning problem and return the discretized solution; the result is looked up in plan_cache first,
+        under a key that includes the planner settings of configure_planner.
+
+        :param q_init: initial configuration
+        :param q_goal: goal configuration
+        :param fps: number of frames per unit of path length, see discretize_path
+        :return: array of shape (n_frames, nq); read-only if it was found in plan_cache
+        """
+        key = None
+        if self.plan_cache is not None:
+            key = self.plan_cache.key(self.fingerprint, 'solve', q_init, q_goal, fps=fps, **self.planner_settings)
+            path = self.plan_cache.get(key)
+            if path is not None:
+                return path
+        start = time.time()
+        path = self.discretize_path(self.solve(q_init, q_goal), fps=fps)
+        if key is not None:
+            self.plan_cache.put(key, path, time.time() - start)
+        return path
+
+    def direct_path(self, q_from, q_to, fps=10, validate=True):
+        """
+        Compute the direct path between two configurations and return it discretized; the result (including the
+        failure) is looked up in plan_cache first.
+
+        :param q_from: initial configuration
+        :param q_to: final configuration
+        :param fps: number of frames per unit of path length, see discretize_path
+        :param validate: validate the path, i.e. the path is truncated at the first collision
+        :return: array of shape (n_frames, nq) or None if the direct path does not exist or is not valid; the array is
+            read-only if it was found in plan_cache
+        """
+        key = None
+        if self.plan_cache is not None:
+            key = self.plan_cache.key(self.fingerprint, 'direct_path', q_from, q_to, fps=fps, validate=validate)
+            path = self.plan_cache.get(key)
+            if path is not None:
+                return path if len(path) > 0 else None
+        start = time.time()
+        self.activate()
+        res, path_id, msg = self.ps.directPath(list(q_from), list(q_to), validate)
+        path = self.discretize_path(path_id, fps=fps) if res else np.empty((0, len(q_from)))
+        if key is not None:
+            self.plan_cache.put(key, path, time.time() - start)
+        return path if res else None
+
+    def save_roadmap(self):
+        """ Store the current roadmap in roadmap_store under the scene fingerprint. """
+        assert self.roadmap_store is not None, "BasicTask was created without roadmap_store."
+        self.activate()
+        self.roadmap_store.save(self.ps, self.fingerprint)
+
+    def discretize_path(self, path_ids, fps=None, params=None):
+        """
+        Discretize one or several paths stored in the problem solver into a single array of configurations.
+
+        :param path_ids: id of the path or list of path ids; frames of the paths are concatenated in the given order
+        :param fps: number of frames per unit of path length, the frames are spread uniformly over each path
+        :param params: parameters at which the paths are evaluated; used instead of fps if given
+        :return: contiguous numpy array of shape (n_frames, nq) with dtype float64
+        """
+        assert (fps is None) != (params is None), "Exactly one of fps and params has to be given."
+        if np.isscalar(path_ids):
+            path_ids = [path_ids]
+        self.activate()
+
+        path_params = []
+        for path_id in path_ids:
+            if params is not None:
+                path_params.append(np.asarray(params, dtype=np.float64))
+                continue
+            length = self.ps.pathLength(path_id)
+            nframes = max(int(np.ceil(length * fps)), 1)
+            path_params.append(np.linspace(0., length, nframes))
+
+        nq = self.robot.getConfigSize()
+        configs = np.empty((sum(len(p) for p in path_params), nq), dtype=np.float64)
+        config_at_param = self.ps.hppcorba.problem.configAtParam
+        i = 0
+        for path_id, ts in zip(path_ids, path_params):
+            for t in ts:
+                configs[i] = config_at_param(path_id, t)
+                i += 1
+        return configs
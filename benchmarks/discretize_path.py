@@ -0,0 +1,44 @@
+"""
+Compare discretization of a solved path by the per-frame configAtParam loop with BasicTask.discretize_path.
+Requires hppcorbaserver, it is started by this script. Run from the repository root:
+    python -m benchmarks.discretize_path
+"""
+import time
+import numpy as np
+
+from basic_task import BasicTask
+from corba import CorbaServer
+
+
+def solve_example_path(task):
+    o1_p1 = [0.4, 0.2, 0.1]
+    o1_p2 = [0.2, 0.3, 0.1]
+    o2_p = [0.5, 0.5, 0.2]
+    q = [0, 0, 0, 1]
+    succ0, q_init, _ = task.cg.graph.applyNodeConstraints(task.cg.nodes['free'],
+                                                           task.robot.initial_configuration() + o1_p1 + q + o2_p + q)
+    succ1, q_goal, _ = task.cg.graph.applyNodeConstraints(task.cg.nodes['free'],
+                                                           task.robot.initial_configuration() + o1_p2 + q + o2_p + q)
+    assert succ0 and succ1
+    task.ps.setInitialConfig(q_init)
+    task.ps.addGoalConfig(q_goal)
+    task.ps.addPathOptimizer("RandomShortcut")
+    task.ps.solve()
+    return task.ps.numberPaths() - 1
+
+
+if __name__ == '__main__':
+    corba_server = CorbaServer()
+    task = BasicTask()
+    path_id = solve_example_path(task)
+
+    for fps in [10, 100, 1000]:
+        t0 = time.perf_counter()
+        nframes = max(int(np.ceil(task.ps.pathLength(path_id) * fps)), 1)
+        configs_loop = [task.ps.configAtParam(path_id, t) for t in np.linspace(0., task.ps.pathLength(path_id), nframes)]
+        configs_loop = np.array(configs_loop)
+        t1 = time.perf_counter()
+        configs = task.discretize_path(path_id, fps=fps)
+        t2 = time.perf_counter()
+        assert np.allclose(configs_loop, configs)
+        print(f'fps {fps:5d}, frames {len(configs):6d}: loop {t1 - t0:.4f}s, discretize_path {t2 - t1:.4f}s')
@@ -0,0 +1,24 @@
+"""
+Measure preparation of meshcat animation for long paths (forward kinematics and animation tracks), without I/O.
+Does not require hppcorbaserver. Run from the repository root:
+    python -m benchmarks.render_prep
+"""
+import time
+import numpy as np
+
+from meshcat_viewer import MeshcatTaskViewer, OfflineMeshcatWindow
+from models.models_utils import get_models_path
+
+if __name__ == '__main__':
+    viewer = MeshcatTaskViewer(get_models_path().joinpath('franka_panda/panda.urdf'), get_models_path(),
+                               window=OfflineMeshcatWindow())
+    viewer.add_box([0.05] * 3)
+    viewer.add_box([0.07] * 3)
+    for n in [100, 1000, 10000]:
+        configurations = np.zeros((n, 9 + 2 * 7))
+        configurations[:, :9] = [0, -np.pi / 4, 0, -3 * np.pi / 4, 0, np.pi / 2, np.pi / 4, 0., 0.]
+        configurations[:, :7] += np.linspace(0, 1, n)[:, None]
+        configurations[:, [15, 22]] = 1.
+        t0 = time.perf_counter()
+        viewer.animation(configurations, fps=10)
+        print(f'{n:6d} frames: {time.perf_counter() - t0:.4f}s')
@@ -0,0 +1,35 @@
+"""
+Measure import and construction time of BasicTask in fresh processes, headless and with the renderer created eagerly
+as it was done in the constructor before. Requires hppcorbaserver, it is started by this script. Run from the
+repository root:
+    python -m benchmarks.startup
+"""
+import sys
+import json
+import subprocess
+
+from corba import CorbaServer
+
+STATEMENTS = {
+    'import basic_task': 'import basic_task',
+    'import basic_task, render': 'import basic_task, render',
+    'BasicTask(render=False)': 'import basic_task; basic_task.BasicTask(render=False)',
+    'BasicTask() + render': 'import basic_task; basic_task.BasicTask().render',
+}
+
+
+def measure(statement, repeat):
+    # each process builds the task into the same server, so the problem is reset first (outside of the measurement)
+    code = ('from hpp.corbaserver.manipulation import Client; Client().problem.resetProblem(); '
+            f'import time; t0 = time.perf_counter(); {statement}; print(time.perf_counter() - t0)')
+    return [float(subprocess.check_output([sys.executable, '-c', code]).decode().split()[-1]) for _ in range(repeat)]
+
+
+if __name__ == '__main__':
+    corba_server = CorbaServer()
+    results = {}
+    for name, statement in STATEMENTS.items():
+        times = measure(statement, repeat=5)
+        results[name] = min(times)
+        print(f'{name:30s} min {min(times):.3f}s  max {max(times):.3f}s')
+    print(json.dumps(results))
@@ -0,0 +1,36 @@
+import numpy as np
+
+
+def boxes_overlap(center_a, rotation_a, half_a, center_b, rotation_b, half_b, tolerance=0.):
+    """
+    Test overlap of oriented boxes by the separating axis theorem, vectorized over N pairs of boxes.
+
+    :param center_a: N x 3 centers of the first boxes
+    :param rotation_a: N x 3 x 3 rotations of the first boxes (columns are box axes)
+    :param half_a: 3 half extents of the first boxes
+    :param center_b: N x 3 centers of the second boxes
+    :param rotation_b: N x 3 x 3 rotations of the second boxes
+    :param half_b: 3 half extents of the second boxes
+    :param tolerance: boxes penetrating by less than tolerance (e.g. resting contacts) are not reported
+    :return: boolean array of N values, True if the boxes overlap
+    """
+    ha = np.asarray(half_a, dtype=np.float64) - tolerance / 2
+    hb = np.asarray(half_b, dtype=np.float64) - tolerance / 2
+    rotation_a = np.broadcast_to(rotation_a, np.broadcast(center_a, center_b).shape + (3,))
+    r = np.swapaxes(rotation_a, -1, -2) @ rotation_b
+    t = (np.swapaxes(rotation_a, -1, -2) @ (np.asarray(center_b) - center_a)[..., None])[..., 0]
+    abs_r = np.abs(r) + 1e-12
+
+    separated = np.zeros(t.shape[:-1], dtype=bool)
+    for i in range(3):
+        separated |= np.abs(t[..., i]) > ha[i] + abs_r[..., i, :] @ hb
+        separated |= np.abs(np.sum(t * r[..., :, i], axis=-1)) > abs_r[..., :, i] @ ha + hb[i]
+    for i in range(3):
+        i1, i2 = (i + 1) % 3, (i + 2) % 3
+        for j in range(3):
+            j1, j2 = (j + 1) % 3, (j + 2) % 3
+            ra = ha[i1] * abs_r[..., i2, j] + ha[i2] * abs_r[..., i1, j]
+            rb = hb[j1] * abs_r[..., i, j2] + hb[j2] * abs_r[..., i, j1]
+            separated |= np.abs(t[..., i2] * r[..., i1, j] - t[..., i1] * r[..., i2, j]) > ra + rb
+    return ~separated
+
@@ -0,0 +1,184 @@
+import numpy as np
+
+
+class ConfigurationLayout:
+    def __init__(self, robot_configuration, object_ranks, nq, open_fingers=()) -> None:
+        """
+        Layout of the configuration vector of the task: robot joints (ending with gripper fingers) followed by
+        freeflyer joints of objects, each with position and quaternion [x, y, z, qx, qy, qz, qw].
+        Use from_robot() to create the layout of BasicTask or contiguous() if only the numbers of joints are known.
+        Gripper fingers are known only if open_fingers is given, e.g. by robot.open_gripper_configuration().
+
+        :param robot_configuration: default (initial) configuration of the robot joints
+        :param object_ranks: dictionary of object name: rank of its freeflyer joint in the configuration
+        :param nq: size of the configuration
+        :param open_fingers: configuration of the gripper finger joints (at the end of the robot joints) when open
+        """
+        super().__init__()
+        self.robot_configuration = np.asarray(robot_configuration, dtype=np.float64)
+        self.n_robot = len(self.robot_configuration)
+        self.open_fingers = np.asarray(open_fingers, dtype=np.float64)
+        self.n_fingers = len(self.open_fingers)
+        self.object_names = list(object_ranks.keys())
+        self.object_ranks = list(object_ranks.values())
+        self.nq = nq
+        self.contiguous_objects = self.object_ranks == list(range(self.n_robot, self.n_robot + 7 * self.n_objects, 7))
+
+    @classmethod
+    def from_robot(cls, robot, object_names):
+        """
+        Layout of the configuration of the robot into which the objects were loaded, e.g. by SceneBuilder.
+
+        :param robot: manipulation robot with initial_configuration() and open_gripper_configuration(), e.g.
+            PandaRobot
+        :param object_names: names of the objects in the order they are referred to by index
+        """
+        ranks = {name: robot.rankInConfiguration[f'{name}/root_joint'] for name in object_names}
+        return cls(robot.initial_configuration(), ranks, robot.getConfigSize(),
+                   open_fingers=robot.open_gripper_configuration())
+
+    @classmethod
+    def contiguous(cls, robot_configuration, n_objects, **kwargs):
+        """ Layout with n_objects named by their indices stored right after the robot joints. """
+        n_robot = len(robot_configuration)
+        ranks = {str(i): n_robot + 7 * i for i in range(n_objects)}
+        return cls(robot_configuration, ranks, n_robot + 7 * n_objects, **kwargs)
+
+    @property
+    def n_objects(self):
+        return len(self.object_ranks)
+
+    def object_rank(self, obj):
+        """ Rank of the object given by its name or index. """
+        return self.object_ranks[obj if isinstance(obj, (int, np.integer)) else self.object_names.index(obj)]
+
+    def default(self, n=None):
+        """ Return array with the robot in its default configuration and objects at origin, shape (nq,) or (n, nq). """
+        data = np.zeros(self.nq if n is None else (n, self.nq))
+        data[..., :self.n_robot] = self.robot_configuration
+        for rank in self.object_ranks:
+            data[..., rank + 6] = 1.
+        return data
+
+    def configuration(self, q=None):
+        """
+        Return Configuration viewing q (without copy if q is float64 array) or the default configuration if None.
+        """
+        return Configuration(self.default() if q is None else q, self)
+
+    def batch(self, configs=None, n=None):
+        """
+        Return ConfigurationBatch viewing configs (without copy if configs is float64 array) or n default
+        configurations if configs is None.
+        """
+        return ConfigurationBatch(self.default(n) if configs is None else configs, self)
+
+
+class _ConfigurationViews:
+    def __init__(self, data, layout, ndim) -> None:
+        super().__init__()
+        self.data = np.asarray(data, dtype=np.float64)
+        self.layout = layout
+        assert self.data.ndim == ndim and self.data.shape[-1] == layout.nq, \
+            f"Expected {ndim}D array with {layout.nq} columns, got shape {self.data.shape}."
+
+    @property
+    def robot(self):
+        """ View of the robot joints including gripper fingers. """
+        return self.data[..., :self.layout.n_robot]
+
+    @property
+    def arm(self):
+        """ View of the robot joints without gripper fingers. """
+        return self.data[..., :self.layout.n_robot - self.layout.n_fingers]
+
+    @property
+    def fingers(self):
+        """ View of the gripper finger joints. """
+        return self.data[..., self.layout.n_robot - self.layout.n_fingers:self.layout.n_robot]
+
+    @property
+    def objects(self):
+        """ View of poses of all objects, shape (..., n_objects, 7); objects have to be stored after the robot. """
+        assert self.layout.contiguous_objects, "Objects are not stored contiguously after the robot joints."
+        n = self.layout.n_objects
+        return self.data[..., self.layout.n_robot:self.layout.n_robot + 7 * n].reshape(self.data.shape[:-1] + (n, 7))
+
+    def object_pose(self, obj):
+        """ View of the pose [x, y, z, qx, qy, qz, qw] of the object given by its name or index. """
+        rank = self.layout.object_rank(obj)
+        return self.data[..., rank:rank + 7]
+
+    def object_position(self, obj):
+        rank = self.layout.object_rank(obj)
+        return self.data[..., rank:rank + 3]
+
+    def object_quaternion(self, obj):
+        """ View of the quaternion [qx, qy, qz, qw] of the object. """
+        rank = self.layout.object_rank(obj)
+        return self.data[..., rank + 3:rank + 7]
+
+    def open_gripper(self):
+        """ Open the gripper fingers in place, see robot.open_gripper_configuration. """
+        assert self.layout.n_fingers > 0, "Gripper fingers are not known in this layout."
+        self.fingers[...] = self.layout.open_fingers
+        return self
+
+    def tolist(self):
+        """ Return the configuration as list, i.e. in the format of hpp client calls. """
+        return self.data.tolist()
+
+    def __array__(self, dtype=None, copy=None):
+        """ Return the data without a copy if possible; copy=True forces a copy and copy=False forbids it. """
+        if copy is False and dtype is not None and np.dtype(dtype) != self.data.dtype:
+            raise ValueError(f"Configuration data of type {self.data.dtype} cannot be converted to {dtype} without copy.")
+        data = self.data if dtype is None else self.data.astype(dtype, copy=False)
+        return data.copy() if copy and data is self.data else data
+
+
+class Configuration(_ConfigurationViews):
+    def __init__(self, data, layout) -> None:
+        """
+        Configuration of the task backed by a single float64 array with named views of robot and object joints.
+        Views share memory with the array, so they can be read and written without copying.
+
+        :param data: array of shape (nq,), it is not copied if it is a float64 array
+        :param layout: ConfigurationLayout
+        """
+        super().__init__(data, layout, ndim=1)
+
+    def __len__(self):
+        return self.layout.nq
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def copy(self):
+        return Configuration(self.data.copy(), self.layout)
+
+
+class ConfigurationBatch(_ConfigurationViews):
+    def __init__(self, data, layout) -> None:
+        """
+        Batch of configurations of the task backed by a single float64 array of shape (n, nq); views have the leading
+        batch dimension, e.g. batch.robot has shape (n, n_robot) and batch.object_position(0) shape (n, 3).
+
+        :param data: array of shape (n, nq), it is not copied if it is a float64 array
+        :param layout: ConfigurationLayout
+        """
+        super().__init__(data, layout, ndim=2)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, item):
+        """ Configuration at the given index or ConfigurationBatch of a slice, both view the batch data. """
+        if isinstance(item, (int, np.integer)):
+            return Configuration(self.data[item], self.layout)
+        return ConfigurationBatch(self.data[item], self.layout)
+
+    def __iter__(self):
+        return (Configuration(row, self.layout) for row in self.data)
+
+    def copy(self):
+        return ConfigurationBatch(self.data.copy(), self.layout)
@@ -1,68 +1,133 @@
+import io
 import os
-import sys
 import time
+import socket
+import contextlib
 import subprocess
-from hpp.corbaserver.manipulation import Client, loadServerPlugin
 
 from models.models_utils import get_models_path
 
 
 class CorbaServer:
 
-    def __init__(self, start=True) -> None:
+    def __init__(self, start=True, host=None, port=None, attach=False, reset=True) -> None:
+        """
+        Wrapper around hppcorbaserver process; hpp is imported only to start or probe the server, so use() works
+        without it.
+
+        :param start: start the server immediately
+        :param host: host the server listens on; used together with port
+        :param port: port of the server; if None, the default HPP port is used and the environment is left untouched,
+            otherwise HPP_HOST/HPP_PORT are set so that clients created in this process connect to this server
+        :param attach: if a server is already running on the port, reuse it instead of spawning a new one; reused
+            server is not killed by this object
+        :param reset: reset the selected problem after the server is ready; other named problem contexts (see
+            BasicTask problem_name) are kept
+        """
         super().__init__()
         self.process = None
         self.gpt = False
+        self.host = '127.0.0.1' if host is None else host
+        self.port = port
+        self.attach = attach
+        self.reset = reset
+        self.time_to_ready = None
         if start:
             self.start()
 
-    def start(self):
+    def environment(self):
+        """ Return environment variables needed to run the server and to connect clients to it. """
         conda_prefix = os.environ.get('CONDA_PREFIX')
-        ld_path = f'LD_LIBRARY_PATH={conda_prefix}/lib'
-        ros_pkg_path = f"ROS_PACKAGE_PATH={conda_prefix}/share/:{get_models_path()}/"
-        corba_command = f'{ld_path} {ros_pkg_path} hppcorbaserver'
-
-        self.process = subprocess.Popen(corba_command, shell=True)
-        print(corba_command)
-
-        assert self.wait_for_corba(), "ERROR: time out, could not start corba server!"
+        env = {
+            'LD_LIBRARY_PATH': f'{conda_prefix}/lib',
+            'ROS_PACKAGE_PATH': f"{conda_prefix}/share/:{get_models_path()}/",
+        }
+        if self.port is not None:
+            env['HPP_HOST'] = self.host
+            env['HPP_PORT'] = str(self.port)
+        return env
+
+    def use(self):
+        """ Make clients created afterwards in this process connect to this server. """
+        if self.port is not None:
+            os.environ['HPP_HOST'] = self.host
+            os.environ['HPP_PORT'] = str(self.port)
+        return self
 
-        Client().problem.resetProblem()
+    def start(self):
+        t0 = time.perf_counter()
+        self.use()
+        if not (self.attach and self.is_ready()):
+            env = self.environment()
+            corba_command = ['hppcorbaserver']
+            if self.port is not None:
+                corba_command += ['-ORBendPoint', f'giop:tcp:{self.host}:{self.port}']
+
+            self.process = subprocess.Popen(corba_command, env=dict(os.environ, **env))
+            print(' '.join([f'{k}={v}' for k, v in env.items()] + corba_command))
+
+            assert self.wait_for_corba(), "ERROR: time out, could not start corba server!"
+        self.time_to_ready = time.perf_counter() - t0
+        print(f'hppcorbaserver ready in {self.time_to_ready:.3f}s')
+
+        if self.reset:
+            from hpp.corbaserver.manipulation import Client
+            Client().problem.resetProblem()
         return self
 
-    @staticmethod
-    def wait_for_corba(time_out=100):
+    def is_ready(self):
         """
-        will wait for corba to properly boot up
+        Probe the server once: check that the port accepts connections (if the port is given explicitly) and that
+        the manipulation plugin can be loaded.
 
-        :param time_out: how many 0.05s should we wait for corba before time out
-        :return: True if success, false if time out
+        :return: True if the server is ready to be used
         """
-
-        def block_print():
-            sys.stdout = open(os.devnull, 'w')
-
-        def enable_print():
-            sys.stdout = sys.__stdout__
-
-        block_print()
-        for i in range(time_out):
+        if self.port is not None:
             try:
+                socket.create_connection((self.host, self.port), 0.5).close()
+            except OSError:
+                return False
+        from hpp.corbaserver.manipulation import loadServerPlugin
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
                 loadServerPlugin("corbaserver", os.environ.get('CONDA_PREFIX') +
                                  "/lib/hppPlugins/manipulation-corba.so")
-                enable_print()
-                return True
-            except:
-                time.sleep(0.05)
+        except Exception:
+            return False
+        return True
 
-        enable_print()
-        return False
+    def wait_for_corba(self, timeout=30., min_delay=0.005, max_delay=0.2):
+        """
+        will wait for corba to properly boot up; the server is probed with exponentially increasing delay and waiting
+        is stopped immediately if the server process exits
+
+        :param timeout: maximum time in seconds to wait for the server
+        :param min_delay: delay after the first unsuccessful probe
+        :param max_delay: maximum delay between probes
+        :return: True if success, false if time out or if the server process terminated
+        """
+        deadline = time.perf_counter() + timeout
+        delay = min_delay
+        while True:
+            if self.process is not None and self.process.poll() is not None:
+                return False
+            if self.is_ready():
+                return True
+            if time.perf_counter() + delay > deadline:
+                return False
+            time.sleep(delay)
+            delay = min(2 * delay, max_delay)
 
     def kill(self):
-        corba_command = "killall hppcorbaserver"
-        p = subprocess.Popen(corba_command, shell=True)
-        p.wait()
-        self.process.wait()
+        """ Terminate the server process started by this object, other hppcorbaserver processes are not affected. """
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5.)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
 
     def __del__(self):
         if self.gpt:
@@ -0,0 +1,164 @@
+import os
+import json
+import pathlib
+import argparse
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def random_task_configurations(task, rng, region=((0.2, -0.4), (0.7, 0.4))):
+    """
+    Sample initial and goal configurations with objects placed upright at random positions and yaw angles on the
+    table; the robot is in its initial configuration.
+
+    :param task: BasicTask
+    :param rng: numpy random Generator
+    :param region: lower and upper [x, y] bounds of object positions
+    :return: array of shape (2, nq)
+    """
+    configs = task.layout.batch(n=2)
+    for q in configs:
+        for i, item in enumerate(task.objects):
+            yaw = rng.uniform(-np.pi, np.pi)
+            q.object_position(i)[:] = list(rng.uniform(*region)) + [item.lengths[2] / 2 + 0.001]
+            q.object_quaternion(i)[:] = [0, 0, np.sin(yaw / 2), np.cos(yaw / 2)]
+    return configs.data
+
+
+def generate_task(task, task_id, seed, fps):
+    """
+    Generate one sample of the dataset: random task projected onto the free state, solved and discretized.
+
+    :return: dictionary with the task parameters, success flag and frames of the path (None if not solved)
+    """
+    rng = np.random.default_rng([seed, task_id])
+    q_init, q_goal = random_task_configurations(task, rng)
+    projected = task.project_configurations(np.stack([q_init, q_goal]), node='free')
+    result = dict(task_id=task_id, q_init=q_init.tolist(), q_goal=q_goal.tolist(), success=False, message='',
+                  path_length=0., frames=None)
+    if not projected['valid'].all():
+        result['message'] = 'projection failed or in collision'
+        return result
+    q_init, q_goal = projected['configs']
+    result.update(q_init=q_init.tolist(), q_goal=q_goal.tolist())
+    try:
+        path_id = task.solve(q_init, q_goal)
+    except Exception as e:
+        result['message'] = f'{type(e).__name__}: {e}'
+        return result
+    result.update(success=True, path_length=task.ps.pathLength(path_id), frames=task.discretize_path(path_id, fps=fps))
+    return result
+
+
+class DatasetWriter:
+    def __init__(self, output_dir, shard_frames=100000) -> None:
+        """
+        Append-only dataset of paths: frames of all paths are stored in memory-mapped .npy shards of a fixed number of
+        rows and described by an index file with one JSON line per task. A task is finished once its index line is
+        written; frames written after the last index line (i.e. by a crashed run) are overwritten on resume.
+
+        :param output_dir: directory of the dataset, created if it does not exist
+        :param shard_frames: number of rows of each shard, longer paths get their own larger shard
+        """
+        super().__init__()
+        self.output_dir = pathlib.Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_frames = shard_frames
+        self.index_filename = self.output_dir.joinpath('index.jsonl')
+        self.finished = set()
+        self.shard, self.offset = 0, 0
+        if self.index_filename.exists():
+            with open(self.index_filename) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # partially written line of a crashed run
+                    self.finished.add(record['task_id'])
+                    if record['n_frames'] > 0:
+                        self.shard, self.offset = record['shard'], record['offset'] + record['n_frames']
+        self._truncate_partial_line()
+        self._frames = None
+
+    def _truncate_partial_line(self):
+        if not self.index_filename.exists():
+            return
+        data = self.index_filename.read_bytes()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            with open(self.index_filename, 'r+b') as f:
+                f.truncate(end)
+
+    def shard_filename(self, shard):
+        return self.output_dir.joinpath(f'frames_{shard:05d}.npy')
+
+    def _open_shard(self, nq, n_frames):
+        """ Open current shard for writing of n_frames, a new shard is started if they do not fit. """
+        if self._frames is None and self.shard_filename(self.shard).exists():
+            self._frames = np.load(self.shard_filename(self.shard), mmap_mode='r+')
+        if self._frames is not None and self.offset + n_frames > len(self._frames):
+            self._frames.flush()
+            self._frames, self.shard, self.offset = None, self.shard + 1, 0
+        if self._frames is None:
+            self._frames = np.lib.format.open_memmap(self.shard_filename(self.shard), mode='w+', dtype=np.float64,
+                                                     shape=(max(self.shard_frames, n_frames), nq))
+        return self._frames
+
+    def write(self, result):
+        """
+        Append the result of generate_task to the dataset.
+        """
+        frames = result.pop('frames')
+        record = dict(result, shard=None, offset=None, n_frames=0)
+        if frames is not None and len(frames) > 0:
+            shard = self._open_shard(frames.shape[1], len(frames))
+            shard[self.offset:self.offset + len(frames)] = frames
+            shard.flush()
+            record.update(shard=self.shard, offset=self.offset, n_frames=len(frames))
+            self.offset += len(frames)
+        with open(self.index_filename, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.finished.add(result['task_id'])
+
+    def close(self):
+        if self._frames is not None:
+            self._frames.flush()
+            self._frames = None
+
+
+def generate_dataset(output_dir, n_tasks, n_servers=None, fps=10, seed=0, shard_frames=100000, task_kwargs=None):
+    """
+    Generate dataset of n_tasks random tasks on a pool of servers; tasks finished by a previous run in the same
+    directory are skipped. At most two tasks per server are in flight, so memory does not grow with n_tasks.
+    """
+    from pool import CorbaServerPool  # requires hpp, DatasetWriter and the helpers above do not
+    writer = DatasetWriter(output_dir, shard_frames)
+    pending_ids = (i for i in range(n_tasks) if i not in writer.finished)
+    with CorbaServerPool(n_servers, task_kwargs) as pool:
+        in_flight = set()
+        for task_id in pending_ids:
+            in_flight.add(pool.submit(generate_task, task_id, seed, fps))
+            if len(in_flight) < 2 * pool.n_servers:
+                continue
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                writer.write(future.result())
+        for future in in_flight:
+            writer.write(future.result())
+    writer.close()
+    return writer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate dataset of random manipulation tasks and their paths.')
+    parser.add_argument('output_dir')
+    parser.add_argument('--n-tasks', type=int, default=1000)
+    parser.add_argument('--servers', type=int, default=None)
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shard-frames', type=int, default=100000)
+    args = parser.parse_args()
+    dataset = generate_dataset(args.output_dir, args.n_tasks, args.servers, args.fps, args.seed, args.shard_frames)
+    print(f'{len(dataset.finished)} tasks in {args.output_dir}')
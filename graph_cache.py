@@ -0,0 +1,151 @@
+import json
+import hashlib
+import importlib
+import pathlib
+
+from utils import get_cache_path, write_file_atomic
+
+_PLAIN_TYPES = (str, bytes, int, float, bool, list, tuple, dict, set, type(None))
+
+
+class _RecordingProxy:
+    def __init__(self, target, calls, path=()) -> None:
+        """
+        Forwards attribute access to the target and records every method call made through it (including calls on
+        nested objects such as graph.clientBasic.problem) as (dotted path, args, kwargs).
+        """
+        self._target = target
+        self._calls = calls
+        self._path = path
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        path = self._path + (name,)
+        if callable(attr):
+            def recorded(*args, **kwargs):
+                self._calls.append(('.'.join(path), args, kwargs))
+                return attr(*args, **kwargs)
+
+            return recorded
+        if isinstance(attr, _PLAIN_TYPES):
+            return attr
+        return _RecordingProxy(attr, self._calls, path)
+
+
+def _encode(obj):
+    """ JSON encoder for arguments of graph calls that are not plain JSON types, e.g. Constraints. """
+    if isinstance(obj, tuple):
+        return list(obj)
+    return {'__class__': f'{type(obj).__module__}.{type(obj).__qualname__}', '__state__': vars(obj)}
+
+
+def _decode(d):
+    if '__class__' not in d:
+        return d
+    module, name = d['__class__'].rsplit('.', 1)
+    cls = getattr(importlib.import_module(module), name)
+    obj = cls.__new__(cls)
+    obj.__dict__.update(d['__state__'])
+    return obj
+
+
+def _resolve(obj, path):
+    for name in path.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def file_digest(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def scene_fingerprint(**scene):
+    """
+    Compute fingerprint of the scene description. Values that are existing files (urdf/srdf) are represented by the
+    hash of their content, objects (e.g. Rule) by their attributes.
+
+    :param scene: named parts of the scene description
+    :return: hex digest identifying the scene
+    """
+
+    def canonical(v):
+        if isinstance(v, (str, pathlib.Path)) and pathlib.Path(v).is_file():
+            return file_digest(v)
+        if isinstance(v, (list, tuple)):
+            return [canonical(i) for i in v]
+        if isinstance(v, dict):
+            return {k: canonical(i) for k, i in sorted(v.items())}
+        if hasattr(v, '__dict__'):
+            return canonical(vars(v))
+        if hasattr(v, 'tolist'):
+            return v.tolist()
+        return v
+
+    return hashlib.sha1(json.dumps(canonical(scene), sort_keys=True).encode()).hexdigest()
+
+
+class GraphCache:
+    def __init__(self, cache_dir=None) -> None:
+        """
+        On-disk cache of constraint graphs generated by ConstraintGraphFactory. The graph definition is stored as
+        a sequence of calls the factory made on the ConstraintGraph and is rebuilt by replaying them.
+
+        :param cache_dir: directory with cached graphs, see utils.get_cache_path if None
+        """
+        super().__init__()
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else get_cache_path('graphs')
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def filename(self, fingerprint):
+        return self.cache_dir.joinpath(f'{fingerprint}.json')
+
+    def load(self, graph, fingerprint):
+        """
+        Rebuild the graph from the cache.
+
+        :param graph: empty ConstraintGraph
+        :param fingerprint: fingerprint of the scene, see scene_fingerprint
+        :return: True if graph was found in the cache and rebuilt, False otherwise
+        """
+        filename = self.filename(fingerprint)
+        if not filename.exists():
+            return False
+        with open(filename) as f:
+            calls = json.load(f, object_hook=_decode)
+        for path, args, kwargs in calls:
+            _resolve(graph, path)(*args, **kwargs)
+        return True
+
+    def generate(self, factory):
+        """
+        Run factory.generate() while recording the calls made on the graph. Grasp, pre-grasp and placement
+        constraints are created by factory.constraints (ConstraintFactory) through its own reference to the graph,
+        so that reference is recorded as well.
+
+        :param factory: ConstraintGraphFactory with grippers, objects and rules set
+        :return: list of recorded calls to be stored by save()
+        """
+        graph = factory.graph
+        calls = []
+        proxy = _RecordingProxy(graph, calls)
+        constraints = getattr(factory, 'constraints', None)
+        factory.graph = proxy
+        if constraints is not None:
+            constraints.graph = proxy
+        try:
+            factory.generate()
+        finally:
+            factory.graph = graph
+            if constraints is not None:
+                constraints.graph = graph
+        return calls
+
+    def save(self, fingerprint, calls):
+        """
+        Store calls recorded by generate() in the cache.
+
+        :param fingerprint: fingerprint of the scene, see scene_fingerprint
+        :param calls: calls recorded by generate()
+        """
+        write_file_atomic(self.filename(fingerprint), json.dumps(calls, default=_encode))
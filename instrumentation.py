@@ -0,0 +1,207 @@
+import json
+import time
+import bisect
+import numpy as np
+
+# upper edges of latency histogram buckets in seconds, four buckets per decade from 1us to 100s
+LATENCY_BUCKETS = [10 ** (k / 4) for k in range(-24, 9)]
+
+
+def payload_size(obj):
+    """
+    Estimate the number of bytes of the value transferred over CORBA, i.e. 8 bytes per number.
+    """
+    if isinstance(obj, (bool, np.bool_)):
+        return 1
+    if isinstance(obj, (int, float, np.number)):
+        return 8
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sum(payload_size(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in obj.items())
+    return 0
+
+
+class MethodStats:
+    def __init__(self) -> None:
+        """ Statistics of calls of one method. """
+        super().__init__()
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.
+        self.max_time = 0.
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, duration, bytes_sent, bytes_received, error=False):
+        self.calls += 1
+        self.errors += error
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def percentile(self, p):
+        """ Upper estimate of the p-th percentile of latency given by the histogram bucket it falls into. """
+        threshold = p / 100 * self.calls
+        count = 0
+        for i, n in enumerate(self.histogram):
+            count += n
+            if count >= threshold and n > 0:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max_time
+        return 0.
+
+    def to_dict(self):
+        return dict(calls=self.calls, errors=self.errors, total_time=self.total_time, max_time=self.max_time,
+                    mean_time=self.total_time / max(self.calls, 1), p50=self.percentile(50), p90=self.percentile(90),
+                    p99=self.percentile(99), bytes_sent=self.bytes_sent, bytes_received=self.bytes_received,
+                    histogram=dict(buckets=LATENCY_BUCKETS, counts=self.histogram))
+
+
+class InstrumentedProxy:
+    _primitive_types = (int, float, str, bytes, bool, list, tuple, dict, set, type(None), np.ndarray)
+
+    def __init__(self, target, name, profiler) -> None:
+        """
+        Proxy forwarding attribute access to the target, calls of methods are measured by the profiler and nested
+        client objects (e.g. ps.hppcorba.problem) are wrapped by proxies as well.
+
+        :param target: wrapped object
+        :param name: name of the object used in the report, e.g. 'ps'
+        :param profiler: Profiler recording the calls
+        """
+        super().__init__()
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_children', {})
+
+    def __getattr__(self, attribute):
+        value = getattr(self._target, attribute)
+        if isinstance(value, self._primitive_types) or attribute.startswith('__'):
+            return value
+        if attribute not in self._children or self._children[attribute][0] is not value:
+            name = f'{self._name}.{attribute}'
+            wrapped = self._profiler.wrap_callable(value, name) if callable(value) else \
+                InstrumentedProxy(value, name, self._profiler)
+            self._children[attribute] = (value, wrapped)
+        return self._children[attribute][1]
+
+    def __setattr__(self, attribute, value):
+        setattr(self._target, attribute, value)
+
+
+class Profiler:
+    def __init__(self, task=None, attributes=('ps', 'robot', '_cg'), measure_payload=True) -> None:
+        """
+        Opt-in instrumentation of the hpp client objects of BasicTask: while active, the objects are replaced by
+        proxies recording per-method call counts, latency histograms and payload sizes. Use as a context manager:
+
+            with Profiler(task) as profiler:
+                task.solve(q_init, q_goal)
+            print(profiler.report())
+
+        :param task: BasicTask whose objects are instrumented
+        :param attributes: names of the instrumented attributes of the task; '_cg' is the graph returned by task.cg
+        :param measure_payload: estimate sizes of arguments and results, see payload_size
+        """
+        super().__init__()
+        self.task = task
+        self.attributes = attributes
+        self.measure_payload = measure_payload
+        self.stats = {}
+        self._originals = {}
+
+    def wrap_callable(self, function, name):
+        """ Return function recording its calls under the given name. """
+        stats = self.stats.setdefault(name, MethodStats())
+
+        def instrumented(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                stats.add(time.perf_counter() - t0, self._size(args, kwargs), 0, error=True)
+                raise
+            duration = time.perf_counter() - t0
+            stats.add(duration, self._size(args, kwargs), self._size(result))
+            return result
+
+        return instrumented
+
+    def _size(self, *values):
+        return payload_size(values) if self.measure_payload else 0
+
+    def instrument(self, obj, name):
+        """ Return proxy of the object recording its calls, e.g. to instrument objects not owned by a task. """
+        return InstrumentedProxy(obj, name, self)
+
+    def start(self):
+        for attribute in self.attributes:
+            original = getattr(self.task, attribute)
+            if original is None or isinstance(original, InstrumentedProxy):
+                continue
+            proxy = self.instrument(original, attribute.lstrip('_'))
+            self._originals[attribute] = (original, proxy)
+            setattr(self.task, attribute, proxy)
+        return self
+
+    def stop(self):
+        """
+        Restore the instrumented attributes; attributes replaced while instrumented (e.g. the graph rebuilt by
+        select_subproblem) keep their new value.
+        """
+        for attribute, (original, proxy) in self._originals.items():
+            if getattr(self.task, attribute) is proxy:
+                setattr(self.task, attribute, original)
+        self._originals = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def reset(self):
+        """ Clear the statistics; they are cleared in place as wrapped methods keep references to them. """
+        for stats in self.stats.values():
+            stats.__init__()
+
+    def to_dict(self):
+        """ Return statistics of all called methods, sorted by their total time. """
+        items = sorted(self.stats.items(), key=lambda item: -item[1].total_time)
+        return {name: stats.to_dict() for name, stats in items if stats.calls > 0}
+
+    def report_json(self, filename=None):
+        """
+        Return the statistics as JSON.
+
+        :param filename: if given, the JSON is written into this file
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(text)
+        return text
+
+    def report(self, limit=None):
+        """
+        Return human readable table of the statistics.
+
+        :param limit: maximum number of listed methods, all methods if None
+        """
+        rows = list(self.to_dict().items())[:limit]
+        width = max([len(name) for name, _ in rows] + [6])
+        lines = [f'{"method":{width}s} {"calls":>8s} {"total[s]":>10s} {"mean[ms]":>10s} {"p50[ms]":>9s} '
+                 f'{"p99[ms]":>9s} {"sent[kB]":>10s} {"recv[kB]":>10s}']
+        for name, s in rows:
+            lines.append(f'{name:{width}s} {s["calls"]:8d} {s["total_time"]:10.4f} {1e3 * s["mean_time"]:10.4f} '
+                         f'{1e3 * s["p50"]:9.4f} {1e3 * s["p99"]:9.4f} {s["bytes_sent"] / 1e3:10.2f} '
+                         f'{s["bytes_received"] / 1e3:10.2f}')
+        return '\n'.join(lines)
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def select_keyframes(values, tolerance):
+    """
+    Select frames such that linear interpolation between consecutive selected frames differs from every dropped frame
+    by at most tolerance in each coordinate (Ramer-Douglas-Peucker simplification of the trajectory).
+
+    :param values: array of shape (n_frames, n_values), e.g. positions and quaternions of all animated objects
+    :param tolerance: maximum allowed absolute error of interpolated values
+    :return: sorted array of indices of selected frames, the first and the last frame are always selected
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[0]
+    if n <= 2:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    segments = [(0, n - 1)]
+    while segments:
+        i, j = segments.pop()
+        if j - i < 2:
+            continue
+        t = np.linspace(0., 1., j - i + 1)[1:-1, None]
+        interpolated = (1 - t) * values[i] + t * values[j]
+        errors = np.abs(values[i + 1:j] - interpolated).max(axis=1)
+        k = int(np.argmax(errors))
+        if errors[k] > tolerance:
+            keep[i + 1 + k] = True
+            segments += [(i, i + 1 + k), (i + 1 + k, j)]
+    return np.flatnonzero(keep)
+
+
+def make_quaternions_continuous(quaternions):
+    """
+    Flip signs of quaternions such that consecutive quaternions lie in the same hemisphere, which is required for
+    meaningful interpolation between them.
+
+    :param quaternions: array of shape (n_frames, 4)
+    :return: array of shape (n_frames, 4) representing the same rotations
+    """
+    quaternions = np.array(quaternions, dtype=np.float64)
+    if len(quaternions) < 2:
+        return quaternions
+    flips = np.sum(quaternions[1:] * quaternions[:-1], axis=1) < 0
+    signs = np.concatenate([[1.], np.where(np.cumsum(flips) % 2 == 1, -1., 1.)])
+    return quaternions * signs[:, None]
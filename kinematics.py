@@ -0,0 +1,214 @@
+import pathlib
+import xml.etree.ElementTree as ET
+import numpy as np
+
+
+def rpy_to_matrix(rpy):
+    """
+    Convert roll, pitch, yaw angles used by urdf to the rotation matrix
+
+    :param rpy: [roll, pitch, yaw]
+    :return: 3 x 3 numpy array
+    """
+    cr, cp, cy = np.cos(rpy)
+    sr, sp, sy = np.sin(rpy)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ])
+
+
+def axis_angle_to_matrix(axis, angles):
+    """
+    Rotation matrices around unit axis by given angles (Rodrigues' formula)
+
+    :param axis: unit axis [x, y, z]
+    :param angles: array of N angles
+    :return: N x 3 x 3 numpy array
+    """
+    x, y, z = axis
+    k = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    angles = np.asarray(angles, dtype=np.float64)[:, None, None]
+    return np.eye(3) + np.sin(angles) * k + (1 - np.cos(angles)) * (k @ k)
+
+
+def matrix_to_quaternion(rotations):
+    """
+    Convert rotation matrices to quaternions in (x, y, z, w) format
+
+    :param rotations: N x 3 x 3 numpy array
+    :return: N x 4 numpy array
+    """
+    r = np.asarray(rotations)
+    q = np.empty(r.shape[:-2] + (4,))
+    trace = r[..., 0, 0] + r[..., 1, 1] + r[..., 2, 2]
+    # choose the numerically stable formula for each matrix based on the largest diagonal element
+    case = np.argmax(np.stack([trace, r[..., 0, 0], r[..., 1, 1], r[..., 2, 2]], axis=-1), axis=-1)
+
+    m = case == 0
+    s = 2 * np.sqrt(np.maximum(1 + trace[m], 1e-12))
+    q[m] = np.stack([(r[m, 2, 1] - r[m, 1, 2]) / s, (r[m, 0, 2] - r[m, 2, 0]) / s,
+                     (r[m, 1, 0] - r[m, 0, 1]) / s, s / 4], axis=-1)
+    for i, j, k in [(0, 1, 2), (1, 2, 0), (2, 0, 1)]:
+        m = case == i + 1
+        s = 2 * np.sqrt(np.maximum(1 + r[m, i, i] - r[m, j, j] - r[m, k, k], 1e-12))
+        q[m, i] = s / 4
+        q[m, j] = (r[m, j, i] + r[m, i, j]) / s
+        q[m, k] = (r[m, k, i] + r[m, i, k]) / s
+        q[m, 3] = (r[m, k, j] - r[m, j, k]) / s
+    return q
+
+
+def quaternion_to_matrix(quaternions):
+    """
+    Convert quaternions in (x, y, z, w) format to rotation matrices
+
+    :param quaternions: N x 4 numpy array
+    :return: N x 3 x 3 numpy array
+    """
+    x, y, z, w = np.moveaxis(np.asarray(quaternions, dtype=np.float64), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=-1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=-1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def _parse_origin(element):
+    """ Return 4 x 4 transformation given by the <origin> sub-element of the element, identity if missing. """
+    pose = np.eye(4)
+    origin = element.find('origin')
+    if origin is not None:
+        pose[:3, :3] = rpy_to_matrix(np.array(origin.get('rpy', '0 0 0').split(), dtype=np.float64))
+        pose[:3, 3] = np.array(origin.get('xyz', '0 0 0').split(), dtype=np.float64)
+    return pose
+
+
+def _parse_rgba(material, materials):
+    if material is None:
+        return None
+    color = material.find('color')
+    if color is not None:
+        return np.array(color.get('rgba').split(), dtype=np.float64)
+    return materials.get(material.get('name'))
+
+
+class URDFKinematics:
+    movable_joint_types = ('revolute', 'continuous', 'prismatic')
+
+    def __init__(self, urdf_filename, mesh_path=None) -> None:
+        """
+        Kinematic tree and visual geometries of the robot parsed from urdf file. Only numpy is required, i.e. it can
+        be used without pyphysx.
+
+        :param urdf_filename: path to the .urdf file
+        :param mesh_path: folder used to resolve package:// mesh filenames, folder of the urdf file if None
+        """
+        super().__init__()
+        urdf_filename = pathlib.Path(urdf_filename)
+        self.mesh_path = urdf_filename.parent if mesh_path is None else pathlib.Path(mesh_path)
+        root = ET.parse(urdf_filename).getroot()
+
+        materials = {m.get('name'): _parse_rgba(m, {}) for m in root.findall('material')}
+
+        self.visuals = {}
+        for link in root.findall('link'):
+            self.visuals[link.get('name')] = [
+                dict(origin=_parse_origin(v), geometry=self._parse_geometry(v.find('geometry')),
+                     rgba=_parse_rgba(v.find('material'), materials))
+                for v in link.findall('visual')
+            ]
+
+        self.joints = []
+        for joint in root.findall('joint'):
+            axis = joint.find('axis')
+            limit = joint.find('limit')
+            self.joints.append(dict(
+                name=joint.get('name'), type=joint.get('type'), origin=_parse_origin(joint),
+                parent=joint.find('parent').get('link'), child=joint.find('child').get('link'),
+                axis=np.array(axis.get('xyz').split(), dtype=np.float64) if axis is not None else np.zeros(3),
+                lower=float(limit.get('lower', -np.pi)) if limit is not None else -np.pi,
+                upper=float(limit.get('upper', np.pi)) if limit is not None else np.pi,
+            ))
+
+        children = {j['child'] for j in self.joints}
+        roots = [name for name in self.visuals.keys() if name not in children]
+        assert len(roots) == 1, "URDF has to contain exactly one root link."
+        self.root_link = roots[0]
+
+        # order joints such that parent link pose is computed before the child link pose
+        ordered, known = [], {self.root_link}
+        pending = list(self.joints)
+        while pending:
+            ready = [j for j in pending if j['parent'] in known]
+            assert len(ready) > 0, "URDF kinematic tree is not connected."
+            ordered += ready
+            known |= {j['child'] for j in ready}
+            pending = [j for j in pending if j['child'] not in known]
+        self.joints = ordered
+        self.movable_joints = [j['name'] for j in self.joints if j['type'] in self.movable_joint_types]
+
+    def _parse_geometry(self, geometry):
+        box = geometry.find('box')
+        if box is not None:
+            return dict(type='box', size=np.array(box.get('size').split(), dtype=np.float64))
+        mesh = geometry.find('mesh')
+        if mesh is not None:
+            filename = mesh.get('filename')
+            if filename.startswith('package://'):
+                filename = self.mesh_path.joinpath(filename[len('package://'):])
+            scale = mesh.get('scale')
+            return dict(type='mesh', filename=str(filename),
+                        scale=np.array(scale.split(), dtype=np.float64) if scale is not None else np.ones(3))
+        raise ValueError(f'Unsupported urdf geometry: {[c.tag for c in geometry]}')
+
+    def joint_limits(self):
+        """
+        Return limits of movable joints, continuous joints are limited to [-pi, pi].
+
+        :return: tuple of arrays of lower and upper limits in the order of self.movable_joints
+        """
+        joints = {j['name']: j for j in self.joints}
+        return (np.array([joints[n]['lower'] for n in self.movable_joints]),
+                np.array([joints[n]['upper'] for n in self.movable_joints]))
+
+    def link_poses(self, joint_values=None, base_pose=None):
+        """
+        Compute global poses of all links.
+
+        :param joint_values: values of movable joints in the order of self.movable_joints, zeros if None
+        :param base_pose: 4 x 4 pose of the root link, identity if None
+        :return: dictionary link name -> 4 x 4 numpy array
+        """
+        if joint_values is None:
+            joint_values = np.zeros(len(self.movable_joints))
+        return {link: poses[0] for link, poses in self.link_poses_batch([joint_values], base_pose).items()}
+
+    def link_poses_batch(self, joint_values, base_pose=None):
+        """
+        Compute global poses of all links for many configurations at once, each joint is processed by a single
+        vectorized operation over all configurations.
+
+        :param joint_values: N x ndof array of movable joint values in the order of self.movable_joints
+        :param base_pose: 4 x 4 pose of the root link, identity if None
+        :return: dictionary link name -> N x 4 x 4 numpy array
+        """
+        joint_values = np.asarray(joint_values, dtype=np.float64)
+        n = joint_values.shape[0]
+        joint_values = joint_values.reshape(n, len(self.movable_joints))
+        values = dict(zip(self.movable_joints, joint_values.T))
+        poses = {self.root_link: np.broadcast_to(np.eye(4) if base_pose is None else np.asarray(base_pose), (n, 4, 4))}
+        for joint in self.joints:
+            parent = poses[joint['parent']] @ joint['origin']
+            if joint['type'] in ('revolute', 'continuous'):
+                child = np.empty((n, 4, 4))
+                child[:, :, :3] = parent[:, :, :3] @ axis_angle_to_matrix(joint['axis'], values[joint['name']])
+                child[:, :, 3] = parent[:, :, 3]
+            elif joint['type'] == 'prismatic':
+                child = parent.copy()
+                child[:, :3, 3] += (parent[:, :3, :3] @ joint['axis']) * values[joint['name']][:, None]
+            else:
+                child = parent
+            poses[joint['child']] = child
+        return poses
@@ -4,8 +4,8 @@ from corba import CorbaServer
 if __name__ == '__main__':
     corba_server = CorbaServer()
     task = BasicTask()
-    o1_p = [0.1, 0.1, 0.1]
-    o2_p = [0.5, 0.5, 0.2]
-    q = [0, 0, 0, 1]
-    config = task.robot.initial_configuration() + o1_p + q + o2_p + q
-    task.render.visualise_configurations([config])
+    config = task.layout.configuration()
+    config.object_position('cuboid')[:] = [0.1, 0.1, 0.1]
+    config.object_position('cuboid2')[:] = [0.5, 0.5, 0.2]
+    task.render.visualise_configurations([config.data])
+    input('Press enter to exit.')
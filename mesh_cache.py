@@ -0,0 +1,92 @@
+import os
+import hashlib
+import pathlib
+import numpy as np
+
+from utils import get_cache_path, write_file_atomic
+
+
+_WHITE = np.array([255, 255, 255, 255], dtype=np.uint8)
+
+
+def _vertex_colors(mesh):
+    """ Return RGBA vertex colors (N x 4 uint8) of the mesh given by vertex, face or material colors, or None. """
+    visual = mesh.visual.to_color() if hasattr(mesh.visual, 'to_color') else mesh.visual
+    if visual.kind is None:
+        return None
+    return np.asarray(visual.vertex_colors, dtype=np.uint8)
+
+
+class MeshCache:
+    def __init__(self, cache_dir=None) -> None:
+        """
+        Cache of meshes converted from text formats (dae/stl/obj) to binary numpy arrays. Each mesh is converted only
+        once, keyed by the hash of the file content and the requested level of detail; cached arrays are memory
+        mapped, so processes that load the same mesh share the memory.
+
+        :param cache_dir: directory with cached meshes, see utils.get_cache_path if None
+        """
+        super().__init__()
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else get_cache_path('meshes')
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._digests = {}
+
+    def _digest(self, filename):
+        """ Hash of the file content, memoized by file path, size and modification time. """
+        stat = os.stat(filename)
+        key = (str(filename), stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            with open(filename, 'rb') as f:
+                self._digests[key] = hashlib.sha1(f.read()).hexdigest()
+        return self._digests[key]
+
+    def load(self, filename, max_faces=None):
+        """
+        Load mesh from the cache, the mesh is converted and stored first if it is not cached yet.
+
+        :param filename: mesh file in any format supported by trimesh
+        :param max_faces: if given, the mesh is decimated to approximately this number of faces (level of detail
+            variant); decimation stops early if no more edges can be collapsed without breaking the topology, e.g. the
+            Panda link0 decimated to 500 faces has 551 faces
+        :return: dictionary with read-only arrays 'vertices' (N x 3 float32), 'faces' (M x 3 uint32) and optionally
+            'colors' (N x 3 float32 in range [0, 1]), i.e. the material or vertex colors of the mesh; parts without
+            color are white if other parts are colored, otherwise colors are omitted and the URDF material is used
+        """
+        key = self._digest(filename) + ('' if max_faces is None else f'_lod{max_faces}')
+        folder = self.cache_dir.joinpath(key)
+        if not folder.joinpath('index').exists():
+            self._convert(filename, folder, max_faces)
+        names = folder.joinpath('index').read_text().split()
+        return {name: np.load(folder.joinpath(f'{name}.npy'), mmap_mode='r') for name in names}
+
+    @staticmethod
+    def _convert(filename, folder, max_faces):
+        import trimesh
+        # parts are colored separately, concatenating them by force='mesh' drops colors of differing materials
+        parts = trimesh.load(filename, force='scene').dump()
+        colors = [_vertex_colors(part) for part in parts]
+        if any(c is not None for c in colors):
+            for part, c in zip(parts, colors):
+                part.visual = trimesh.visual.ColorVisuals(part, vertex_colors=_WHITE if c is None else c)
+        mesh = trimesh.util.concatenate(parts) if len(parts) > 1 else parts[0]
+        mesh.merge_vertices()
+        vertex_colors = _vertex_colors(mesh)
+        if max_faces is not None and len(mesh.faces) > max_faces:
+            original = mesh
+            mesh = mesh.simplify_quadric_decimation(face_count=max_faces)
+            if vertex_colors is not None:
+                # decimation drops the visual, colors are transferred from the nearest original vertices
+                vertex_colors = vertex_colors[original.kdtree.query(mesh.vertices)[1]]
+
+        arrays = dict(vertices=np.asarray(mesh.vertices, dtype=np.float32),
+                      faces=np.asarray(mesh.faces, dtype=np.uint32))
+        if vertex_colors is not None:
+            arrays['colors'] = np.asarray(vertex_colors[:, :3], dtype=np.float32) / 255
+
+        folder.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            tmp = folder.joinpath(f'.{name}.{os.getpid()}.npy')
+            np.save(tmp, array)
+            os.replace(tmp, folder.joinpath(f'{name}.npy'))
+        # index is written last, it marks the conversion as complete
+        write_file_atomic(folder.joinpath('index'), '\n'.join(arrays.keys()))
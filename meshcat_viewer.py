@@ -0,0 +1,234 @@
+import pathlib
+import umsgpack
+import numpy as np
+
+import meshcat
+import meshcat.geometry as g
+from meshcat.animation import Animation, AnimationClip, AnimationTrack
+from meshcat.servers.tree import SceneTree, find_node, walk
+from meshcat.servers.zmqserver import VIEWER_ROOT, create_command
+
+from kinematics import URDFKinematics, matrix_to_quaternion, quaternion_to_matrix
+from keyframes import select_keyframes, make_quaternions_continuous
+from configuration import ConfigurationLayout, ConfigurationBatch
+
+
+class OfflineMeshcatWindow:
+    def __init__(self) -> None:
+        """
+        Replacement of meshcat ViewerWindow that keeps the scene in memory instead of sending it to meshcat server.
+        No server process and no browser are needed, the scene is exported by get_scene() as self-contained HTML.
+        """
+        super().__init__()
+        self.tree = SceneTree()
+
+    def send(self, command):
+        cmd_data = command.lower()
+        data = umsgpack.packb(cmd_data)
+        path = [p for p in cmd_data['path'].split('/') if len(p) > 0]
+        if cmd_data['type'] == 'set_object':
+            find_node(self.tree, path).object = data
+            find_node(self.tree, path).properties = []
+        elif cmd_data['type'] == 'set_transform':
+            find_node(self.tree, path).transform = data
+        elif cmd_data['type'] == 'set_property':
+            find_node(self.tree, path).properties.append(data)
+        elif cmd_data['type'] == 'set_animation':
+            find_node(self.tree, path).animation = data
+        elif cmd_data['type'] == 'delete':
+            if len(path) > 0:
+                find_node(self.tree, path[:-1]).pop(path[-1], None)
+            else:
+                self.tree = SceneTree()
+
+    def get_scene(self):
+        """ Return the scene as self-contained HTML, in the same format as meshcat server does. """
+        commands = ''
+        for node in walk(self.tree):
+            if node.object is not None:
+                commands += create_command(node.object)
+            for p in node.properties:
+                commands += create_command(p)
+            if node.transform is not None:
+                commands += create_command(node.transform)
+            if node.animation is not None:
+                commands += create_command(node.animation)
+
+        with open(pathlib.Path(VIEWER_ROOT).joinpath('main.min.js')) as f:
+            mainminjs = f.read()
+        return f"""<!DOCTYPE html>
+<html>
+    <head> <meta charset=utf-8> <title>MeshCat</title> </head>
+    <body>
+        <div id="meshcat-pane"></div>
+        <script>{mainminjs}</script>
+        <script>
+            var viewer = new MeshCat.Viewer(document.getElementById("meshcat-pane"));
+            {commands}
+        </script>
+        <style>
+            body {{margin: 0; }}
+            #meshcat-pane {{ width: 100vw; height: 100vh; overflow: hidden; }}
+        </style>
+    </body>
+</html>
+"""
+
+    def open(self):
+        return self
+
+    def wait(self):
+        return ''
+
+
+def _material(rgba, vertex_colors=False):
+    if rgba is None:
+        return g.MeshLambertMaterial(vertexColors=vertex_colors)
+    r, gr, b = (np.clip(rgba[:3], 0., 1.) * 255).astype(int)
+    return g.MeshLambertMaterial(color=int(r) << 16 | int(gr) << 8 | int(b), opacity=float(rgba[3]),
+                                 transparent=bool(rgba[3] < 1.), vertexColors=vertex_colors)
+
+
+def _geometry(geometry, mesh_cache=None, max_faces=None):
+    """
+    Return meshcat geometry and information whether the geometry has vertex colors. Mesh scale is not applied to
+    the vertices (memory mapped arrays of mesh_cache are sent without a copy), see _scale_transform.
+    """
+    if geometry['type'] == 'box':
+        return g.Box(geometry['size']), False
+    if mesh_cache is not None:
+        mesh = mesh_cache.load(geometry['filename'], max_faces=max_faces)
+        return g.TriangularMeshGeometry(mesh['vertices'], mesh['faces'], mesh.get('colors')), 'colors' in mesh
+    suffix = pathlib.Path(geometry['filename']).suffix.lower()
+    loaders = {'.dae': g.DaeMeshGeometry, '.obj': g.ObjMeshGeometry, '.stl': g.StlMeshGeometry}
+    return loaders[suffix].from_file(geometry['filename']), False
+
+
+def _scale_transform(geometry):
+    """ Return 4 x 4 transformation scaling the geometry returned by _geometry, i.e. the scale of meshes. """
+    return np.diag(np.append(geometry.get('scale', np.ones(3)), 1.))
+
+
+class MeshcatTaskViewer:
+    def __init__(self, robot_urdf, mesh_path=None, robot_base_pose=None, window=None, mesh_cache=None,
+                 max_faces=None) -> None:
+        """
+        Renders task configurations (robot joints followed by [x, y, z, i, j, k, w] of each movable box) in meshcat
+        directly from urdf geometry, without pyphysx.
+
+        :param robot_urdf: urdf filename of the robot
+        :param mesh_path: folder used to resolve package:// mesh filenames
+        :param robot_base_pose: 4 x 4 pose of the robot base, identity if None
+        :param window: meshcat window, e.g. OfflineMeshcatWindow for headless rendering; if None, meshcat server
+            is started
+        :param mesh_cache: optional MeshCache used to load meshes from preprocessed binary arrays
+        :param max_faces: level of detail of meshes loaded from mesh_cache, full resolution if None
+        """
+        super().__init__()
+        self.vis = meshcat.Visualizer(window=window)
+        self.robot = URDFKinematics(robot_urdf, mesh_path)
+        self.robot_base_pose = np.eye(4) if robot_base_pose is None else robot_base_pose
+        self.obstacles = []
+        self.boxes = []
+        self.robot_uploaded = False
+        self.n_uploaded_obstacles = 0
+        self.n_uploaded_boxes = 0
+        self.mesh_cache = mesh_cache
+        self.max_faces = max_faces
+
+    def add_obstacle(self, urdf_filename):
+        """ Add static obstacle given by urdf file. """
+        self.obstacles.append(URDFKinematics(urdf_filename))
+
+    def add_box(self, size, rgba=None):
+        """ Add movable box, its pose is given by the configuration following the robot joints. """
+        self.boxes.append(dict(size=np.asarray(size, dtype=np.float64), rgba=rgba))
+
+    def _set_urdf_objects(self, vis, kinematics):
+        for link, visuals in kinematics.visuals.items():
+            for i, visual in enumerate(visuals):
+                geometry, vertex_colors = _geometry(visual['geometry'], self.mesh_cache, self.max_faces)
+                vis[link][f'visual_{i}'].set_object(geometry, _material(visual['rgba'], vertex_colors))
+                vis[link][f'visual_{i}'].set_transform(visual['origin'] @ _scale_transform(visual['geometry']))
+
+    def upload_geometry(self):
+        """
+        Send geometry of robot, obstacles and boxes to the viewer; later calls send only obstacles and boxes added
+        since, i.e. the robot meshes are sent once.
+        """
+        if not self.robot_uploaded:
+            self._set_urdf_objects(self.vis['robot'], self.robot)
+            self.robot_uploaded = True
+        for i in range(self.n_uploaded_obstacles, len(self.obstacles)):
+            self._set_urdf_objects(self.vis[f'obstacle_{i}'], self.obstacles[i])
+            for link, pose in self.obstacles[i].link_poses().items():
+                self.vis[f'obstacle_{i}'][link].set_transform(pose)
+        self.n_uploaded_obstacles = len(self.obstacles)
+        for i in range(self.n_uploaded_boxes, len(self.boxes)):
+            self.vis[f'object_{i}'].set_object(g.Box(self.boxes[i]['size']), _material(self.boxes[i]['rgba']))
+        self.n_uploaded_boxes = len(self.boxes)
+
+    def _poses(self, configurations):
+        """
+        Compute poses of all moving parts of the scene for all configurations at once.
+
+        :param configurations: array of shape (n_frames, nq)
+        :return: list of (meshcat path, positions of shape (n_frames, 3), quaternions (x, y, z, w) of shape
+            (n_frames, 4))
+        """
+        layout = ConfigurationLayout.contiguous(np.zeros(len(self.robot.movable_joints)), len(self.boxes))
+        configurations = ConfigurationBatch(configurations, layout)
+        poses = []
+        for link, p in self.robot.link_poses_batch(configurations.robot, self.robot_base_pose).items():
+            poses.append((f'robot/{link}', p[:, :3, 3], matrix_to_quaternion(p[:, :3, :3])))
+        for j in range(len(self.boxes)):
+            poses.append((f'object_{j}', configurations.object_position(j), configurations.object_quaternion(j)))
+        return poses
+
+    def show(self, config):
+        """ Stream poses of the given configuration to the viewer, see upload_geometry for the geometry sent. """
+        self.upload_geometry()
+        for path, positions, quaternions in self._poses(np.asarray([config], dtype=np.float64)):
+            pose = np.eye(4)
+            pose[:3, :3] = quaternion_to_matrix(quaternions[0])
+            pose[:3, 3] = positions[0]
+            self.vis[path].set_transform(pose)
+
+    def animation(self, configurations, fps=10, tolerance=None):
+        """
+        Create meshcat animation of the given configurations; tracks of all frames are created at once from the pose
+        arrays instead of setting transforms frame by frame.
+
+        :param configurations: list of configurations or array of shape (n_frames, nq)
+        :param fps: number of frames per second
+        :param tolerance: if given, only keyframes are stored and the viewer interpolates between them; interpolated
+            positions [m] and quaternion components differ from the dropped frames by at most this value
+        :return: meshcat Animation
+        """
+        configurations = np.asarray(configurations, dtype=np.float64)
+        poses = [(path, positions, make_quaternions_continuous(quaternions))
+                 for path, positions, quaternions in self._poses(configurations)]
+        if tolerance is None:
+            frames = np.arange(configurations.shape[0])
+        else:
+            frames = select_keyframes(np.concatenate([np.hstack(p[1:]) for p in poses], axis=1), tolerance)
+
+        animation = Animation(default_framerate=fps)
+        for path, positions, quaternions in poses:
+            animation.clips[self.vis[path].path] = AnimationClip(tracks={
+                'position': AnimationTrack('position', 'vector3', frames.tolist(), positions[frames].tolist()),
+                'quaternion': AnimationTrack('quaternion', 'quaternion', frames.tolist(), quaternions[frames].tolist()),
+            }, fps=fps)
+        return animation
+
+    def publish(self, configurations, fps=10, tolerance=None):
+        """
+        Upload the animation of the given configurations to the viewer; only geometry that was not uploaded before is
+        sent, i.e. only poses are sent for a viewer that is kept alive.
+        """
+        self.upload_geometry()
+        self.vis.set_animation(self.animation(configurations, fps, tolerance), play=True, repetitions=1)
+
+    def static_html(self):
+        """ Return the scene including the animation as self-contained HTML. """
+        return self.vis.static_html()
@@ -1,5 +1,9 @@
 from typing import List
+import re
 import pathlib
+import numpy as np
+from models.models_utils import get_generated_model_files
+from kinematics import quaternion_to_matrix
 
 class Cuboid(object):
     main_folder = pathlib.Path(__file__).absolute().parent
@@ -11,23 +15,36 @@ class Cuboid(object):
                     "handleZpySp", "handleZmySp", "handleYpz", "handleYmz", "handleXmz", "handleXpz", "handleYpzSm",
                     "handleYmzSm", "handleYpzSp", "handleYmzSp"]
 
-    def __init__(self, lengths) -> None:
+    def __init__(self, lengths, handles=None) -> None:
         """
-        Create urdf/srdf files for the box of given size.
+        Create urdf/srdf files for the box of given size, the files are shared by all cuboids of the same size.
         This object can be passed to hpp function loadEnvironmentObject() or loadObjectModel() as argument.
 
+        :param lengths: size of the cuboid [x, y, z] or a single float for a cube
+        :param handles: names of the handles written to the srdf, all handles if None; see reachable_handles()
         """
-        self.urdfFilename = str(self.main_folder.joinpath(f"cuboid.urdf"))
-        self.srdfFilename = str(self.main_folder.joinpath(f"cuboid.srdf"))
         self.max_handles_depth = 0.07
 
         self.lengths = [lengths] * 3 if isinstance(lengths, float) else lengths
+        self.handle_names = [h for h in self._all_handles if handles is None or h in handles]
 
         assert len(self.lengths) == 3
-        with open(self.urdfFilename, 'w') as f:
-            f.write(self.urdf(lengths=self.lengths))
-        with open(self.srdfFilename, 'w') as f:
-            f.write(self.srdf(lengths=self.lengths, max_handles_depth=self.max_handles_depth))
+        assert handles is None or len(self.handle_names) == len(handles), "Unknown handle names."
+        self.urdfFilename, self.srdfFilename = get_generated_model_files(
+            'cuboid', self.urdf(lengths=self.lengths),
+            self.srdf(lengths=self.lengths, max_handles_depth=self.max_handles_depth, handles=handles)
+        )
+
+    @classmethod
+    def with_reachable_handles(cls, lengths, **kwargs):
+        """
+        Create cuboid with only the handles that are reachable in the expected placements, see reachable_handles().
+
+        :param lengths: size of the cuboid [x, y, z] or a single float for a cube
+        :param kwargs: arguments of reachable_handles()
+        """
+        lengths = [lengths] * 3 if isinstance(lengths, float) else lengths
+        return cls(lengths, handles=cls.reachable_handles(lengths, **kwargs))
 
     def initial_configuration(self) -> List[float]:
         """
@@ -35,9 +52,9 @@ class Cuboid(object):
         """
         return [0.0, 0, self.lengths[2] / 2 + 0.001, ] + [0, 0, 0, 1]
 
-    def handles(cls, prefix: str = ""):
+    def handles(self, prefix: str = ""):
         """
-        This function returns list of all handles prepended with the prefix.
+        This function returns list of handles of this cuboid prepended with the prefix.
         Handle description following:
                     HandleAbc(Sd)
                         A - X/Y/Z from which coordinate will the gripper come from
@@ -48,7 +65,68 @@ class Cuboid(object):
         :param prefix: prefix for handle name
         :return: list of handles [prefix + handleAbc, prefix + handleAbc, ...]
         """
-        return [prefix + h for h in cls._all_handles]
+        return [prefix + h for h in self.handle_names]
+
+    @classmethod
+    def handle_frames(cls, lengths, max_handles_depth=0.07):
+        """
+        Positions of handles and directions the gripper approaches them from, derived from the handle names (see
+        handles()); side handles are approached from the diagonal between the main and the side axis.
+
+        :param lengths: [width in x, width in y, width in z]
+        :param max_handles_depth: the maximum distance of handles from the object boundary
+        :return: tuple of handle names, array N x 3 of handle positions and array N x 3 of unit vectors pointing from
+            the handle towards the approaching gripper, both in the object frame
+        """
+        dist = [0 if l / 2 < max_handles_depth else l / 2 - max_handles_depth for l in lengths]
+        axes = dict(X=0, Y=1, Z=2, x=0, y=1, z=2)
+        positions, directions = np.zeros((len(cls._all_handles), 3)), np.zeros((len(cls._all_handles), 3))
+        for i, name in enumerate(cls._all_handles):
+            a, sign, c = axes[name[6]], 1. if name[7] == 'p' else -1., axes[name[8]]
+            positions[i, a], directions[i, a] = sign * dist[a], sign
+            if name.endswith(('Sm', 'Sp')):
+                side, side_sign = 3 - a - c, 1. if name[-1] == 'p' else -1.
+                positions[i, side], directions[i, side] = side_sign * dist[side], side_sign
+        return list(cls._all_handles), positions, directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+    @classmethod
+    def reachable_handles(cls, lengths, robot_base_pose=None, reach_m=0.8, region=None, orientations=None,
+                          surface_height=None, hand_length=0.1, clearance=0.01, samples_per_axis=3):
+        """
+        Select handles that can be grasped in at least one of the expected placements of the object: the hand
+        approaching the handle is within reach of the robot and stays above the supporting surface. Handles approached
+        from the side facing away from the robot are therefore dropped near the boundary of the reach.
+
+        :param lengths: [width in x, width in y, width in z]
+        :param robot_base_pose: 4x4 pose of the robot base, identity if None
+        :param reach_m: maximum reach of the robot end effector, e.g. PandaRobot.reach_m
+        :param region: tuple of lower and upper [x, y, z] bounds of object positions, object at origin if None
+        :param orientations: list of object orientations as quaternions [x, y, z, w], upright object if None
+        :param surface_height: height of the supporting surface, surface is not checked if None
+        :param hand_length: distance from the handle to the end of the hand (i.e. to the flange of the robot) along
+            the approach direction
+        :param clearance: minimum distance of the hand above the surface
+        :param samples_per_axis: number of positions sampled along each axis of the region
+        :return: list of handle names
+        """
+        base = np.eye(4) if robot_base_pose is None else np.asarray(robot_base_pose)
+        if region is None:
+            positions = np.zeros((1, 3))
+        else:
+            grid = np.linspace(region[0], region[1], samples_per_axis)
+            positions = np.stack(np.meshgrid(grid[:, 0], grid[:, 1], grid[:, 2], indexing='ij'), -1).reshape(-1, 3)
+        rotations = quaternion_to_matrix([[0, 0, 0, 1]] if orientations is None else orientations)
+
+        names, handle_positions, directions = cls.handle_frames(lengths)
+        # handles and approach directions for all orientations O and positions P: O x P x N x 3
+        handles_world = positions[None, :, None] + (rotations[:, None, None] @ handle_positions[..., None])[..., 0]
+        directions_world = np.broadcast_to((rotations[:, None, None] @ directions[..., None])[..., 0],
+                                           handles_world.shape)
+        hand_end = handles_world + hand_length * directions_world
+        reachable = np.linalg.norm(hand_end - base[:3, 3], axis=-1) <= reach_m
+        if surface_height is not None:
+            reachable &= hand_end[..., 2] >= surface_height + clearance
+        return [name for name, r in zip(names, reachable.any(axis=(0, 1))) if r]
 
     def contact_surfaces(self, prefix):
         """
@@ -94,13 +172,22 @@ class Cuboid(object):
         """
 
     @staticmethod
-    def srdf(lengths: List[float], max_handles_depth: float) -> str:
+    def srdf(lengths: List[float], max_handles_depth: float, handles: List[str] = None) -> str:
         """
         this function generates text for .srdf file with given parameters to create handles and contact surfaces
         :param lengths: [width in x, width in y, width in z]
         :param max_handles_depth: the maximum distance of handles from the object boundary
+        :param handles: names of the handles written to the file, all handles if None
         :return: text of .srdf file with handles and contact surfaces for the cuboid object
         """
+        srdf = Cuboid._srdf_all_handles(lengths, max_handles_depth)
+        if handles is None:
+            return srdf
+        return re.sub(r'\s*<handle name="(\w+)".*?</handle>',
+                      lambda m: m.group(0) if m.group(1) in handles else '', srdf, flags=re.DOTALL)
+
+    @staticmethod
+    def _srdf_all_handles(lengths: List[float], max_handles_depth: float) -> str:
 
         # is the distance of the handle from the center of the cuboid
         dist = [0 if l / 2 < max_handles_depth else l / 2 - max_handles_depth for l in lengths]
@@ -1,5 +1,30 @@
+import hashlib
 from pathlib import Path
 
+from utils import get_cache_path, write_file_atomic
+
 
 def get_models_path():
     return Path(__file__).absolute().parent
+
+
+def get_generated_model_files(name, urdf, srdf):
+    """
+    Return urdf/srdf files with the given content. The files are content addressed in the models cache directory,
+    i.e. they are written only if the model with the same content was not generated before and models with different
+    parameters never overwrite each other.
+
+    :param name: name of the model used as a prefix of the file names
+    :param urdf: text of .urdf file
+    :param srdf: text of .srdf file
+    :return: tuple of urdf and srdf filenames
+    """
+    digest = hashlib.sha1((urdf + srdf).encode()).hexdigest()[:16]
+    folder = get_cache_path('models')
+    filenames = []
+    for suffix, text in [('urdf', urdf), ('srdf', srdf)]:
+        filename = folder.joinpath(f'{name}_{digest}.{suffix}')
+        if not filename.exists():
+            write_file_atomic(filename, text)
+        filenames.append(str(filename))
+    return tuple(filenames)
@@ -1,6 +1,5 @@
 from typing import List
 import numpy as np
-from pyphysx_utils.urdf_robot_parser import URDFRobot
 from hpp.corbaserver.manipulation.robot import Robot
 from models.models_utils import get_models_path
 import pathlib
@@ -20,6 +19,11 @@ class PandaRobot(Robot):
         """ Return the initial configuration of the robot. """
         return [0, -np.pi / 4, 0, -3 * np.pi / 4, 0, np.pi / 2, np.pi / 4, 0., 0.]
 
+    @staticmethod
+    def open_gripper_configuration() -> List[float]:
+        """ Return the configuration of the gripper fingers, i.e. the last joints of the robot, when open. """
+        return [0.039, 0.039]
+
     @property
     def reach_m(self):
         """
@@ -33,6 +37,7 @@ class PandaRobot(Robot):
 
     @staticmethod
     def get_pyphysx_robot():
+        from pyphysx_utils.urdf_robot_parser import URDFRobot
         return URDFRobot(
             get_models_path().joinpath('franka_panda/panda.urdf'),
             mesh_path=get_models_path(),
@@ -45,5 +50,6 @@ class PandaRobot(Robot):
 
     def modify_open_gripper(self, config):
         ndof = len(self.initial_configuration())
-        config[ndof - 2:ndof] = [0.039, 0.039]
+        fingers = self.open_gripper_configuration()
+        config[ndof - len(fingers):ndof] = fingers
         return config
\ No newline at end of file
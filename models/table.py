@@ -1,16 +1,19 @@
 import pathlib
+import numpy as np
+from models.models_utils import get_generated_model_files
+from kinematics import rpy_to_matrix
 
 class Table(object):
     main_folder = pathlib.Path(__file__).absolute().parent
     rootJointType = "fix"
-    urdfFilename = f"{str(main_folder.joinpath('table.urdf'))}"
-    srdfFilename = f"{str(main_folder.joinpath('table.srdf'))}"
+    height = 0.75
     urdfSuffix = ""
     srdfSuffix = ""
 
     def __init__(self, position=None, rpy=None, desk_size=None, leg_display=False) -> None:
         """
-        will generate .urdf and .srdf file for environmental object table
+        will generate .urdf and .srdf file for environmental object table, files are shared by tables with the same
+        parameters
         This object can be passed to hpp function loadEnvironmentObject() as argument.
 
         :param position: position of the table in [x, y, z]
@@ -29,12 +32,14 @@ class Table(object):
 
         if rpy is None:
             rpy = [0, 0, 0]
-        assert len(position) == 3
+        assert len(rpy) == 3
 
-        with open(self.urdfFilename, 'w') as f:
-            f.write(self.urdf(size=desk_size, pos=position, rot=rpy))
-        with open(self.srdfFilename, 'w') as f:
-            f.write(self.srdf(size=desk_size))
+        self.desk_size = desk_size
+        self.position = position
+        self.rpy = rpy
+        self.urdfFilename, self.srdfFilename = get_generated_model_files(
+            'table', self.urdf(size=desk_size, pos=position, rot=rpy), self.srdf(size=desk_size)
+        )
 
     @staticmethod
     def urdf(pos, rot, size, material: str = 'brown', color_rgba: str = '0.43 0.34 0.24 0.9'):
@@ -65,18 +70,18 @@ class Table(object):
                             <inertia ixx="0.001" ixy="0.0" ixz="0.0" iyy="0.001" iyz="0.0" izz="0.001" />
                         </inertial>
                         <visual>
-                            <origin xyz="{0} {0} {-0.375}" rpy="0 0 0" />
+                            <origin xyz="{0} {0} {-Table.height / 2}" rpy="0 0 0" />
                             <geometry>
-                                <box size="{size[0]} {size[1]} {0.75}"/>
+                                <box size="{size[0]} {size[1]} {Table.height}"/>
                             </geometry>
                             <material name="{material}">
                                 <color rgba="{color_rgba}"/>
                             </material>
                         </visual>
                         <collision>
-                            <origin xyz="{0} {0} {-0.375}" rpy="0 0 0" />
+                            <origin xyz="{0} {0} {-Table.height / 2}" rpy="0 0 0" />
                             <geometry>
-                                <box size="{size[0]} {size[1]} {0.75}"/>
+                                <box size="{size[0]} {size[1]} {Table.height}"/>
                             </geometry>
                         </collision>
                     </link>
@@ -116,3 +121,13 @@ class Table(object):
         This function returns the name of the contact surface of the object
         """
         return [prefix + "table_surface", ]
+
+    def desk_box(self):
+        """
+        Return the desk as a box in the world frame.
+
+        :return: tuple of center [x, y, z], 3 x 3 rotation matrix and half extents [x, y, z] of the box
+        """
+        rotation = rpy_to_matrix(np.asarray(self.rpy, dtype=np.float64))
+        center = np.asarray(self.position, dtype=np.float64) + rotation @ [0, 0, -self.height / 2]
+        return center, rotation, np.array([self.desk_size[0] / 2, self.desk_size[1] / 2, self.height / 2])
@@ -0,0 +1,141 @@
+import os
+import hashlib
+import pathlib
+from collections import OrderedDict
+import numpy as np
+
+from utils import get_cache_path
+
+
+class PlanCache:
+    def __init__(self, max_bytes=256 * 2 ** 20, cache_dir=None, persistent=True, quantization=1e-3,
+                 max_disk_bytes=2 ** 30) -> None:
+        """
+        Memoization of discretized paths keyed by scene fingerprint and quantized endpoint configurations.
+        Paths are kept in memory with least recently used eviction once max_bytes is exceeded and optionally
+        backed by a directory on disk, which survives eviction and restarts. Files on disk are evicted least recently
+        used first (by modification time, which is updated on hits) once max_disk_bytes is exceeded.
+        Returned paths are shared by the cache and therefore read-only.
+
+        :param max_bytes: maximum size of paths kept in memory
+        :param cache_dir: directory of the on-disk store, see utils.get_cache_path if None
+        :param persistent: if False, paths are kept only in memory
+        :param quantization: configurations are rounded to multiples of this value (i.e. mm for positions)
+        :param max_disk_bytes: maximum size of files in cache_dir
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = None
+        self.disk_nbytes = 0
+        if persistent:
+            self.cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else get_cache_path('plans')
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_nbytes = sum(size for _, _, size in self._disk_entries())
+        self.quantization = quantization
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.stats = dict(hits=0, disk_hits=0, misses=0, saved_time=0.)
+
+    def key(self, fingerprint, kind, q_from, q_to, **params):
+        """
+        Return the key of the query.
+
+        :param fingerprint: fingerprint of the scene
+        :param kind: kind of the query, e.g. 'solve' or 'direct_path'
+        :param q_from: initial configuration
+        :param q_to: goal configuration
+        :param params: other parameters the result depends on, e.g. fps
+        """
+        q = np.round(np.concatenate([q_from, q_to]) / self.quantization).astype(np.int64)
+        description = f'{fingerprint}/{kind}/{sorted(params.items())}'.encode() + q.tobytes()
+        return hashlib.sha1(description).hexdigest()
+
+    def get(self, key):
+        """
+        Return cached path or None if the key is not cached.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            path, solve_time = self._entries[key]
+        elif self.cache_dir is not None and self.cache_dir.joinpath(f'{key}.npz').exists():
+            filename = self.cache_dir.joinpath(f'{key}.npz')
+            try:
+                with np.load(filename) as data:
+                    path, solve_time = data['path'], float(data['solve_time'])
+                os.utime(filename)
+            except FileNotFoundError:  # evicted by another process meanwhile
+                self.stats['misses'] += 1
+                return None
+            path.setflags(write=False)
+            self.stats['disk_hits'] += 1
+            self._insert(key, path, solve_time)
+        else:
+            self.stats['misses'] += 1
+            return None
+        self.stats['saved_time'] += solve_time
+        return path
+
+    def put(self, key, path, solve_time=0.):
+        """
+        Store discretized path.
+
+        :param key: key of the query, see key()
+        :param path: array of shape (n_frames, nq)
+        :param solve_time: time spent to compute the path, accumulated in stats['saved_time'] on hits
+        """
+        path = np.array(path, dtype=np.float64, order='C')  # copy, the array of the caller stays writable
+        path.setflags(write=False)
+        if self.cache_dir is not None:
+            tmp = self.cache_dir.joinpath(f'.{key}.{os.getpid()}.npz')
+            np.savez(tmp, path=path, solve_time=solve_time)
+            filename = self.cache_dir.joinpath(f'{key}.npz')
+            self.disk_nbytes += tmp.stat().st_size
+            try:
+                self.disk_nbytes -= filename.stat().st_size  # the file of the same key is replaced
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, filename)
+            if self.disk_nbytes > self.max_disk_bytes:
+                self._evict_disk()
+        self._insert(key, path, solve_time)
+
+    def _disk_entries(self):
+        """ Return list of (modification time, filename, size) of the cached files. """
+        entries = []
+        for filename in self.cache_dir.glob('*.npz'):
+            try:
+                stat = filename.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, filename, stat.st_size))
+        return entries
+
+    def _evict_disk(self):
+        """ Remove least recently used files until the files fit into max_disk_bytes. """
+        entries = sorted(self._disk_entries())
+        self.disk_nbytes = sum(size for _, _, size in entries)
+        for _, filename, size in entries[:-1]:
+            if self.disk_nbytes <= self.max_disk_bytes:
+                break
+            try:
+                filename.unlink()
+            except FileNotFoundError:
+                pass
+            self.disk_nbytes -= size
+
+    def _insert(self, key, path, solve_time):
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[0].nbytes
+        self._entries[key] = (path, solve_time)
+        self.nbytes += path.nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            self.nbytes -= self._entries.popitem(last=False)[1][0].nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def report(self):
+        """ Return statistics of the cache including the number and size of entries in memory. """
+        return dict(self.stats, entries=len(self._entries), nbytes=self.nbytes, disk_nbytes=self.disk_nbytes)
@@ -0,0 +1,143 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from corba import CorbaServer
+from utils import sampling_stats
+
+_worker_task = None
+
+
+def _init_worker(host, ports, task_factory, task_kwargs):
+    """ Connect the worker process to one server of the pool and build the task in it. """
+    global _worker_task
+    if task_factory is None:
+        from basic_task import BasicTask as task_factory
+    CorbaServer(start=False, host=host, port=ports.get()).use()
+    _worker_task = task_factory(**dict(dict(render=False), **task_kwargs))
+
+
+def _call_worker(fn, args, kwargs):
+    return fn(_worker_task, *args, **kwargs)
+
+
+def solve_query(task, q_init, q_goal, fps=10):
+    """
+    Solve a single query in the given task and discretize the solution.
+
+    :param task: BasicTask in which the query is solved
+    :param q_init: initial configuration
+    :param q_goal: goal configuration
+    :param fps: number of frames per unit of path length
+    :return: array of configurations of shape (n_frames, nq)
+    """
+    return task.discretize_path(task.solve(q_init, q_goal), fps=fps)
+
+
+def sample_transition(task, transition, q_from, n_samples, max_attempts):
+    """ Call BasicTask.sample_transition in the worker, see CorbaServerPool.sample_transition. """
+    return task.sample_transition(transition, q_from, n_samples, max_attempts)
+
+
+def project_configurations(task, configs, node, check_collisions):
+    """ Call BasicTask.project_configurations in the worker, see CorbaServerPool.project_configurations. """
+    return task.project_configurations(configs, node, check_collisions)
+
+
+class CorbaServerPool:
+    def __init__(self, n_servers=None, task_kwargs=None, host='127.0.0.1', base_port=13340,
+                 task_factory=None) -> None:
+        """
+        Pool of isolated hppcorbaserver processes, each listening on its own port and served by its own worker process
+        that holds a BasicTask connected to that server. Work is distributed by submit/map; the function is called
+        in the worker with the task as the first argument, so it has to be picklable (i.e. defined at module level).
+
+        :param n_servers: number of servers, number of cpus if None
+        :param task_kwargs: keyword arguments passed to BasicTask in each worker, headless (render=False) by default
+        :param host: host the servers listen on
+        :param base_port: port of the first server, the others use consecutive ports
+        :param task_factory: picklable callable building the task of each worker from task_kwargs, e.g. a subclass
+            of BasicTask; BasicTask if None
+        """
+        super().__init__()
+        self.n_servers = os.cpu_count() if n_servers is None else n_servers
+        environ = dict(os.environ)
+        try:
+            self.servers = [CorbaServer(host=host, port=base_port + i) for i in range(self.n_servers)]
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+        ctx = multiprocessing.get_context('spawn')
+        ports = ctx.Queue()
+        for server in self.servers:
+            ports.put(server.port)
+        self.executor = ProcessPoolExecutor(max_workers=self.n_servers, mp_context=ctx, initializer=_init_worker,
+                                            initargs=(host, ports, task_factory, task_kwargs or {}))
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule fn(task, *args, **kwargs) on one of the workers.
+
+        :return: concurrent.futures.Future of the result
+        """
+        return self.executor.submit(_call_worker, fn, args, kwargs)
+
+    def map(self, fn, *iterables, timeout=None):
+        """
+        Equivalent of map(fn, *iterables) with the task passed as the first argument of each call.
+
+        :return: iterator over results in the order of the inputs
+        """
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        return (f.result(timeout=timeout) for f in futures)
+
+    def solve(self, q_inits, q_goals, fps=10):
+        """
+        Solve queries given by pairs of initial and goal configurations on all servers of the pool.
+
+        :return: list of discretized paths, each an array of shape (n_frames, nq)
+        """
+        return list(self.map(solve_query, q_inits, q_goals, [fps] * len(q_inits)))
+
+    def sample_transition(self, transition, q_from, n_samples=1, max_attempts=100):
+        """
+        Sample valid configurations of the transition on all servers of the pool, see BasicTask.sample_transition.
+        Samples and attempts are split evenly among the servers.
+
+        :return: tuple of array of shape (k, nq), k <= n_samples, and dictionary with merged statistics
+        """
+        n_samples_per_server = int(np.ceil(n_samples / self.n_servers))
+        max_attempts_per_server = int(np.ceil(max_attempts / self.n_servers))
+        futures = [self.submit(sample_transition, transition, q_from, n_samples_per_server, max_attempts_per_server)
+                   for _ in range(self.n_servers)]
+        results = [f.result() for f in futures]
+        samples = np.concatenate([r[0] for r in results])[:n_samples]
+        counts = [sum(r[1][k] for r in results) for k in ['attempts', 'projection_failures', 'collision_failures']]
+        return samples, sampling_stats(*counts)
+
+    def project_configurations(self, configs, node='free', check_collisions=True, chunk_size=1000):
+        """
+        Project configurations onto the state on all servers of the pool, see BasicTask.project_configurations.
+        Configurations are sent to the workers in chunks.
+
+        :return: dictionary of arrays as returned by BasicTask.project_configurations
+        """
+        configs = np.asarray(configs, dtype=np.float64)
+        futures = [self.submit(project_configurations, configs[i:i + chunk_size], node, check_collisions)
+                   for i in range(0, len(configs), chunk_size)]
+        results = [f.result() for f in futures]
+        return {k: np.concatenate([r[k] for r in results]) for k in ['configs', 'success', 'errors', 'valid']}
+
+    def shutdown(self):
+        """ Stop the workers and kill the servers of this pool. """
+        self.executor.shutdown(wait=True)
+        for server in self.servers:
+            server.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,286 @@
+import os
+import time
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.connection
+
+from corba import CorbaServer
+
+_server_lock = threading.Lock()
+
+DEFAULT_SETTINGS = [
+    dict(planner='M-RRT', optimizers=['RandomShortcut'], seed=0),
+    dict(planner='M-RRT', optimizers=['RandomShortcut'], seed=1),
+    dict(planner='M-RRT', optimizers=['Graph-RandomShortcut'], seed=2),
+    dict(planner='M-RRT', optimizers=[], seed=3),
+]
+
+
+def _interrupt_on_cancel(task, cancels, state):
+    """
+    Interrupt planning of the current query of the worker when its cancellation arrives; the newest cancelled query is
+    recorded, so a query cancelled before the worker starts it is skipped.
+    """
+    while True:
+        query_id = cancels.get()
+        if query_id is None:
+            return
+        state['cancelled'] = max(state['cancelled'], query_id)
+        if query_id == state['query_id']:
+            task.ps.hppcorba.problem.interruptPathPlanning()
+
+
+def _worker_main(index, host, port, task_factory, task_kwargs, settings, queries, cancels, results):
+    """
+    Entry point of the worker process: build the task configured by the settings and solve queries. Messages are
+    sent through results, the write end of the pipe owned by this member only.
+    """
+    if task_factory is None:
+        from basic_task import BasicTask as task_factory
+    CorbaServer(start=False, host=host, port=port).use()
+    task = task_factory(**dict(dict(render=False), **task_kwargs))
+    task.configure_planner(settings.get('planner'), settings.get('optimizers'))
+    state = dict(query_id=None, cancelled=-1)
+    threading.Thread(target=_interrupt_on_cancel, args=(task, cancels, state), daemon=True).start()
+    results.send((index, None, 'ready', None))
+    for query_id, q_init, q_goal, fps in iter(queries.get, None):
+        state['query_id'] = query_id
+        if query_id <= state['cancelled']:
+            results.send((index, query_id, 'failure', 'Cancelled before start.'))
+            continue
+        task.configure_planner(seed=settings.get('seed'))
+        t0 = time.perf_counter()
+        try:
+            path_id = task.solve(q_init, q_goal)
+            solve_time = time.perf_counter() - t0
+            solution = dict(length=task.ps.pathLength(path_id), solve_time=solve_time,
+                            frames=task.discretize_path(path_id, fps=fps))
+        except Exception as e:
+            results.send((index, query_id, 'failure', f'{type(e).__name__}: {e}'))
+            continue
+        results.send((index, query_id, 'solution', solution))
+
+
+class _PortfolioMember:
+    def __init__(self, index, settings, host, port, task_factory, task_kwargs) -> None:
+        """
+        Server and worker process solving queries with one setting of the portfolio. Each start creates new queues
+        and a new results pipe, so killing the worker (e.g. in the middle of sending a message) cannot corrupt the
+        communication with the other members or with the restarted worker.
+        """
+        super().__init__()
+        self.index, self.settings, self.host, self.port = index, settings, host, port
+        self.task_factory, self.task_kwargs = task_factory, task_kwargs
+        self.server, self.process, self.queries, self.cancels, self.results = None, None, None, None, None
+
+    def start(self):
+        with _server_lock:
+            environ = dict(os.environ)
+            try:
+                self.server = CorbaServer(host=self.host, port=self.port)
+            finally:
+                os.environ.clear()
+                os.environ.update(environ)
+        ctx = multiprocessing.get_context('spawn')
+        self.queries, self.cancels = ctx.Queue(), ctx.Queue()
+        self.results, results_writer = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=_worker_main, daemon=True,
+                                   args=(self.index, self.host, self.port, self.task_factory, self.task_kwargs,
+                                         self.settings, self.queries, self.cancels, results_writer))
+        self.process.start()
+        results_writer.close()  # the worker holds the only write end, so its termination is seen as end of file
+
+    def stop(self, timeout=0.):
+        """
+        Kill the worker process and its server. The worker is given timeout seconds to exit first, e.g. after it was
+        asked to by request_exit.
+        """
+        if self.process is not None and self.process.is_alive():
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join()
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+        if self.server is not None:
+            self.server.kill()
+
+    def request_exit(self):
+        """ Ask the worker to exit once it finishes its current query. """
+        if self.process is not None and self.process.is_alive():
+            self.queries.put(None)
+            self.cancels.put(None)
+
+
+class PortfolioPlanner:
+    def __init__(self, settings=None, task_kwargs=None, host='127.0.0.1', base_port=13380, grace=2.,
+                 task_factory=None) -> None:
+        """
+        Solve each query by several planner/optimizer/seed settings in parallel, each on its own hppcorbaserver, and
+        keep the first solution or the best one found until a deadline. Planning of members that are still running
+        when the result is decided is interrupted; only members that do not stop within the grace period are killed
+        and restarted (with their server) in background.
+
+        :param settings: list of dictionaries with optional keys 'planner', 'optimizers' and 'seed', see
+            BasicTask.configure_planner; DEFAULT_SETTINGS if None
+        :param task_kwargs: keyword arguments passed to BasicTask of each member, headless (render=False) by default
+        :param host: host the servers listen on
+        :param base_port: port of the first server, the others use consecutive ports
+        :param grace: time in seconds an interrupted member has to finish its query before it is restarted
+        :param task_factory: picklable callable building the task of each member from task_kwargs, e.g. a subclass
+            of BasicTask; BasicTask if None
+        """
+        super().__init__()
+        self.settings = DEFAULT_SETTINGS if settings is None else settings
+        self.grace = grace
+        self.members = [_PortfolioMember(i, s, host, base_port + i, task_factory, task_kwargs or {})
+                        for i, s in enumerate(self.settings)]
+        self.wins = [0] * len(self.members)
+        self._query_ids = itertools.count()
+        self._restarts = []
+        self._restarting = set()
+        self._pending = set(range(len(self.members)))
+        self._interrupted = {}  # index of member: (query id, time by which the member has to stop)
+        self.restarts = 0
+        for member in self.members:
+            member.start()
+
+    def _receive(self, timeout):
+        """
+        Return the next message of any member that is not being restarted, or None if there is no message within
+        timeout. Termination of the worker of a member is reported as (index, None, 'terminated', None).
+        """
+        readers = {m.results: m for m in self.members if m.index not in self._restarting and m.results is not None}
+        for reader in multiprocessing.connection.wait(list(readers), timeout):
+            member = readers[reader]
+            try:
+                return reader.recv()
+            except (EOFError, OSError):
+                member.results.close()
+                member.results = None
+                return member.index, None, 'terminated', None
+        return None
+
+    def _wait_ready(self):
+        """ Wait for the interrupted members to stop and for the members that are being (re)started. """
+        while self._interrupted:
+            now = time.perf_counter()
+            for index in [i for i, (_, end) in self._interrupted.items() if end <= now]:
+                del self._interrupted[index]
+                self._restart(self.members[index])
+            if not self._interrupted:
+                break
+            message = self._receive(max(min(end for _, end in self._interrupted.values()) - now, 0.))
+            if message is not None:
+                self._on_stale_result(*message)
+
+        for thread in self._restarts:
+            thread.join()
+        self._restarts = []
+        while self._pending:
+            message = self._receive(1.)
+            if message is None:
+                failed = [i for i in self._pending if self.members[i].results is None]
+                assert len(failed) == 0, f'Portfolio members {failed} could not be restarted.'
+                continue
+            index, _, kind, _ = message
+            assert kind != 'terminated', f'Portfolio member {index} terminated during startup.'
+            self._on_stale_result(*message)
+
+    def _on_stale_result(self, index, query_id, kind, payload):
+        """ Process message that does not belong to the current query, e.g. of an interrupted member. """
+        if kind == 'ready':
+            self._pending.discard(index)
+        elif kind == 'terminated':
+            self._interrupted.pop(index, None)
+            self._restart(self.members[index])
+        elif index in self._interrupted and self._interrupted[index][0] == query_id:
+            del self._interrupted[index]
+
+    def solve(self, q_init, q_goal, fps=10, deadline=None, wait_for_best=False):
+        """
+        Solve the query by all members of the portfolio.
+
+        :param q_init: initial configuration
+        :param q_goal: goal configuration
+        :param fps: number of frames per unit of path length of the returned path
+        :param deadline: maximum time in seconds to wait for solutions, unlimited if None
+        :param wait_for_best: if True, wait for all members (or the deadline) and return the shortest solution;
+            otherwise return the first solution
+        :return: dictionary with the 'frames' of the solution (array of shape (n_frames, nq)), its 'length',
+            'solve_time', 'settings' of the member that found it and 'failures' (messages of failed members); or
+            None if no solution was found before the deadline
+        """
+        self._wait_ready()
+        query_id = next(self._query_ids)
+        for member in self.members:
+            member.queries.put((query_id, list(q_init), list(q_goal), fps))
+        end = None if deadline is None else time.perf_counter() + deadline
+
+        best, failures, running = None, [], set(range(len(self.members)))
+        while running:
+            if end is not None and time.perf_counter() >= end:
+                break
+            message = self._receive(1. if end is None else min(max(end - time.perf_counter(), 0.), 1.))
+            if message is None:
+                continue
+            index, result_id, kind, payload = message
+            if kind == 'terminated' and index in running:
+                running.discard(index)
+                failures.append(f'Member {index} terminated.')
+                self._restart(self.members[index])
+                continue
+            if result_id != query_id:
+                self._on_stale_result(index, result_id, kind, payload)
+                continue
+            running.discard(index)
+            if kind == 'failure':
+                failures.append(payload)
+                continue
+            if best is None or payload['length'] < best['length']:
+                best = dict(payload, settings=self.members[index].settings, index=index)
+            if not wait_for_best:
+                break
+
+        for index in running:
+            self.members[index].cancels.put(query_id)
+            self._interrupted[index] = (query_id, time.perf_counter() + self.grace)
+        if best is None:
+            return None
+        self.wins[best.pop('index')] += 1
+        return dict(best, failures=failures)
+
+    def _restart(self, member):
+        """ Kill the member and start it again in background; its messages are not received until it is ready. """
+        self.restarts += 1
+
+        def restart():
+            try:
+                member.stop()
+                member.start()
+            finally:
+                self._restarting.discard(member.index)
+
+        self._restarting.add(member.index)
+        self._pending.add(member.index)
+        thread = threading.Thread(target=restart, daemon=True)
+        thread.start()
+        self._restarts.append(thread)
+
+    def shutdown(self):
+        """ Stop all members of the portfolio; members still planning are killed after the grace period. """
+        for thread in self._restarts:
+            thread.join()
+        for member in self.members:
+            member.request_exit()
+        end = time.perf_counter() + self.grace
+        for member in self.members:
+            member.stop(timeout=max(end - time.perf_counter(), 0.))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import pathlib
+import numpy as np
+
+from kinematics import URDFKinematics, quaternion_to_matrix
+from utils import get_cache_path
+from graph_cache import file_digest
+
+
+def fibonacci_sphere(n):
+    """
+    Return n approximately uniformly distributed unit vectors.
+
+    :return: n x 3 numpy array
+    """
+    i = np.arange(n) + 0.5
+    z = 1 - 2 * i / n
+    phi = np.pi * (1 + 5 ** 0.5) * i
+    r = np.sqrt(1 - z ** 2)
+    return np.stack([r * np.cos(phi), r * np.sin(phi), z], axis=-1)
+
+
+def _skew_to_vector(m):
+    return np.stack([m[..., 2, 1] - m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0], m[..., 1, 0] - m[..., 0, 1]], -1) / 2
+
+
+class ReachabilityMap:
+    def __init__(self, scores, lower, voxel_size, directions) -> None:
+        """
+        Voxelized map of end effector positions and approach directions reachable by the robot, expressed in the frame
+        of the robot base. Each cell stores the best manipulability of the configurations reaching it, zero if the cell
+        was not reached. Use build() or load_or_build() to create the map.
+
+        :param scores: array of shape (nx, ny, nz, n_directions)
+        :param lower: position of the corner of the first voxel
+        :param voxel_size: edge length of voxels
+        :param directions: n_directions x 3 unit vectors, centers of the approach direction bins
+        """
+        super().__init__()
+        self.scores = scores
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.voxel_size = voxel_size
+        self.directions = np.asarray(directions, dtype=np.float64)
+
+    @classmethod
+    def build(cls, urdf_filename, ee_link='panda_hand', ee_offset=(0., 0., 0.12), approach_axis=2, reach_m=0.8,
+              voxel_size=0.05, n_directions=64, n_samples=200000, chunk_size=10000, dilate=1, seed=0, eps=1e-4):
+        """
+        Build the map by sampling random joint configurations within limits and evaluating the forward kinematics;
+        manipulability sqrt(det(J J^T)) of the 6D end effector Jacobian is used as the score.
+
+        :param urdf_filename: urdf of the robot
+        :param ee_link: link of the end effector
+        :param ee_offset: position of the grasp point in the end effector link, e.g. the gripper of PandaRobot
+        :param approach_axis: axis of the end effector link pointing towards the grasped object
+        :param reach_m: half size of the mapped cube centered at the base
+        :param voxel_size: edge length of voxels
+        :param n_directions: number of approach direction bins
+        :param n_samples: number of sampled configurations
+        :param chunk_size: number of configurations evaluated at once, bounds temporary memory
+        :param dilate: cells within this number of voxels from reached cells receive their score, which compensates
+            for unsampled cells; the map then errs on the side of accepting goals
+        :param seed: seed of the sampling
+        :param eps: step of numerical differentiation
+        """
+        kinematics = URDFKinematics(urdf_filename)
+        lower_limits, upper_limits = kinematics.joint_limits()
+        directions = fibonacci_sphere(n_directions)
+        lower = -np.full(3, reach_m)
+        shape = tuple(np.ceil(2 * reach_m / voxel_size).astype(int).repeat(3))
+        scores = np.zeros(shape + (n_directions,), dtype=np.float32)
+        offset = np.append(ee_offset, 1.)
+        rng = np.random.default_rng(seed)
+
+        def ee_poses(q):
+            poses = kinematics.link_poses_batch(q)[ee_link]
+            return (poses @ offset)[:, :3], poses[:, :3, :3]
+
+        movable = [i for i, j in enumerate(kinematics.movable_joints)
+                   if next(k for k in kinematics.joints if k['name'] == j)['type'] != 'prismatic']
+        for start in range(0, n_samples, chunk_size):
+            q = rng.uniform(lower_limits, upper_limits, size=(min(chunk_size, n_samples - start), len(lower_limits)))
+            position, rotation = ee_poses(q)
+            jacobian = np.empty((len(q), 6, len(movable)))
+            for k, i in enumerate(movable):
+                dq = q.copy()
+                dq[:, i] += eps
+                dp, dr = ee_poses(dq)
+                jacobian[:, :3, k] = (dp - position) / eps
+                jacobian[:, 3:, k] = _skew_to_vector(dr @ np.swapaxes(rotation, -1, -2)) / eps
+            manipulability = np.sqrt(np.maximum(np.linalg.det(jacobian @ np.swapaxes(jacobian, -1, -2)), 0.))
+
+            voxels = np.floor((position - lower) / voxel_size).astype(int)
+            inside = np.all((voxels >= 0) & (voxels < shape), axis=1)
+            bins = np.argmax(rotation[:, :, approach_axis] @ directions.T, axis=1)
+            np.maximum.at(scores, tuple(voxels[inside].T) + (bins[inside],), manipulability[inside])
+
+        for _ in range(dilate):
+            dilated = scores.copy()
+            for axis in range(3):
+                for shift in (-1, 1):
+                    rolled = np.roll(scores, shift, axis=axis)
+                    edge = [slice(None)] * 4
+                    edge[axis] = 0 if shift == 1 else -1
+                    rolled[tuple(edge)] = 0
+                    np.maximum(dilated, rolled, out=dilated)
+            scores = dilated
+        return cls(scores, lower, voxel_size, directions)
+
+    @classmethod
+    def load_or_build(cls, urdf_filename, cache_dir=None, **params):
+        """
+        Load the map from the cache, the map is built and stored first if it is not cached yet.
+
+        :param urdf_filename: urdf of the robot
+        :param cache_dir: directory with cached maps, see utils.get_cache_path if None
+        :param params: parameters of build()
+        """
+        cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else get_cache_path('reachability')
+        description = json.dumps(dict(urdf=file_digest(urdf_filename), **params), sort_keys=True, default=list)
+        filename = cache_dir.joinpath(hashlib.sha1(description.encode()).hexdigest() + '.npz')
+        if filename.exists():
+            return cls.load(filename)
+        reachability_map = cls.build(urdf_filename, **params)
+        reachability_map.save(filename)
+        return reachability_map
+
+    def save(self, filename):
+        filename = pathlib.Path(filename)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp = filename.with_name(f'.{filename.stem}.{os.getpid()}.npz')
+        np.savez_compressed(tmp, scores=self.scores, lower=self.lower, voxel_size=self.voxel_size,
+                            directions=self.directions)
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            return cls(data['scores'], data['lower'], float(data['voxel_size']), data['directions'])
+
+    def query(self, positions, directions):
+        """
+        Return scores of end effector positions and approach directions; positions outside of the map score zero.
+
+        :param positions: N x 3 grasp positions in the robot base frame
+        :param directions: N x 3 unit approach directions (from the gripper towards the object) in the base frame
+        :return: array of N scores, zero for unreachable cells
+        """
+        voxels = np.floor((np.atleast_2d(positions) - self.lower) / self.voxel_size).astype(int)
+        inside = np.all((voxels >= 0) & (voxels < self.scores.shape[:3]), axis=1)
+        bins = np.argmax(np.atleast_2d(directions) @ self.directions.T, axis=1)
+        result = np.zeros(len(voxels), dtype=self.scores.dtype)
+        result[inside] = self.scores[tuple(voxels[inside].T) + (bins[inside],)]
+        return result
+
+    def grasp_scores(self, object_poses, handle_objects, handle_positions, handle_directions, world_to_base=None):
+        """
+        Return the best score among the handles of each object, for many sets of object poses at once; all handles
+        are looked up by a single query.
+
+        :param object_poses: array (..., n_objects, 7) of object poses [x, y, z, qx, qy, qz, qw] in the world frame
+        :param handle_objects: sorted array of M indices of the objects the handles belong to
+        :param handle_positions: M x 3 positions of the handles in the frames of their objects
+        :param handle_directions: M x 3 approach directions (from the gripper towards the object) in the object frames
+        :param world_to_base: 4 x 4 transformation from the world to the robot base frame (the inverse of the base
+            pose), identity if None
+        :return: array (..., n_objects) of scores, zero for objects without handles
+        """
+        poses = np.asarray(object_poses, dtype=np.float64)
+        transform = np.eye(4) if world_to_base is None else np.asarray(world_to_base)
+        rotations = transform[:3, :3] @ quaternion_to_matrix(poses[..., 3:])
+        translations = poses[..., :3] @ transform[:3, :3].T + transform[:3, 3]
+        handle_rotations = rotations[..., handle_objects, :, :]
+        positions = (handle_rotations @ handle_positions[..., None])[..., 0] + translations[..., handle_objects, :]
+        directions = (handle_rotations @ handle_directions[..., None])[..., 0]
+        scores = self.query(positions.reshape(-1, 3), directions.reshape(-1, 3)).reshape(positions.shape[:-1])
+
+        result = np.zeros(poses.shape[:-1], dtype=scores.dtype)
+        starts = np.flatnonzero(np.diff(handle_objects, prepend=-1))
+        result[..., handle_objects[starts]] = np.maximum.reduceat(scores, starts, axis=-1)
+        return result
@@ -1,17 +1,16 @@
-import time
 import numpy as np
 
-import trimesh
-from pyphysx import *
-from pyphysx_render.meshcat_render import MeshcatViewer
-from pyphysx_render.utils import gl_color_from_matplotlib
-import pyphysx_utils.urdf_robot_parser
 from utils import get_trans_quat_pyphysx
-import meshcat.geometry as g
+from models.models_utils import get_models_path
+from meshcat_viewer import MeshcatTaskViewer, OfflineMeshcatWindow
+from configuration import ConfigurationLayout
+
+# RGBA of boxes without explicit color, matplotlib 'tab:blue' with alpha 0.75
+DEFAULT_BOX_COLOR = np.array([0.122, 0.467, 0.706, 0.75])
 
 
 class PyPhysXTaskRender:
-    def __init__(self, robot, robot_base_pose=None):
+    def __init__(self, robot, robot_base_pose=None, mesh_cache=None):
         """
         This is a render tool for task rendering in pyphysx. The following arguments have to be passed from based task.
 
@@ -21,85 +20,131 @@ class PyPhysXTaskRender:
         :param ps: problem solver of the task which we want to render
         :param robot: robot of the task which we want to render
         :param robot_base_pose: base of the robot which we want to render
+        :param mesh_cache: optional MeshCache from which meshcat viewers load robot meshes
         """
 
         self.robot = robot
         if robot_base_pose is None:
             robot_base_pose = np.eye(4)
+        self.robot_base_pose = robot_base_pose
+        self.mesh_cache = mesh_cache
 
         self.movable_objects_pyphysx = []
-        self.pyphysx_scene = Scene()
-        self.pyphysx_robot = self.robot.get_pyphysx_robot()
-        self.pyphysx_robot.attach_root_node_to_pose(get_trans_quat_pyphysx(robot_base_pose))
-        self.pyphysx_scene.add_aggregate(self.pyphysx_robot.get_aggregate())
-
-    def visualise_configurations(self, configurations, show_frames=False, fps=1, sleep_after_publish=True):
+        self.movable_objects_boxes = []
+        self.obstacles_urdf = []
+        self._viewer = None
+        self._pyphysx_scene = None
+        self._pyphysx_robot = None
+
+    def _build_pyphysx_scene(self):
+        """ Import pyphysx and build the scene with the robot and previously added obstacles and boxes. """
+        if self._pyphysx_scene is not None:
+            return
+        from pyphysx import Scene
+        self._pyphysx_scene = Scene()
+        self._pyphysx_robot = self.robot.get_pyphysx_robot()
+        self._pyphysx_robot.attach_root_node_to_pose(get_trans_quat_pyphysx(self.robot_base_pose))
+        self._pyphysx_scene.add_aggregate(self._pyphysx_robot.get_aggregate())
+        for urdf_name in self.obstacles_urdf:
+            self._add_obstacle_aggregate(urdf_name)
+        for size, color in self.movable_objects_boxes:
+            self.movable_objects_pyphysx.append(self._add_box_actor(size, color))
+
+    @property
+    def layout(self):
+        """ Layout of the rendered configurations: robot joints followed by poses of the movable boxes. """
+        return ConfigurationLayout.contiguous(self.robot.initial_configuration(), len(self.movable_objects_boxes))
+
+    @property
+    def pyphysx_scene(self):
         """
-        visualizes given configurations
-
-        :param configurations: configurations to be visualized
-        :param show_frames: argument passed for MeshcatViewer
-        :param fps: number of frames per second
-        :param sleep_after_publish: sleep for 5seconds after publishing the animation, to overcame premature termination
+        PyPhysX scene with the robot, obstacles and boxes; it is built on the first access, so that meshcat based
+        visualisation does not pay for importing pyphysx and parsing the robot meshes.
         """
-        assert self.pyphysx_scene is not None
-        assert self.pyphysx_robot is not None
+        self._build_pyphysx_scene()
+        return self._pyphysx_scene
 
-        render = MeshcatViewer(open_meshcat=True, render_to_animation=True, show_frames=show_frames, animation_fps=fps)
-        render.add_physx_scene(self.pyphysx_scene)
-        for config in configurations:
-            ndof_robot = len(self.robot.initial_configuration())
-            self.pyphysx_robot.reset_pose(dict(zip(self.pyphysx_robot.movable_joints.keys(), config[:ndof_robot])))
+    @property
+    def pyphysx_robot(self):
+        """ PyPhysX robot of the scene, see pyphysx_scene. """
+        self._build_pyphysx_scene()
+        return self._pyphysx_robot
 
-            objs_configs = config[ndof_robot:]
-            assert len(objs_configs) % 7 == 0
-            num_objects = len(objs_configs) // 7
-            assert num_objects == len(self.movable_objects_pyphysx)
-            for i in range(num_objects):
-                c = objs_configs[i * 7:(i + 1) * 7]
-                self.movable_objects_pyphysx[i].set_global_pose((c[:3], c[6:] + c[3:6]))
+    def visualise_configurations(self, configurations, fps=1, tolerance=None):
+        """
+        visualizes given configurations in the persistent viewer, see animate_configurations
 
-            self.pyphysx_robot.update(1 / fps)
-            render.update()
-        render.publish_animation()
-        if sleep_after_publish:
-            time.sleep(5.)
+        :param configurations: configurations to be visualized, list of configurations or array of shape (n_frames, nq)
+        :param fps: number of frames per second
+        :param tolerance: if given, only keyframes are sent, see MeshcatTaskViewer.animation
+        """
+        self.animate_configurations(configurations, fps, tolerance)
 
+    def visualise_path_meshcat(self, configs, fps=10, tolerance=None):
+        """
+        visualizes given path in the persistent viewer, see animate_configurations
 
-    def visualise_path_meshcat(self, configs,  fps=10, sleep_after_publish=True):
+        :param configs: configurations of the discretized path, e.g. from BasicTask.discretize_path
+        :param fps: number of frames per second
+        :param tolerance: if given, only keyframes are sent, see MeshcatTaskViewer.animation
         """
-        visualizes given task (path) via path_id
+        self.animate_configurations(configs, fps, tolerance)
 
-        :param path_id: id of the path from hpp to be visualized; if None use the latest path from problem solver
-        :param fps: number of frames per seccond
-        :param static_objects: list of dictionaries
-            [{"size": [x, y, z], "color": [r, g, b, a], pose:[x, y, z, i, j, k, w]},...]
-        :param sleep_after_publish: sleep for 5seconds after publishing the animation, to overcame premature termination
+    @property
+    def viewer(self):
         """
-        assert self.pyphysx_scene is not None
-        assert self.pyphysx_robot is not None
+        Long-lived meshcat viewer of the task; it is created and opened on the first access and the scene geometry is
+        uploaded to it only once, subsequent animations stream only poses.
+        """
+        if self._viewer is None:
+            self._viewer = self._create_meshcat_viewer()
+            self._viewer.vis.open()
+        return self._viewer
 
-        render = MeshcatViewer(open_meshcat=True, render_to_animation=True, animation_fps=fps)
-        render.add_physx_scene(self.pyphysx_scene)
+    def animate_configurations(self, configurations, fps=10, tolerance=None):
+        """
+        visualizes given configurations as an animation in the persistent viewer, does not block
 
-        for config in configs:
-            ndof_robot = len(self.robot.initial_configuration())
-            self.pyphysx_robot.reset_pose(dict(zip(self.pyphysx_robot.movable_joints.keys(), config[:ndof_robot])))
+        :param configurations: configurations to be visualized, list of configurations or array of shape (n_frames, nq)
+        :param fps: number of frames per second
+        :param tolerance: if given, only keyframes are sent, see MeshcatTaskViewer.animation
+        """
+        self.viewer.publish(configurations, fps, tolerance)
 
-            objs_configs = config[ndof_robot:]
-            assert len(objs_configs) % 7 == 0
-            num_objects = len(objs_configs) // 7
-            assert num_objects == len(self.movable_objects_pyphysx)
-            for i in range(num_objects):
-                c = objs_configs[i * 7:(i + 1) * 7]
-                self.movable_objects_pyphysx[i].set_global_pose((c[:3], c[6:] + c[3:6]))
+    def show_configuration(self, config):
+        """
+        shows a single configuration in the persistent viewer
 
-            self.pyphysx_robot.update(1 / fps)
-            render.update()
-        render.publish_animation()
-        if sleep_after_publish:
-            time.sleep(10.)
+        :param config: configuration to be visualized
+        """
+        self.viewer.show(config)
+
+    def _create_meshcat_viewer(self, window=None):
+        viewer = MeshcatTaskViewer(self.robot.urdfFilename, get_models_path(), self.robot_base_pose, window=window,
+                                   mesh_cache=self.mesh_cache)
+        for urdf_name in self.obstacles_urdf:
+            viewer.add_obstacle(urdf_name)
+        for size, color in self.movable_objects_boxes:
+            viewer.add_box(size, color)
+        return viewer
+
+    def export_animation(self, configurations, fps=10, filename=None, tolerance=None):
+        """
+        renders given configurations headless, i.e. without meshcat server and browser, into self-contained HTML
 
+        :param configurations: configurations to be visualized, list of configurations or array of shape (n_frames, nq)
+        :param fps: number of frames per second
+        :param filename: if given, the HTML is written into this file
+        :param tolerance: if given, only keyframes are exported, see MeshcatTaskViewer.animation
+        :return: HTML with the animation
+        """
+        viewer = self._create_meshcat_viewer(window=OfflineMeshcatWindow())
+        viewer.publish(configurations, fps, tolerance)
+        html = viewer.static_html()
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(html)
+        return html
 
     def _create_pyphysx_actor_box(self, size_of_object, color=None, add_to_movable_obj=True):
         """
@@ -108,30 +153,52 @@ class PyPhysXTaskRender:
         :param size_of_object: sizef of box in [width_x, width_y, width_z]
         :param color: color of the object
         :param add_to_movable_obj: If true, will set the object to be a movable object
-        :return: actor for pyphysx rendering with attached box
+        :return: actor for pyphysx rendering with attached box; None for movable objects added before the pyphysx
+            scene is built, their actors are created together with the scene
         """
         if color is None:
-            color = gl_color_from_matplotlib(None, alpha=0.75, return_rgba=True).astype(np.float) / 255
+            color = DEFAULT_BOX_COLOR.copy()
+        if not add_to_movable_obj:
+            self._build_pyphysx_scene()
+            return self._add_box_actor(size_of_object, color)
+        self.movable_objects_boxes.append((size_of_object, color))
+        if self._viewer is not None:
+            self._viewer.add_box(size_of_object, color)
+        if self._pyphysx_scene is None:
+            return None
+        actor = self._add_box_actor(size_of_object, color)
+        self.movable_objects_pyphysx.append(actor)
+        return actor
+
+    def _add_box_actor(self, size_of_object, color):
+        from pyphysx import RigidDynamic, Shape, Material
         actor = RigidDynamic()
         shape = Shape.create_box(size_of_object, Material())
         shape.set_user_data({'color': color})
         actor.attach_shape(shape)
         actor.set_mass(1.)
-        self.pyphysx_scene.add_actor(actor)
-        if add_to_movable_obj:
-            self.movable_objects_pyphysx.append(actor)
+        self._pyphysx_scene.add_actor(actor)
         return actor
 
     def add_pyphysx_obstacle(self, urdf_name):
         """
         renders specific obstacle to the scene
 
-        :return: pyphysx object of the obstacle for rendering
+        :return: pyphysx object of the obstacle for rendering; None if the pyphysx scene has not been built yet, the
+            obstacle is then added together with the scene
         """
 
-        obstacle = pyphysx_utils.urdf_robot_parser.URDFRobot(urdf_name, kinematic=True)
+        self.obstacles_urdf.append(urdf_name)
+        if self._viewer is not None:
+            self._viewer.add_obstacle(urdf_name)
+        if self._pyphysx_scene is None:
+            return None
+        return self._add_obstacle_aggregate(urdf_name)
+
+    def _add_obstacle_aggregate(self, urdf_name):
+        from pyphysx_utils.urdf_robot_parser import URDFRobot
+        obstacle = URDFRobot(urdf_name, kinematic=True)
         obstacle.attach_root_node_to_pose((0, 0, 0))
         obstacle.reset_pose()
-        self.pyphysx_scene.add_aggregate(obstacle.get_aggregate())
-
+        self._pyphysx_scene.add_aggregate(obstacle.get_aggregate())
         return obstacle
@@ -0,0 +1,46 @@
+import os
+import pathlib
+
+from utils import get_cache_path
+
+
+class RoadmapStore:
+    def __init__(self, cache_dir=None) -> None:
+        """
+        On-disk store of roadmaps keyed by scene fingerprint, so that a roadmap built for a static scene can be reused
+        by later queries and by other server processes.
+
+        :param cache_dir: directory with stored roadmaps, see utils.get_cache_path if None
+        """
+        super().__init__()
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else get_cache_path('roadmaps')
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def filename(self, fingerprint):
+        return self.cache_dir.joinpath(f'{fingerprint}.roadmap')
+
+    def load(self, ps, fingerprint):
+        """
+        Read the stored roadmap into the problem solver.
+
+        :param ps: ProblemSolver of the scene
+        :param fingerprint: fingerprint of the scene
+        :return: True if the roadmap was found and loaded
+        """
+        filename = self.filename(fingerprint)
+        if not filename.exists():
+            return False
+        ps.readRoadmap(str(filename))
+        return True
+
+    def save(self, ps, fingerprint):
+        """
+        Store the current roadmap of the problem solver, the previously stored roadmap is replaced atomically.
+
+        :param ps: ProblemSolver of the scene
+        :param fingerprint: fingerprint of the scene
+        """
+        filename = self.filename(fingerprint)
+        tmp = filename.with_name(f'.{filename.name}.{os.getpid()}.tmp')
+        ps.saveRoadmap(str(tmp))
+        os.replace(tmp, filename)
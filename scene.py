@@ -0,0 +1,168 @@
+import re
+from hpp.corbaserver.manipulation import ConstraintGraph, ConstraintGraphFactory, Constraints, Rule
+
+from utils import generate_joint_bounds_unlimited_rot
+from graph_cache import scene_fingerprint
+
+
+class SceneBuilder:
+    def __init__(self, robot, grippers=None) -> None:
+        """
+        Description of the manipulation scene (furniture and movable objects) that loads the models into the robot and
+        builds constraint graphs containing only the handles and rules that are actually needed. A graph can be built
+        for the whole scene or for a subproblem in which only some objects are movable and the others are locked.
+
+        :param robot: manipulation Robot (e.g. PandaRobot) the models are loaded into
+        :param grippers: names of the grippers used for manipulation, the gripper of the robot if None
+        """
+        super().__init__()
+        self.robot = robot
+        self.grippers = [robot.get_gripper_name()] if grippers is None else grippers
+        self.furniture, self.furniture_names, self.env_contact_surfaces = [], [], []
+        self.objects, self.object_names, self.handles_names, self.object_surfaces = [], [], [], []
+        self.loaded = False
+
+    def add_furniture(self, name, item):
+        """
+        Add environment model, e.g. Table, to the scene.
+
+        :param name: unique name of the furniture, used as the prefix of its frames
+        :param item: model with urdfFilename, srdfFilename and contact_surfaces(prefix)
+        """
+        assert not self.loaded, "Models have been loaded already."
+        self.furniture.append(item)
+        self.furniture_names.append(name)
+        self.env_contact_surfaces += item.contact_surfaces(name + '/')
+        return self
+
+    def add_object(self, name, item, handles=None):
+        """
+        Add movable object, e.g. Cuboid, to the scene.
+
+        :param name: unique name of the object, used as the prefix of its joints and frames
+        :param item: model with rootJointType, urdfFilename, srdfFilename, handles(prefix) and contact_surfaces(prefix)
+        :param handles: names of the handles (without prefix) the object can be grasped by, all handles if None
+        """
+        assert not self.loaded, "Models have been loaded already."
+        prefix = name + '/'
+        all_handles = item.handles(prefix)
+        if handles is not None:
+            unknown = set(prefix + h for h in handles) - set(all_handles)
+            assert len(unknown) == 0, f"Unknown handles {unknown} of object {name}."
+            all_handles = [h for h in all_handles if h[len(prefix):] in handles]
+        self.objects.append(item)
+        self.object_names.append(name)
+        self.handles_names.append(all_handles)
+        self.object_surfaces.append(item.contact_surfaces(prefix))
+        return self
+
+    def load(self, render=None):
+        """
+        Load furniture and objects into the robot.
+
+        :param render: optional PyPhysXTaskRender the furniture and box objects are added to, see add_to_render
+        """
+        for item, name in zip(self.furniture, self.furniture_names):
+            self.robot.loadEnvironmentModel(item.urdfFilename, item.srdfFilename, name + '/')
+        for item, name in zip(self.objects, self.object_names):
+            self.robot.insertRobotModel(name, item.rootJointType, item.urdfFilename, item.srdfFilename)
+            self.robot.setJointBounds(f'{name}/root_joint', generate_joint_bounds_unlimited_rot([-5] * 3, [5] * 3))
+        self.loaded = True
+        if render is not None:
+            self.add_to_render(render)
+        return self
+
+    def add_to_render(self, render):
+        """
+        Add furniture and box objects to the renderer.
+
+        :param render: PyPhysXTaskRender
+        """
+        for item in self.furniture:
+            render.add_pyphysx_obstacle(item.urdfFilename)
+        for item in self.objects:
+            if hasattr(item, 'lengths'):
+                render._create_pyphysx_actor_box(item.lengths)
+
+    def rules(self, objects=None):
+        """
+        Rules allowing at most one grasp at a time, each gripper can grasp any allowed handle of the movable objects.
+
+        :param objects: names of the movable objects, all objects if None
+        :return: list of Rule
+        """
+        handles = [h for name, hs in zip(self.object_names, self.handles_names) if objects is None or name in objects
+                   for h in hs]
+        pattern = '^(' + '|'.join(re.escape(h) for h in handles) + ')$'
+        n = len(self.grippers)
+        rules = [Rule(self.grippers, ['^$'] * n, True)]
+        for i in range(n):
+            rules.append(Rule(self.grippers, ['^$'] * i + [pattern] + ['^$'] * (n - i - 1), True))
+        return rules
+
+    def fingerprint(self, objects=None, **extra):
+        """
+        Fingerprint of the graph of the scene or of the subproblem, see graph_cache.scene_fingerprint.
+
+        :param objects: names of the movable objects, all objects if None
+        :param extra: other parameters the graph depends on, e.g. error threshold
+        """
+        return scene_fingerprint(
+            robot=[self.robot.urdfFilename, self.robot.srdfFilename],
+            furniture=[[item.urdfFilename, item.srdfFilename] for item in self.furniture],
+            furniture_names=self.furniture_names, env_contact_surfaces=self.env_contact_surfaces,
+            objects=[[item.urdfFilename, item.srdfFilename] for item in self.objects], object_names=self.object_names,
+            handles=self.handles_names, object_surfaces=self.object_surfaces, grippers=self.grippers,
+            rules=self.rules(objects), movable_objects=objects, **extra,
+        )
+
+    def build_graph(self, ps, graph_name='graph', objects=None, q_locked=None, graph_cache=None, fingerprint=None,
+                    validate=True):
+        """
+        Create constraint graph of the scene or of the subproblem in which only the given objects are movable.
+        The graph replaces the current graph of the problem.
+
+        :param ps: ProblemSolver of the robot
+        :param graph_name: name of the graph
+        :param objects: names of the movable objects, all objects if None
+        :param q_locked: configuration defining poses of locked objects (i.e. those not in objects)
+        :param graph_cache: optional GraphCache used to skip graph generation and validation
+        :param fingerprint: key of the graph in graph_cache, see fingerprint()
+        :param validate: validate the generated graph
+        :return: initialized ConstraintGraph
+        """
+        assert self.loaded, "Models have to be loaded before building the graph."
+        active = [i for i, name in enumerate(self.object_names) if objects is None or name in objects]
+        cg = ConstraintGraph(self.robot, graphName=graph_name)
+        cached = graph_cache is not None and graph_cache.load(cg, fingerprint)
+        if not cached:
+            factory = ConstraintGraphFactory(cg)
+            factory.setGrippers(self.grippers)
+            factory.environmentContacts(self.env_contact_surfaces)
+            factory.setObjects([self.object_names[i] for i in active], [self.handles_names[i] for i in active],
+                               [self.object_surfaces[i] for i in active])
+            factory.setRules(self.rules(objects))
+            graph_calls = graph_cache.generate(factory) if graph_cache is not None else factory.generate()
+
+        locked = [i for i in range(len(self.objects)) if i not in active]
+        if len(locked) > 0:
+            assert q_locked is not None, "Configuration of locked objects has to be given."
+            lock_names = []
+            for i in locked:
+                joint = f'{self.object_names[i]}/root_joint'
+                rank = self.robot.rankInConfiguration[joint]
+                size = self.robot.getJointConfigSize(joint)
+                lock_names.append(f'lock_{self.object_names[i]}')
+                ps.createLockedJoint(lock_names[-1], joint, list(q_locked[rank:rank + size]))
+            cg.addConstraints(graph=True, constraints=Constraints(numConstraints=lock_names))
+        cg.initialize()
+
+        if not cached:
+            if validate:
+                cgraph = ps.hppcorba.problem.getProblem().getConstraintGraph()
+                cgraph.initialize()
+                graph_validation = ps.client.manipulation.problem.createGraphValidation()
+                assert graph_validation.validate(cgraph)
+            if graph_cache is not None:
+                graph_cache.save(fingerprint, graph_calls)
+        return cg
@@ -0,0 +1,481 @@
+import os
+import json
+import queue
+import asyncio
+import argparse
+import itertools
+import functools
+import threading
+import multiprocessing
+import numpy as np
+
+from corba import CorbaServer
+
+_server_lock = threading.Lock()
+
+
+def _handle_plan(task, q_init, q_goal, fps=10, chunk_frames=100, cancelled=None):
+    """ Solve the query and yield the discretized solution in chunks of frames. """
+    path_id = task.solve(q_init, q_goal)
+    length = task.ps.pathLength(path_id)
+    params = np.linspace(0., length, max(int(np.ceil(length * fps)), 1))
+    for i in range(0, len(params), chunk_frames):
+        if cancelled():
+            return
+        yield 'frames', dict(frames=task.discretize_path(path_id, params=params[i:i + chunk_frames]))
+
+
+def _handle_direct_path(task, q_from, q_to, fps=10, validate=True, cancelled=None):
+    path = task.direct_path(q_from, q_to, fps=fps, validate=validate)
+    yield 'result', dict(success=path is not None)
+    if path is not None:
+        yield 'frames', dict(frames=path)
+
+
+def _handle_sample(task, transition, q_from, n_samples=1, max_attempts=100, cancelled=None):
+    samples, stats = task.sample_transition(transition, q_from, n_samples, max_attempts)
+    yield 'result', dict(samples=samples, stats=stats)
+
+
+def _handle_project(task, configs, node='free', check_collisions=True, cancelled=None):
+    yield 'result', task.project_configurations(configs, node, check_collisions)
+
+
+_handlers = dict(plan=_handle_plan, direct_path=_handle_direct_path, sample=_handle_sample,
+                 project=_handle_project)
+
+
+def _interrupt_on_cancel(task, cancels, state):
+    """
+    Interrupt planning of the current job of the worker when its cancellation arrives; the newest cancelled job is
+    recorded, so a job cancelled before the worker starts it is skipped.
+    """
+    while True:
+        job_id = cancels.get()
+        if job_id is None:
+            return
+        state['last_cancelled'] = max(state['last_cancelled'], job_id)
+        if job_id == state['job_id']:
+            state['cancelled'] = True
+            task.ps.hppcorba.problem.interruptPathPlanning()
+
+
+def _wait_for_credit(acks, job_id, state, in_flight, window):
+    """
+    Block until fewer than window messages of the job are waiting to be written to the client or the job is
+    cancelled; acknowledgements of previous jobs are discarded.
+
+    :return: number of messages of the job still in flight
+    """
+    while in_flight >= window and not state['cancelled']:
+        try:
+            acked_job_id = acks.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if acked_job_id == job_id:
+            in_flight -= 1
+    return in_flight
+
+
+def _worker_main(worker_id, host, port, task_factory, task_kwargs, jobs, cancels, acks, results, window):
+    """
+    Entry point of the worker process: build the task connected to the given server and process jobs. At most window
+    messages of a job are sent before the service acknowledges that they were written to the client, so a slow
+    client pauses the worker instead of accumulating frames in the service. Messages are sent through results, the
+    write end of the pipe owned by this worker only.
+    """
+    if task_factory is None:
+        from basic_task import BasicTask as task_factory
+    CorbaServer(start=False, host=host, port=port).use()
+    task = task_factory(**dict(dict(render=False), **task_kwargs))
+    state = dict(job_id=None, cancelled=False, last_cancelled=-1)
+    threading.Thread(target=_interrupt_on_cancel, args=(task, cancels, state), daemon=True).start()
+    results.send((worker_id, None, 'ready', None))
+    for job_id, kind, params in iter(jobs.get, None):
+        state['job_id'] = job_id
+        state['cancelled'] = job_id <= state['last_cancelled']
+        in_flight = 0
+        try:
+            messages = _handlers[kind](task, **params, cancelled=lambda: state['cancelled'])
+            for message, payload in ([] if state['cancelled'] else messages):
+                in_flight = _wait_for_credit(acks, job_id, state, in_flight, window)
+                if state['cancelled']:
+                    break
+                results.send((worker_id, job_id, message, payload))
+                in_flight += 1
+            results.send((worker_id, job_id, 'done', None))
+        except Exception as e:
+            results.send((worker_id, job_id, 'error', dict(message=f'{type(e).__name__}: {e}')))
+        state['job_id'] = None
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class _Output:
+    def __init__(self, limit) -> None:
+        """
+        Messages waiting to be written to a client. Messages streamed by workers are bounded by the acknowledgement
+        window of each job; the connection stops reading requests (and so producing error messages) while limit
+        messages are waiting.
+        """
+        super().__init__()
+        self.queue = asyncio.Queue()
+        self.limit = limit
+        self.space = asyncio.Event()
+        self.space.set()
+
+    def put(self, message, on_written=None):
+        """ Queue the message; on_written is called once the message has been written to the client. """
+        self.queue.put_nowait((message, on_written))
+        if self.queue.qsize() >= self.limit:
+            self.space.clear()
+
+    async def get(self):
+        item = await self.queue.get()
+        if self.queue.qsize() < self.limit:
+            self.space.set()
+        return item
+
+
+class _Worker:
+    def __init__(self, worker_id, host, port, task_factory, task_kwargs, window) -> None:
+        """
+        Handle of a worker process and of the hppcorbaserver it is connected to. Each start creates new queues and a
+        new results pipe read by its own thread, so killing the worker (e.g. in the middle of sending a message)
+        cannot corrupt the communication with the other workers or with the restarted worker.
+        """
+        super().__init__()
+        self.worker_id, self.host, self.port = worker_id, host, port
+        self.task_factory, self.task_kwargs, self.window = task_factory, task_kwargs, window
+        self.server, self.process, self.jobs, self.cancels, self.acks = None, None, None, None, None
+        self.results, self.reader = None, None
+        self.job_id, self.done, self.ready = None, None, None
+
+    def start(self, loop, on_result):
+        """
+        Start the server and the worker process; blocking, call from an executor and await self.ready. Messages of
+        the worker are passed to on_result in the event loop.
+        """
+        with _server_lock:
+            environ = dict(os.environ)
+            try:
+                self.server = CorbaServer(host=self.host, port=self.port)
+            finally:
+                os.environ.clear()
+                os.environ.update(environ)
+        ctx = multiprocessing.get_context('spawn')
+        self.jobs, self.cancels, self.acks = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        self.results, results_writer = ctx.Pipe(duplex=False)
+        self.ready = loop.create_future()
+        self.process = ctx.Process(target=_worker_main, daemon=True,
+                                   args=(self.worker_id, self.host, self.port, self.task_factory, self.task_kwargs,
+                                         self.jobs, self.cancels, self.acks, results_writer, self.window))
+        self.process.start()
+        results_writer.close()  # the worker holds the only write end, so its termination ends the reader
+        self.reader = threading.Thread(target=self._read_results, args=(self.results, loop, on_result), daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _read_results(results, loop, on_result):
+        """ Forward messages of the worker process to the event loop until the process terminates; runs in a thread. """
+        while True:
+            try:
+                message = results.recv()
+            except (EOFError, OSError):
+                return
+            loop.call_soon_threadsafe(on_result, *message)
+
+    async def wait_ready(self):
+        """ Wait until the task is built in the worker process; fails if the process terminates meanwhile. """
+        while not self.ready.done():
+            assert self.process.is_alive(), f'Worker {self.worker_id} terminated during startup.'
+            await asyncio.wait([self.ready], timeout=0.5)
+
+    def request_exit(self):
+        """ Ask the worker to exit once it finishes its current job. """
+        if self.process is not None and self.process.is_alive():
+            self.jobs.put(None)
+            self.cancels.put(None)
+
+    def stop(self, timeout=0.):
+        """
+        Kill the worker process and its server; blocking. The worker is given timeout seconds to exit first, e.g.
+        after it was asked to by request_exit.
+        """
+        if self.process is not None and self.process.is_alive():
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join()
+        if self.reader is not None:
+            self.reader.join()
+            self.results.close()
+            self.reader, self.results = None, None
+        if self.server is not None:
+            self.server.kill()
+        self.job_id = None
+
+    def run(self, job, loop):
+        self.job_id = job.job_id
+        self.done = loop.create_future()
+        self.jobs.put((job.job_id, job.kind, job.params))
+
+    def interrupt(self, job_id):
+        if self.job_id == job_id:
+            self.cancels.put(job_id)
+
+
+class _Job:
+    def __init__(self, job_id, request, output, timeout, loop) -> None:
+        super().__init__()
+        self.job_id = job_id
+        self.request_id = request.get('id')
+        self.kind = request['type']
+        self.params = {k: v for k, v in request.items() if k not in ('id', 'type', 'timeout')}
+        self.timeout = request.get('timeout', timeout)
+        self.output = output
+        self.worker = None
+        self.closed = loop.create_future()
+
+
+class PlanningService:
+    lanes = dict(plan='long', direct_path='short', sample='short', project='short')
+
+    def __init__(self, n_long_workers=1, n_short_workers=1, task_kwargs=None, host='127.0.0.1', base_port=13360,
+                 max_queue=64, timeout=60., kill_after=5., window=4, max_output=256, task_factory=None) -> None:
+        """
+        Asyncio front-end that serves planning requests of many clients by a set of worker processes, each holding
+        a BasicTask connected to its own hppcorbaserver. Long requests (plan) and short requests (direct_path, sample,
+        project) are served by separate workers, so long solves do not delay short requests.
+
+        Protocol: the client sends one JSON object per line, e.g.
+            {"id": 1, "type": "plan", "q_init": [...], "q_goal": [...], "fps": 10, "timeout": 30}
+            {"id": 2, "type": "direct_path", "q_from": [...], "q_to": [...]}
+            {"id": 3, "type": "sample", "transition": "Loop | f", "q_from": [...], "n_samples": 10}
+            {"id": 4, "type": "project", "configs": [[...], ...], "node": "free"}
+            {"id": 1, "type": "cancel"}
+        Other keys are passed as keyword arguments to the corresponding BasicTask method. The service replies by
+        JSON lines with the id of the request: zero or more {"type": "frames", "frames": [...]} (streamed as the path
+        is discretized) or {"type": "result", ...} messages followed by exactly one closing message of type "done",
+        "error", "timeout" or "cancelled". Requests are rejected by an "error" message if the queue of their lane is
+        full. Requests of a client are cancelled when it disconnects. Streaming is throttled end to end: a worker
+        waits once window messages of its job are not yet written to the client, and requests of a client are not
+        read while max_output messages wait for it.
+
+        :param n_long_workers: number of workers serving plan requests
+        :param n_short_workers: number of workers serving the other requests
+        :param task_kwargs: keyword arguments passed to BasicTask in each worker, headless (render=False) by default
+        :param host: host the hppcorbaserver processes listen on
+        :param base_port: port of the first hppcorbaserver, the others use consecutive ports
+        :param max_queue: maximum number of waiting requests per lane
+        :param timeout: default timeout of requests in seconds, measured from the start of processing
+        :param kill_after: worker (and its server) is restarted if an interrupted job does not finish in this time
+        :param window: maximum number of messages of a job sent by the worker and not yet written to the client
+        :param max_output: number of messages waiting for a client at which reading of its requests is paused
+        :param task_factory: picklable callable building the task of each worker from task_kwargs, e.g. a subclass
+            of BasicTask; BasicTask if None
+        """
+        super().__init__()
+        self.n_workers = dict(long=n_long_workers, short=n_short_workers)
+        self.task_kwargs = task_kwargs or {}
+        self.task_factory = task_factory
+        self.host = host
+        self.base_port = base_port
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.kill_after = kill_after
+        self.window = window
+        self.max_output = max_output
+        self.workers = []
+        self.queues = {}
+        self.stats = dict(accepted=0, rejected=0, done=0, error=0, timeout=0, cancelled=0, restarts=0)
+        self._jobs = {}
+        self._job_ids = itertools.count()
+        self._tasks = []
+        self._loop = None
+
+    async def start(self):
+        """ Start servers and workers and wait until all workers are ready. """
+        self._loop = asyncio.get_event_loop()
+        for lane, n in self.n_workers.items():
+            self.queues[lane] = asyncio.Queue(self.max_queue)
+            for _ in range(n):
+                worker = _Worker(len(self.workers), self.host, self.base_port + len(self.workers), self.task_factory,
+                                 self.task_kwargs, self.window)
+                self.workers.append(worker)
+                await self._loop.run_in_executor(None, worker.start, self._loop, self._on_result)
+                self._tasks.append(asyncio.ensure_future(self._dispatch(worker, self.queues[lane])))
+        await asyncio.gather(*[w.wait_ready() for w in self.workers])
+        return self
+
+    async def serve(self, port=8765, host='127.0.0.1', path=None):
+        """
+        Accept clients until cancelled.
+
+        :param port: TCP port of the service
+        :param host: host of the service
+        :param path: if given, the service listens on this unix socket instead of TCP
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle_connection, path)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def shutdown(self):
+        """
+        Cancel pending requests, stop workers and kill their servers; workers that do not finish their interrupted
+        jobs within kill_after are killed.
+        """
+        for task in self._tasks:
+            task.cancel()
+        for job in list(self._jobs.values()):
+            self._close(job, 'cancelled', message='service shutdown')
+        for worker in self.workers:
+            worker.request_exit()
+        end = self._loop.time() + self.kill_after
+        for worker in self.workers:
+            await self._loop.run_in_executor(None, worker.stop, max(end - self._loop.time(), 0.))
+
+    def _on_result(self, worker_id, job_id, kind, payload):
+        worker = self.workers[worker_id]
+        if kind == 'ready':
+            if not worker.ready.done():
+                worker.ready.set_result(True)
+            return
+        if kind in ('done', 'error') and worker.job_id == job_id and not worker.done.done():
+            worker.done.set_result(kind)
+        job = self._jobs.get(job_id)
+        ack = None if kind in ('done', 'error') else functools.partial(worker.acks.put, job_id)
+        if job is None or job.closed.done():
+            if ack is not None:
+                ack()
+            return
+        if kind in ('done', 'error'):
+            self._close(job, kind, **(payload or {}))
+        else:
+            job.output.put(dict(payload, id=job.request_id, type=kind), on_written=ack)
+
+    def _close(self, job, kind, **payload):
+        """ Send the closing message of the job and interrupt it if it is running; no-op if already closed. """
+        if job.closed.done():
+            return
+        job.closed.set_result(kind)
+        self.stats[kind] += 1
+        self._jobs.pop(job.job_id, None)
+        job.output.put(dict(payload, id=job.request_id, type=kind))
+        if kind in ('timeout', 'cancelled') and job.worker is not None:
+            job.worker.interrupt(job.job_id)
+
+    async def _dispatch(self, worker, queue):
+        """ Run jobs of the lane on the worker one by one. """
+        while True:
+            job = await queue.get()
+            if job.closed.done():
+                continue
+            job.worker = worker
+            worker.run(job, self._loop)
+            await asyncio.wait([worker.done, job.closed], timeout=job.timeout)
+            if worker.done.done():
+                continue
+            self._close(job, 'timeout')
+            await asyncio.wait([worker.done], timeout=self.kill_after)
+            if not worker.done.done():
+                self.stats['restarts'] += 1
+                await self._loop.run_in_executor(None, worker.stop)
+                await self._loop.run_in_executor(None, worker.start, self._loop, self._on_result)
+                await worker.wait_ready()
+
+    def _submit(self, request, output):
+        kind = request.get('type')
+        if kind not in self.lanes:
+            output.put(dict(id=request.get('id'), type='error', message=f'Unknown request type: {kind}'))
+            return None
+        job = _Job(next(self._job_ids), request, output, self.timeout, self._loop)
+        try:
+            self.queues[self.lanes[kind]].put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            output.put(dict(id=job.request_id, type='error', message='Queue is full, retry later.'))
+            return None
+        self.stats['accepted'] += 1
+        self._jobs[job.job_id] = job
+        return job
+
+    async def _handle_connection(self, reader, writer):
+        output = _Output(self.max_output)
+        writer_task = asyncio.ensure_future(self._write_messages(output, writer))
+        jobs = {}
+        try:
+            while True:
+                await output.space.wait()
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    output.put(dict(id=None, type='error', message='Request is not valid JSON.'))
+                    continue
+                if request.get('type') == 'cancel':
+                    if request.get('id') in jobs:
+                        self._close(jobs.pop(request.get('id')), 'cancelled')
+                    continue
+                job = self._submit(request, output)
+                if job is not None:
+                    jobs[job.request_id] = job
+        finally:
+            for job in jobs.values():
+                self._close(job, 'cancelled', message='client disconnected')
+            output.put(None)
+            await writer_task
+
+    @staticmethod
+    async def _write_messages(output, writer):
+        """
+        Write messages to the client; streamed messages are acknowledged to their workers once written, so waiting
+        for the client to read them throttles the workers.
+        """
+        try:
+            while True:
+                message, on_written = await output.get()
+                if message is None:
+                    break
+                writer.write(json.dumps(message, default=_to_json).encode() + b'\n')
+                await writer.drain()
+                if on_written is not None:
+                    on_written()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _main(args):
+    service = PlanningService(n_long_workers=args.long_workers, n_short_workers=args.short_workers,
+                              max_queue=args.max_queue, timeout=args.timeout, window=args.window)
+    await service.start()
+    try:
+        await service.serve(port=args.port, host=args.host, path=args.unix_socket)
+    finally:
+        await service.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve planning requests of BasicTask over JSON lines.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None)
+    parser.add_argument('--long-workers', type=int, default=1)
+    parser.add_argument('--short-workers', type=int, default=1)
+    parser.add_argument('--max-queue', type=int, default=64)
+    parser.add_argument('--timeout', type=float, default=60.)
+    parser.add_argument('--window', type=int, default=4)
+    asyncio.run(_main(parser.parse_args()))
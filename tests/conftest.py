@@ -0,0 +1,5 @@
+import sys
+import pathlib
+
+# modules of the repository are imported as top-level modules, as in the scripts and benchmarks
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parents[1]))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from box_collision import boxes_overlap
+from kinematics import quaternion_to_matrix
+
+
+def random_rotations(rng, n):
+    q = rng.normal(size=(n, 4))
+    return quaternion_to_matrix(q / np.linalg.norm(q, axis=1, keepdims=True))
+
+
+def overlap_lp(center_a, rotation_a, half_a, center_b, rotation_b, half_b):
+    """ Reference test: the boxes overlap if a point inside both of them exists, i.e. the LP is feasible. """
+    linprog = pytest.importorskip('scipy.optimize').linprog
+    a_ub, b_ub = [], []
+    for center, rotation, half in [(center_a, rotation_a, half_a), (center_b, rotation_b, half_b)]:
+        a_ub += [rotation.T, -rotation.T]
+        b_ub += [half + rotation.T @ center, half - rotation.T @ center]
+    result = linprog(np.zeros(3), A_ub=np.concatenate(a_ub), b_ub=np.concatenate(b_ub), bounds=[(None, None)] * 3)
+    return result.status == 0
+
+
+def test_axis_aligned_boxes():
+    eye = np.eye(3)
+    half = np.full(3, 0.5)
+    centers = np.array([[0.9, 0, 0], [1.1, 0, 0], [0, 0, 0.99], [0.8, 0.8, 0.8], [1.01, 1.01, 0]])
+    expected = [True, False, True, True, False]
+    assert boxes_overlap(np.zeros(3), eye, half, centers, eye, half).tolist() == expected
+
+
+def test_tolerance_accepts_resting_contact():
+    eye = np.eye(3)
+    half = np.full(3, 0.5)
+    center = np.array([[0, 0, 0.9995]])
+    assert boxes_overlap(np.zeros(3), eye, half, center, eye, half)[0]
+    assert not boxes_overlap(np.zeros(3), eye, half, center, eye, half, tolerance=1e-3)[0]
+
+
+def test_matches_lp_reference_on_random_boxes():
+    rng = np.random.default_rng(0)
+    n = 300
+    center_a, center_b = rng.uniform(-0.3, 0.3, size=(2, n, 3))
+    rotation_a, rotation_b = random_rotations(rng, n), random_rotations(rng, n)
+    half_a, half_b = np.array([0.2, 0.1, 0.05]), np.array([0.15, 0.15, 0.02])
+    result = boxes_overlap(center_a, rotation_a, half_a, center_b, rotation_b, half_b)
+    expected = [overlap_lp(center_a[i], rotation_a[i], half_a, center_b[i], rotation_b[i], half_b) for i in range(n)]
+    assert result.tolist() == expected
+    assert 0 < result.sum() < n
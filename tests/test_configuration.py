@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from configuration import ConfigurationLayout, Configuration, ConfigurationBatch
+
+
+class FakeRobot:
+    rankInConfiguration = {'cuboid/root_joint': 9, 'cuboid2/root_joint': 16}
+
+    @staticmethod
+    def initial_configuration():
+        return [0.1] * 7 + [0., 0.]
+
+    @staticmethod
+    def open_gripper_configuration():
+        return [0.039, 0.039]
+
+    @staticmethod
+    def getConfigSize():
+        return 23
+
+
+@pytest.fixture
+def layout():
+    return ConfigurationLayout.from_robot(FakeRobot(), ['cuboid', 'cuboid2'])
+
+
+def test_default_configuration(layout):
+    q = layout.configuration()
+    assert q.data.shape == (23,)
+    assert q.robot.tolist() == FakeRobot.initial_configuration()
+    assert q.objects.tolist() == [[0, 0, 0, 0, 0, 0, 1]] * 2
+    assert layout.n_fingers == 2 and q.arm.shape == (7,)
+
+
+def test_views_share_memory(layout):
+    data = layout.default(n=3)
+    batch = ConfigurationBatch(data, layout)
+    assert batch.data is data
+    batch.object_position('cuboid2')[:, 2] = 0.5
+    assert np.all(data[:, 18] == 0.5)
+    batch.objects[1, 0, 0] = 2.
+    assert data[1, 9] == 2. and batch[1].object_pose(0)[0] == 2.
+    for view in (batch.robot, batch.fingers, batch.objects, batch.object_quaternion(1)):
+        assert np.shares_memory(view, data)
+
+
+def test_open_gripper_in_place(layout):
+    batch = layout.batch(n=2)
+    q = batch[0]
+    assert isinstance(q, Configuration) and len(batch[0:1]) == 1
+    q.open_gripper()
+    assert batch.data[0, 7:9].tolist() == FakeRobot.open_gripper_configuration()
+    assert batch.data[1, 7:9].tolist() == [0., 0.]
+
+
+def test_contiguous_layout_and_shape_check():
+    layout = ConfigurationLayout.contiguous(np.zeros(9), 2)
+    assert layout.nq == 23 and layout.contiguous_objects and layout.n_fingers == 0
+    with pytest.raises(AssertionError):
+        Configuration(np.zeros(22), layout)
+    with pytest.raises(AssertionError):
+        layout.configuration().open_gripper()
+    q = Configuration(list(range(23)), layout)
+    assert list(q) == list(range(23)) and q.object_pose('1').tolist() == list(range(16, 23))
+
+
+def test_array_protocol_honours_copy(layout):
+    q = layout.configuration()
+    assert np.shares_memory(np.asarray(q), q.data)
+    assert not np.shares_memory(np.array(q, copy=True), q.data)
+    assert np.asarray(q, dtype=np.float32).dtype == np.float32
+    with pytest.raises(ValueError):
+        np.array(q, dtype=np.float32, copy=False)
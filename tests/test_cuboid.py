@@ -0,0 +1,66 @@
+import re
+import pathlib
+import numpy as np
+import pytest
+
+from models.cuboid import Cuboid
+from kinematics import quaternion_to_matrix
+
+
+def srdf_handles(srdf):
+    """ Return dictionary handle name: (position, rotation) parsed from the srdf text. """
+    handles = {}
+    for name, position in re.findall(r'<handle name="(\w+)".*?<position>(.*?)</position>', srdf, flags=re.DOTALL):
+        values = np.array(position.replace(',', ' ').split(), dtype=np.float64)
+        w, x, y, z = values[3:] / np.linalg.norm(values[3:])  # srdf quaternions are stored as (w, x, y, z)
+        handles[name] = values[:3], quaternion_to_matrix([x, y, z, w])
+    return handles
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('HPP_TUTORIAL_CACHE', str(tmp_path))
+
+
+@pytest.mark.parametrize('lengths', [[0.05, 0.05, 0.05], [0.2, 0.3, 0.25]])
+def test_handle_frames_match_srdf(lengths):
+    names, positions, directions = Cuboid.handle_frames(lengths)
+    handles = srdf_handles(Cuboid.srdf(lengths, 0.07))
+    assert sorted(handles) == sorted(names)
+    for name, position, direction in zip(names, positions, directions):
+        srdf_position, rotation = handles[name]
+        assert np.allclose(srdf_position, position)
+        # the gripper approaches along the x axis of the handle, i.e. against the direction towards the gripper
+        assert np.allclose(rotation[:, 0], -direction, atol=1e-6)
+
+
+def test_srdf_contains_only_selected_handles():
+    cuboid = Cuboid(0.1, handles=['handleZpx', 'handleXmz'])
+    assert cuboid.handles('cuboid/') == ['cuboid/handleZpx', 'cuboid/handleXmz']
+    srdf = pathlib.Path(cuboid.srdfFilename).read_text()
+    assert sorted(srdf_handles(srdf)) == ['handleXmz', 'handleZpx']
+    assert '<contact name="box_surface">' in srdf
+    with pytest.raises(AssertionError):
+        Cuboid(0.1, handles=['handleZpx', 'unknown'])
+
+
+def test_reachable_handles_drop_handles_facing_table_or_away_from_robot():
+    # cube resting on the table at the boundary of the reach in front of the robot
+    region = ([0.75, 0., 0.025], [0.75, 0., 0.025])
+    cuboid = Cuboid.with_reachable_handles(0.05, reach_m=0.8, region=region, surface_height=0.)
+    names, _, directions = Cuboid.handle_frames(cuboid.lengths)
+    expected = [n for n, d in zip(names, directions) if d[2] >= 0 and d[0] <= 0]
+    assert cuboid.handle_names == expected
+    assert 'handleZpx' in expected and 'handleXmz' in expected
+    assert 'handleZmx' not in expected and 'handleXpz' not in expected
+    assert sorted(srdf_handles(pathlib.Path(cuboid.srdfFilename).read_text())) == sorted(expected)
+
+    # the robot on the other side of the cube keeps the opposite handles
+    base = np.eye(4)
+    base[0, 3] = 1.5
+    opposite = Cuboid.reachable_handles([0.05] * 3, robot_base_pose=base, reach_m=0.8, region=region,
+                                        surface_height=0.)
+    assert opposite == [n for n, d in zip(names, directions) if d[2] >= 0 and d[0] >= 0]
+
+    # all handles are kept if the object is well within the reach and the surface is not checked
+    assert Cuboid.reachable_handles([0.05] * 3, region=([0.3, 0., 0.3], [0.4, 0.1, 0.3])) == names
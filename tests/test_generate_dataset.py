@@ -0,0 +1,55 @@
+import json
+import numpy as np
+
+from generate_dataset import DatasetWriter
+
+
+def result(task_id, n_frames, nq=4):
+    frames = None if n_frames == 0 else np.full((n_frames, nq), float(task_id))
+    return dict(task_id=task_id, success=n_frames > 0, frames=frames)
+
+
+def read_frames(output_dir, record):
+    shard = np.load(output_dir.joinpath(f'frames_{record["shard"]:05d}.npy'), mmap_mode='r')
+    return shard[record['offset']:record['offset'] + record['n_frames']]
+
+
+def test_write_and_start_new_shard(tmp_path):
+    writer = DatasetWriter(tmp_path, shard_frames=10)
+    for task_id, n_frames in enumerate([6, 0, 3, 5, 12]):
+        writer.write(result(task_id, n_frames))
+    writer.close()
+
+    records = [json.loads(line) for line in tmp_path.joinpath('index.jsonl').read_text().splitlines()]
+    assert [(r['shard'], r['offset']) for r in records] == [(0, 0), (None, None), (0, 6), (1, 0), (2, 0)]
+    for record in records:
+        if record['n_frames'] > 0:
+            assert (read_frames(tmp_path, record) == record['task_id']).all()
+    assert np.load(tmp_path.joinpath('frames_00002.npy')).shape == (12, 4)
+
+
+def test_resume_after_crash(tmp_path):
+    writer = DatasetWriter(tmp_path, shard_frames=10)
+    writer.write(result(0, 4))
+    writer.write(result(1, 3))
+    # crashed run: frames of task 2 written to the shard, but its index line only partially
+    shard = writer._open_shard(4, 2)
+    shard[7:9] = -1.
+    shard.flush()
+    with open(tmp_path.joinpath('index.jsonl'), 'a') as f:
+        f.write('{"task_id": 2, "succ')
+    del writer, shard
+
+    resumed = DatasetWriter(tmp_path, shard_frames=10)
+    assert resumed.finished == {0, 1}
+    assert (resumed.shard, resumed.offset) == (0, 7)
+    assert tmp_path.joinpath('index.jsonl').read_text().endswith('\n')
+
+    resumed.write(result(2, 2))
+    resumed.write(result(3, 5))
+    resumed.close()
+    records = [json.loads(line) for line in tmp_path.joinpath('index.jsonl').read_text().splitlines()]
+    assert [r['task_id'] for r in records] == [0, 1, 2, 3]
+    assert [(r['shard'], r['offset']) for r in records] == [(0, 0), (0, 4), (0, 7), (1, 0)]
+    for record in records:
+        assert (read_frames(tmp_path, record) == record['task_id']).all()
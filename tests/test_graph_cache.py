@@ -0,0 +1,69 @@
+import shutil
+import pytest
+
+from graph_cache import GraphCache
+
+
+class FakeGraph:
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    def createNode(self, name):
+        self.calls.append(('createNode', name))
+
+    def createGrasp(self, name, gripper, handle):
+        self.calls.append(('createGrasp', name, gripper, handle))
+
+
+class FakeConstraintFactory:
+    def __init__(self, graph) -> None:
+        super().__init__()
+        self.graph = graph
+
+
+class FakeFactory:
+    def __init__(self, graph) -> None:
+        super().__init__()
+        self.graph = graph
+        self.constraints = FakeConstraintFactory(graph)
+
+    def generate(self):
+        self.constraints.graph.createGrasp('grasp', 'panda/gripper', 'cuboid/handle')
+        self.graph.createNode('free')
+
+
+def test_generate_records_constraint_factory_calls_and_replays_them(tmp_path):
+    cache = GraphCache(tmp_path)
+    graph = FakeGraph()
+    factory = FakeFactory(graph)
+    calls = cache.generate(factory)
+    assert factory.graph is graph and factory.constraints.graph is graph
+    assert [c[0] for c in calls] == ['createGrasp', 'createNode']
+
+    cache.save('scene', calls)
+    replayed = FakeGraph()
+    assert cache.load(replayed, 'scene')
+    assert replayed.calls == graph.calls
+    assert not cache.load(FakeGraph(), 'other')
+
+
+@pytest.mark.skipif(shutil.which('hppcorbaserver') is None, reason='hppcorbaserver is not installed')
+def test_replay_into_reset_server(tmp_path):
+    from corba import CorbaServer
+    from basic_task import BasicTask
+    from hpp.corbaserver.manipulation import Client
+
+    server = CorbaServer()
+    cache = GraphCache(tmp_path)
+    generated = BasicTask(render=False, graph_cache=cache)
+    constraints = set(generated.ps.getAvailable('NumericalConstraint'))
+    assert len(list(tmp_path.iterdir())) == 1
+
+    Client().problem.resetProblem()
+    task = BasicTask(render=False, graph_cache=cache)
+    assert set(task.ps.getAvailable('NumericalConstraint')) == constraints
+    cgraph = task.ps.hppcorba.problem.getProblem().getConstraintGraph()
+    cgraph.initialize()
+    assert task.ps.client.manipulation.problem.createGraphValidation().validate(cgraph)
+    server.kill()
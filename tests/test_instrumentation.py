@@ -0,0 +1,75 @@
+from instrumentation import Profiler, payload_size
+
+
+class FakeProblem:
+    def configAtParam(self, path_id, param):
+        return [0.] * 16
+
+
+class FakeNamespace:
+    def __init__(self) -> None:
+        super().__init__()
+        self.problem = FakeProblem()
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        """ Same shape as CorbaClient of the manipulation ProblemSolver: basic and manipulation clients. """
+        super().__init__()
+        self.basic = FakeNamespace()
+        self.manipulation = FakeNamespace()
+
+
+class FakeProblemSolver:
+    def __init__(self) -> None:
+        super().__init__()
+        self.client = FakeClient()
+        self.hppcorba = self.client.basic
+
+    def pathLength(self, path_id):
+        return 1.
+
+
+class FakeTask:
+    def __init__(self) -> None:
+        super().__init__()
+        self.ps = FakeProblemSolver()
+        self.robot = None
+        self._cg = object()
+
+
+def test_counts_nested_calls_and_restores_attributes():
+    task = FakeTask()
+    ps, cg = task.ps, task._cg
+    with Profiler(task) as profiler:
+        for i in range(10):
+            task.ps.hppcorba.problem.configAtParam(0, i / 10)
+        task.ps.pathLength(0)
+    assert task.ps is ps and task._cg is cg
+    stats = profiler.to_dict()
+    assert stats['ps.hppcorba.problem.configAtParam']['calls'] == 10
+    assert stats['ps.hppcorba.problem.configAtParam']['bytes_received'] == 10 * 16 * 8
+    assert sum(stats['ps.pathLength']['histogram']['counts']) == 1
+    assert 'configAtParam' in profiler.report()
+
+
+def test_attribute_replaced_while_instrumented_is_kept():
+    task = FakeTask()
+    with Profiler(task):
+        rebuilt = object()
+        task._cg = rebuilt
+    assert task._cg is rebuilt
+
+
+def test_payload_size():
+    assert payload_size(([1., 2.], 'ab', {'k': True})) == 16 + 2 + 1 + 1
+
+
+def test_reset_clears_statistics_of_wrapped_methods():
+    task = FakeTask()
+    with Profiler(task) as profiler:
+        path_length = task.ps.pathLength
+        path_length(0)
+        profiler.reset()
+        path_length(0)
+    assert profiler.to_dict()['ps.pathLength']['calls'] == 1
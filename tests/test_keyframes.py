@@ -0,0 +1,34 @@
+import numpy as np
+
+from keyframes import select_keyframes, make_quaternions_continuous
+
+
+def interpolation_error(values, keyframes):
+    frames = np.arange(len(values))
+    interpolated = np.stack([np.interp(frames, keyframes, values[keyframes, i]) for i in range(values.shape[1])], 1)
+    return np.abs(interpolated - values).max()
+
+
+def test_error_is_bounded_by_tolerance():
+    rng = np.random.default_rng(0)
+    t = np.linspace(0., 1., 500)[:, None]
+    values = np.sin(2 * np.pi * t * np.arange(1, 8)) + rng.normal(scale=1e-4, size=(500, 7))
+    for tolerance in [1e-3, 1e-2, 5e-2]:
+        keyframes = select_keyframes(values, tolerance)
+        assert keyframes[0] == 0 and keyframes[-1] == len(values) - 1
+        assert np.all(np.diff(keyframes) > 0)
+        assert interpolation_error(values, keyframes) <= tolerance
+    assert len(select_keyframes(values, 5e-2)) < len(select_keyframes(values, 1e-3)) < len(values)
+
+
+def test_linear_motion_keeps_only_endpoints():
+    values = np.linspace([0., 1.], [1., -1.], 50)
+    assert select_keyframes(values, 1e-9).tolist() == [0, 49]
+    assert select_keyframes(values[:2], 0.).tolist() == [0, 1]
+
+
+def test_quaternions_continuous():
+    q = np.array([[0, 0, 0, 1], [0, 0, 0.1, -0.995], [0, 0, 0.2, 0.98]])
+    continuous = make_quaternions_continuous(q)
+    assert np.all(np.sum(continuous[1:] * continuous[:-1], axis=1) > 0)
+    assert np.allclose(np.abs(continuous), np.abs(q))
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from kinematics import URDFKinematics, matrix_to_quaternion, quaternion_to_matrix
+from models.models_utils import get_models_path
+
+
+def test_panda_zero_configuration():
+    kinematics = URDFKinematics(get_models_path().joinpath('franka_panda', 'panda.urdf'))
+    assert len(kinematics.movable_joints) == 9
+    poses = kinematics.link_poses()
+    assert np.allclose(poses['panda_hand'][:3, 3], [0.088, 0., 0.926], atol=1e-6)
+    assert np.allclose(poses['panda_link4'][:3, 3], [0.0825, 0., 0.649], atol=1e-6)
+
+    joint_values = np.random.default_rng(0).uniform(-1., 1., size=(5, 9))
+    batch = kinematics.link_poses_batch(joint_values)
+    assert np.allclose(batch['panda_hand'][3], kinematics.link_poses(joint_values[3])['panda_hand'])
+
+
+def test_quaternion_matrix_roundtrip():
+    q = np.random.default_rng(1).normal(size=(100, 4))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    rotations = quaternion_to_matrix(q)
+    assert np.allclose(rotations @ rotations.transpose(0, 2, 1), np.eye(3))
+    q2 = matrix_to_quaternion(rotations)
+    assert np.allclose(np.abs(np.sum(q * q2, axis=1)), 1.)
+
+
+def test_unsupported_geometry_raises_value_error(tmp_path):
+    urdf = tmp_path.joinpath('cylinder.urdf')
+    urdf.write_text('<robot name="r"><link name="base"><visual><geometry><cylinder radius="1" length="1"/>'
+                    '</geometry></visual></link></robot>')
+    with pytest.raises(ValueError, match='Unsupported urdf geometry'):
+        URDFKinematics(urdf)
@@ -0,0 +1,44 @@
+import pytest
+
+from mesh_cache import MeshCache
+
+trimesh = pytest.importorskip('trimesh')
+
+
+@pytest.fixture
+def two_colored_parts(tmp_path):
+    box = trimesh.creation.box()
+    box.visual.face_colors = [255, 0, 0, 255]
+    sphere = trimesh.creation.icosphere(subdivisions=3)
+    sphere.apply_translation([3, 0, 0])
+    sphere.visual.face_colors = [0, 0, 255, 255]
+    filename = tmp_path.joinpath('parts.glb')
+    trimesh.Scene([box, sphere]).export(filename)
+    return filename
+
+
+def test_colors_of_parts_are_kept(two_colored_parts, tmp_path):
+    mesh = MeshCache(tmp_path.joinpath('cache')).load(two_colored_parts)
+    on_sphere = mesh['vertices'][:, 0] > 1.5
+    assert mesh['colors'][on_sphere].tolist() == [[0, 0, 1]] * int(on_sphere.sum())
+    assert mesh['colors'][~on_sphere].tolist() == [[1, 0, 0]] * int((~on_sphere).sum())
+
+
+def test_level_of_detail_keeps_colors(two_colored_parts, tmp_path):
+    cache = MeshCache(tmp_path.joinpath('cache'))
+    full = cache.load(two_colored_parts)
+    mesh = cache.load(two_colored_parts, max_faces=100)
+    assert len(mesh['faces']) < len(full['faces'])
+    assert len(mesh['colors']) == len(mesh['vertices'])
+    assert (mesh['colors'][mesh['vertices'][:, 0] > 1.5] == [0, 0, 1]).all()
+
+
+def test_scaled_mesh_is_not_copied(two_colored_parts, tmp_path):
+    np = pytest.importorskip('numpy')
+    meshcat_viewer = pytest.importorskip('meshcat_viewer')
+    cache = MeshCache(tmp_path.joinpath('cache'))
+    geometry = dict(type='mesh', filename=str(two_colored_parts), scale=np.array([2., 3., 4.]))
+    mesh, vertex_colors = meshcat_viewer._geometry(geometry, cache)
+    assert vertex_colors and not mesh.vertices.flags.owndata
+    assert np.array_equal(mesh.vertices, cache.load(two_colored_parts)['vertices'])
+    assert np.allclose(meshcat_viewer._scale_transform(geometry), np.diag([2., 3., 4., 1.]))
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('meshcat')
+
+from meshcat_viewer import MeshcatTaskViewer, OfflineMeshcatWindow
+from models.models_utils import get_models_path
+from render import PyPhysXTaskRender
+
+PANDA_URDF = str(get_models_path().joinpath('franka_panda', 'panda.urdf'))
+OBSTACLE_URDF = """<robot name="obstacle">
+  <link name="base"><visual><geometry><box size="1 1 0.1"/></geometry></visual></link>
+</robot>
+"""
+
+
+class RecordingWindow(OfflineMeshcatWindow):
+    def __init__(self) -> None:
+        """ Offline window that records the paths of uploaded objects. """
+        super().__init__()
+        self.uploaded = []
+
+    def send(self, command):
+        if command.lower()['type'] == 'set_object':
+            self.uploaded.append(command.lower()['path'])
+        super().send(command)
+
+
+class FakeRobot:
+    urdfFilename = PANDA_URDF
+
+    def initial_configuration(self):
+        return [0.] * 9
+
+
+@pytest.fixture
+def obstacle_urdf(tmp_path):
+    filename = tmp_path.joinpath('obstacle.urdf')
+    filename.write_text(OBSTACLE_URDF)
+    return str(filename)
+
+
+def test_only_new_geometry_is_uploaded(obstacle_urdf):
+    window = RecordingWindow()
+    viewer = MeshcatTaskViewer(PANDA_URDF, get_models_path(), window=window)
+    viewer.add_box([0.1, 0.1, 0.1])
+    viewer.show(np.zeros(9 + 7))
+    n_robot = sum('/robot/' in path for path in window.uploaded)
+    assert n_robot > 0 and len(window.uploaded) == n_robot + 1
+
+    window.uploaded.clear()
+    viewer.add_box([0.2, 0.1, 0.1])
+    viewer.add_obstacle(obstacle_urdf)
+    viewer.publish(np.zeros((3, 9 + 14)))
+    assert sorted(window.uploaded) == ['/meshcat/object_1', '/meshcat/obstacle_0/base/visual_0']
+
+    window.uploaded.clear()
+    viewer.show(np.zeros(9 + 14))
+    assert window.uploaded == []
+
+
+def test_visualisation_uses_persistent_viewer(monkeypatch, obstacle_urdf):
+    render = PyPhysXTaskRender(FakeRobot())
+    create_viewer = render._create_meshcat_viewer
+    window = RecordingWindow()
+    monkeypatch.setattr(render, '_create_meshcat_viewer', lambda: create_viewer(window=window))
+    render._create_pyphysx_actor_box([0.1, 0.1, 0.1])
+
+    render.visualise_configurations([np.zeros(9 + 7)])
+    viewer = render.viewer
+    n_uploaded = len(window.uploaded)
+    render.add_pyphysx_obstacle(obstacle_urdf)
+    render.visualise_path_meshcat(np.zeros((5, 9 + 7)))
+    assert render.viewer is viewer
+    assert window.uploaded[n_uploaded:] == ['/meshcat/obstacle_0/base/visual_0']
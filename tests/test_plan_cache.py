@@ -0,0 +1,67 @@
+import os
+import numpy as np
+
+from plan_cache import PlanCache
+
+
+def path(n_frames, value=0.):
+    return np.full((n_frames, 10), value)
+
+
+def test_key_quantizes_configurations():
+    cache = PlanCache(persistent=False, quantization=1e-3)
+    q = np.zeros(10)
+    assert cache.key('scene', 'solve', q, q + 1e-4) == cache.key('scene', 'solve', q, q)
+    assert cache.key('scene', 'solve', q, q + 1e-2) != cache.key('scene', 'solve', q, q)
+    assert cache.key('scene', 'solve', q, q, fps=10) != cache.key('scene', 'solve', q, q, fps=20)
+    assert cache.key('other', 'solve', q, q) != cache.key('scene', 'solve', q, q)
+
+
+def test_lru_accounting_in_memory():
+    cache = PlanCache(max_bytes=3 * 800, persistent=False)
+    for key in 'abc':
+        cache.put(key, path(10))
+    assert len(cache) == 3 and cache.nbytes == 3 * 800
+    cache.get('a')
+    cache.put('d', path(10))
+    assert cache.get('b') is None
+    assert all(cache.get(k) is not None for k in 'acd')
+    assert cache.nbytes == 3 * 800
+    cache.put('a', path(20))
+    assert len(cache) == 2 and cache.nbytes == 2400
+    assert cache.report()['hits'] == 4 and cache.report()['misses'] == 1
+
+
+def test_put_copies_path_and_results_are_read_only():
+    cache = PlanCache(persistent=False)
+    original = path(5)
+    cache.put('a', original, solve_time=2.)
+    original[0, 0] = 1.
+    cached = cache.get('a')
+    assert cached[0, 0] == 0. and not cached.flags.writeable
+    assert cache.stats['saved_time'] == 2.
+
+
+def test_disk_store_survives_and_is_bounded(tmp_path):
+    cache = PlanCache(max_bytes=0, cache_dir=tmp_path)
+    cache.put('a', path(10, 1.), solve_time=1.)
+    size = tmp_path.joinpath('a.npz').stat().st_size
+    os.utime(tmp_path.joinpath('a.npz'), (1, 1))
+
+    reloaded = PlanCache(cache_dir=tmp_path, max_disk_bytes=2 * size)
+    assert reloaded.disk_nbytes == size
+    assert reloaded.get('a')[0, 0] == 1. and reloaded.stats['disk_hits'] == 1
+    os.utime(tmp_path.joinpath('a.npz'), (1, 1))
+    reloaded.put('b', path(10))
+    os.utime(tmp_path.joinpath('b.npz'), (2, 2))
+    reloaded.put('c', path(10))
+    assert sorted(f.name for f in tmp_path.iterdir()) == ['b.npz', 'c.npz']
+    assert reloaded.disk_nbytes == 2 * size
+
+
+def test_overwrite_replaces_disk_size(tmp_path):
+    cache = PlanCache(cache_dir=tmp_path)
+    cache.put('a', path(10))
+    cache.put('a', path(20))
+    assert cache.disk_nbytes == tmp_path.joinpath('a.npz').stat().st_size
+    assert cache.disk_nbytes == PlanCache(cache_dir=tmp_path).disk_nbytes
@@ -0,0 +1,86 @@
+import os
+import time
+import numpy as np
+import pytest
+
+import pool
+from pool import CorbaServerPool
+
+
+class FakeServer:
+    def __init__(self, host=None, port=None) -> None:
+        super().__init__()
+        self.host, self.port = host, port
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+class FakeTask:
+    def __init__(self, render=True, nq=3) -> None:
+        """ Task of a worker; its configurations are filled by the port of the server it is connected to. """
+        super().__init__()
+        self.port = int(os.environ['HPP_PORT'])
+        self.nq = nq
+
+    def solve(self, q_init, q_goal):
+        return q_goal[0]
+
+    def discretize_path(self, path_id, fps=None, params=None):
+        return np.full((fps, self.nq), float(path_id))
+
+    def sample_transition(self, transition, q_from, n_samples=1, max_attempts=100, open_gripper=True, rng=None):
+        samples = np.full((n_samples, self.nq), float(self.port))
+        return samples, dict(attempts=max_attempts, projection_failures=max_attempts - 2 * n_samples,
+                             collision_failures=n_samples)
+
+    def project_configurations(self, configs, node='free', check_collisions=True, chunk_size=1000):
+        configs = np.asarray(configs)
+        return dict(configs=configs + 1., success=configs[:, 0] > 0, errors=np.zeros(len(configs)),
+                    valid=np.full(len(configs), check_collisions))
+
+
+def worker_port(task, delay):
+    time.sleep(delay)
+    return task.port
+
+
+@pytest.fixture
+def server_pool(monkeypatch):
+    monkeypatch.setattr(pool, 'CorbaServer', FakeServer)
+    p = CorbaServerPool(2, base_port=13500, task_factory=FakeTask)
+    yield p
+    p.shutdown()
+
+
+def test_each_worker_gets_its_own_server(server_pool):
+    ports = set(server_pool.map(worker_port, [0.3] * 4))
+    assert ports == {13500, 13501} == {s.port for s in server_pool.servers}
+
+
+def test_solve_sample_and_project(server_pool):
+    paths = server_pool.solve([[0.]] * 3, [[1.], [2.], [3.]], fps=4)
+    assert [p.shape for p in paths] == [(4, 3)] * 3
+    assert [p[0, 0] for p in paths] == [1., 2., 3.]
+
+    samples, stats = server_pool.sample_transition('Loop | f', [0.] * 3, n_samples=3, max_attempts=10)
+    assert samples.shape == (3, 3) and set(samples[:, 0]) <= {13500., 13501.}
+    # each of the two workers is asked for 2 samples in 5 attempts
+    assert stats['attempts'] == 10 and stats['projection_failures'] == 2 and stats['collision_failures'] == 4
+    assert stats['acceptance'] == pytest.approx(0.4)
+
+    configs = np.arange(10.).reshape(5, 2) - 2.
+    result = server_pool.project_configurations(configs, check_collisions=False, chunk_size=2)
+    assert np.array_equal(result['configs'], configs + 1.)
+    assert result['success'].tolist() == [False, False, True, True, True]
+    assert not result['valid'].any()
+
+
+def test_shutdown_kills_servers(monkeypatch):
+    monkeypatch.setattr(pool, 'CorbaServer', FakeServer)
+    with CorbaServerPool(1, base_port=13500, task_factory=FakeTask) as p:
+        assert p.submit(worker_port, 0.).result() == 13500
+    assert all(server.killed for server in p.servers)
+    with pytest.raises(RuntimeError):
+        p.submit(worker_port, 0.)
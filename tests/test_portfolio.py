@@ -0,0 +1,124 @@
+import time
+import numpy as np
+import pytest
+
+import portfolio
+from portfolio import PortfolioPlanner
+
+
+class FakeServer:
+    def __init__(self, host=None, port=None) -> None:
+        super().__init__()
+        self.host, self.port = host, port
+
+    def kill(self):
+        pass
+
+
+class FakeProblem:
+    def __init__(self) -> None:
+        super().__init__()
+        self.interrupted = False
+
+    def interruptPathPlanning(self):
+        self.interrupted = True
+
+
+class FakeBasic:
+    def __init__(self) -> None:
+        super().__init__()
+        self.problem = FakeProblem()
+
+
+class FakeProblemSolver:
+    def __init__(self) -> None:
+        super().__init__()
+        self.hppcorba = FakeBasic()
+        self.lengths = {}
+
+    def pathLength(self, path_id):
+        return self.lengths[path_id]
+
+
+class FakeTask:
+    def __init__(self, render=True) -> None:
+        """
+        Task whose planner 'sleep-<seconds>' takes the given time to find a path of length 10 - seed; planner
+        'stubborn-<seconds>' ignores interruptions.
+        """
+        super().__init__()
+        self.ps = FakeProblemSolver()
+        self.planner, self.seed = None, None
+
+    def configure_planner(self, planner=None, optimizers=None, seed=None):
+        self.planner = self.planner if planner is None else planner
+        self.seed = self.seed if seed is None else seed
+
+    def solve(self, q_init, q_goal):
+        problem = self.ps.hppcorba.problem
+        problem.interrupted = False
+        kind, duration = self.planner.split('-')
+        end = time.perf_counter() + float(duration)
+        while time.perf_counter() < end:
+            if problem.interrupted and kind != 'stubborn':
+                raise RuntimeError('interrupted')
+            time.sleep(0.01)
+        if kind == 'fail':
+            raise RuntimeError('no path')
+        path_id = len(self.ps.lengths)
+        self.ps.lengths[path_id] = 10. - self.seed
+        return path_id
+
+    def discretize_path(self, path_id, fps=None, params=None):
+        return np.full((int(self.ps.lengths[path_id] * fps), 2), float(self.seed))
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    monkeypatch.setattr(portfolio, 'CorbaServer', FakeServer)
+    planners = []
+
+    def create(planners_and_seeds, grace=5.):
+        settings = [dict(planner=p, seed=seed) for p, seed in planners_and_seeds]
+        planners.append(PortfolioPlanner(settings, base_port=0, grace=grace, task_factory=FakeTask))
+        planners[-1]._wait_ready()  # exclude startup of the workers from the measured times
+        return planners[-1]
+
+    yield create
+    for p in planners:
+        p.shutdown()
+
+
+def test_first_solution_wins_and_losers_are_interrupted(planner):
+    p = planner([('sleep-0', 1), ('sleep-3', 2), ('fail-0', 3)])
+    t0 = time.perf_counter()
+    result = p.solve([0.], [1.], fps=1)
+    assert time.perf_counter() - t0 < 1.
+    assert result['settings']['seed'] == 1 and result['length'] == 9.
+    assert result['frames'].shape == (9, 2) and np.all(result['frames'] == 1.)
+    assert p.wins == [1, 0, 0]
+
+    # the interrupted member reports its failure and serves the next query without being restarted
+    t0 = time.perf_counter()
+    assert p.solve([0.], [1.], fps=1)['settings']['seed'] == 1
+    assert time.perf_counter() - t0 < 1.
+    assert p.restarts == 0 and p.wins == [2, 0, 0]
+
+
+def test_wait_for_best_returns_shortest_path_and_failures(planner):
+    p = planner([('sleep-0', 1), ('sleep-0.3', 2), ('fail-0', 3)])
+    result = p.solve([0.], [1.], wait_for_best=True)
+    assert result['settings']['seed'] == 2 and result['length'] == 8.
+    assert result['failures'] == ['RuntimeError: no path']
+
+
+def test_deadline_and_restart_of_member_ignoring_interruption(planner):
+    p = planner([('stubborn-30', 1), ('sleep-30', 2), ('sleep-0.5', 3)], grace=0.5)
+    t0 = time.perf_counter()
+    assert p.solve([0.], [1.], deadline=0.2) is None
+    assert time.perf_counter() - t0 < 0.5
+
+    # the interruptible members stop, only the stubborn one is killed and restarted after the grace period
+    result = p.solve([0.], [1.], deadline=30.)
+    assert result['settings']['seed'] == 3
+    assert p.restarts == 1 and p.wins == [0, 0, 1]
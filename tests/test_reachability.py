@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from kinematics import quaternion_to_matrix
+from models.models_utils import get_models_path
+from reachability import ReachabilityMap
+
+URDF = get_models_path().joinpath('franka_panda', 'panda.urdf')
+PARAMS = dict(voxel_size=0.2, n_directions=8, n_samples=2000, chunk_size=500)
+
+
+@pytest.fixture(scope='module')
+def maps():
+    return {dilate: ReachabilityMap.build(URDF, dilate=dilate, **PARAMS) for dilate in (0, 1)}
+
+
+def test_build_and_query(maps):
+    reachability_map = maps[0]
+    assert reachability_map.scores.shape == (8, 8, 8, 8)
+    reached = np.argwhere(reachability_map.scores > 0)
+    assert 0 < len(reached) < reachability_map.scores.size
+
+    positions = reachability_map.lower + (reached[:, :3] + 0.5) * reachability_map.voxel_size
+    directions = reachability_map.directions[reached[:, 3]]
+    assert np.array_equal(reachability_map.query(positions, directions),
+                          reachability_map.scores[tuple(reached.T)])
+    assert np.all(reachability_map.query([[0., 0., 2.], [-1., 0., 0.]], [[0., 0., -1.], [1., 0., 0.]]) == 0)
+
+
+def test_dilation(maps):
+    scores, dilated = maps[0].scores, maps[1].scores
+    assert np.all(dilated >= scores)
+    assert np.count_nonzero(dilated) > np.count_nonzero(scores)
+
+    padded = np.pad(scores, [(1, 1)] * 3 + [(0, 0)])
+    expected = scores.copy()
+    for axis in range(3):
+        for shift in (-1, 1):
+            window = [slice(1, -1)] * 3 + [slice(None)]
+            window[axis] = slice(1 + shift, padded.shape[axis] - 1 + shift)
+            expected = np.maximum(expected, padded[tuple(window)])
+    assert np.array_equal(dilated, expected)
+
+
+def test_load_or_build_cache(tmp_path, monkeypatch, maps):
+    calls = []
+
+    def build(urdf_filename, **params):
+        calls.append(params)
+        return maps[0]
+
+    monkeypatch.setattr(ReachabilityMap, 'build', build)
+    first = ReachabilityMap.load_or_build(URDF, cache_dir=tmp_path, dilate=0, **PARAMS)
+    second = ReachabilityMap.load_or_build(URDF, cache_dir=tmp_path, dilate=0, **PARAMS)
+    assert len(calls) == 1 and len(list(tmp_path.glob('*.npz'))) == 1
+    assert np.array_equal(first.scores, second.scores) and np.allclose(first.lower, second.lower)
+    ReachabilityMap.load_or_build(URDF, cache_dir=tmp_path, dilate=1, **PARAMS)
+    assert len(calls) == 2
+
+
+def test_grasp_scores_match_per_handle_queries(maps):
+    reachability_map = maps[1]
+    rng = np.random.default_rng(0)
+    handle_objects = np.array([0, 0, 0, 2, 2])
+    handle_positions = rng.uniform(-0.05, 0.05, size=(5, 3))
+    handle_directions = rng.normal(size=(5, 3))
+    handle_directions /= np.linalg.norm(handle_directions, axis=1, keepdims=True)
+    quaternions = rng.normal(size=(4, 3, 4))
+    poses = np.concatenate([rng.uniform(-0.6, 0.6, size=(4, 3, 3)),
+                            quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)], axis=-1)
+    base_pose = np.eye(4)
+    base_pose[:3, 3] = [0.1, -0.2, 0.05]
+    world_to_base = np.linalg.inv(base_pose)
+
+    scores = reachability_map.grasp_scores(poses, handle_objects, handle_positions, handle_directions, world_to_base)
+    assert scores.shape == (4, 3)
+    assert np.all(scores[:, 1] == 0)
+    assert np.any(scores > 0)
+    for k in range(4):
+        for i in (0, 2):
+            rotation = world_to_base[:3, :3] @ quaternion_to_matrix(poses[k, i, 3:])
+            translation = world_to_base[:3, :3] @ poses[k, i, :3] + world_to_base[:3, 3]
+            selected = handle_objects == i
+            expected = reachability_map.query(handle_positions[selected] @ rotation.T + translation,
+                                              handle_directions[selected] @ rotation.T).max()
+            assert scores[k, i] == expected
@@ -0,0 +1,168 @@
+import re
+import sys
+import types
+import numpy as np
+import pytest
+
+
+class Rule:
+    def __init__(self, grippers=(), handles=(), link=False) -> None:
+        """ Same attributes as hpp.corbaserver.manipulation.Rule. """
+        super().__init__()
+        self.grippers, self.handles, self.link = grippers, handles, link
+
+
+class Constraints:
+    def __init__(self, numConstraints=()) -> None:
+        super().__init__()
+        self.numConstraints = numConstraints
+
+
+class ConstraintGraph:
+    def __init__(self, robot, graphName) -> None:
+        """ Records the calls made by SceneBuilder.build_graph. """
+        super().__init__()
+        self.robot, self.name = robot, graphName
+        self.constraints, self.initialized = [], False
+
+    def addConstraints(self, graph=False, constraints=None):
+        assert graph
+        self.constraints.append(constraints)
+
+    def initialize(self):
+        self.initialized = True
+
+
+class ConstraintGraphFactory:
+    instances = []
+
+    def __init__(self, graph) -> None:
+        super().__init__()
+        self.graph, self.calls = graph, {}
+        self.instances.append(self)
+
+    def setGrippers(self, grippers):
+        self.calls['grippers'] = grippers
+
+    def environmentContacts(self, surfaces):
+        self.calls['contacts'] = surfaces
+
+    def setObjects(self, objects, handles, surfaces):
+        self.calls['objects'] = (objects, handles, surfaces)
+
+    def setRules(self, rules):
+        self.calls['rules'] = rules
+
+    def generate(self):
+        return []
+
+
+class FakeRobot:
+    urdfFilename, srdfFilename = 'robot.urdf', 'robot.srdf'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rankInConfiguration = {}
+        self.nq = 9
+
+    def get_gripper_name(self):
+        return 'panda/gripper'
+
+    def loadEnvironmentModel(self, urdf, srdf, prefix):
+        pass
+
+    def insertRobotModel(self, name, root_joint_type, urdf, srdf):
+        self.rankInConfiguration[f'{name}/root_joint'] = self.nq
+        self.nq += 7
+
+    def setJointBounds(self, joint, bounds):
+        pass
+
+    def getJointConfigSize(self, joint):
+        return 7
+
+
+class FakeProblemSolver:
+    def __init__(self) -> None:
+        super().__init__()
+        self.locked_joints = {}
+
+    def createLockedJoint(self, name, joint, value):
+        self.locked_joints[name] = (joint, value)
+
+
+class FakeObject:
+    rootJointType = 'freeflyer'
+    urdfFilename, srdfFilename = 'object.urdf', 'object.srdf'
+
+    def handles(self, prefix):
+        return [prefix + h for h in ('handle0', 'handle1', 'handle2')]
+
+    def contact_surfaces(self, prefix):
+        return [prefix + 'surface']
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    """ The scene module with the constraint graph classes of hpp replaced by the fakes above. """
+    manipulation = types.ModuleType('hpp.corbaserver.manipulation')
+    manipulation.Rule, manipulation.Constraints = Rule, Constraints
+    manipulation.ConstraintGraph, manipulation.ConstraintGraphFactory = ConstraintGraph, ConstraintGraphFactory
+    for name in ('hpp', 'hpp.corbaserver'):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, 'hpp.corbaserver.manipulation', manipulation)
+    monkeypatch.delitem(sys.modules, 'scene', raising=False)
+    monkeypatch.setattr(ConstraintGraphFactory, 'instances', [])
+    import scene
+    return scene
+
+
+def build_scene(scene, grippers=None):
+    builder = scene.SceneBuilder(FakeRobot(), grippers=grippers)
+    builder.add_object('box', FakeObject(), handles=['handle0', 'handle2'])
+    builder.add_object('box2', FakeObject())
+    return builder
+
+
+def test_rules(scene):
+    builder = build_scene(scene, grippers=['left', 'right'])
+    rules = builder.rules(objects=['box'])
+    assert len(rules) == 3
+    assert all(rule.grippers == ['left', 'right'] and rule.link for rule in rules)
+    assert rules[0].handles == ['^$', '^$']
+    assert rules[1].handles[1] == '^$' and rules[2].handles[0] == '^$'
+    for pattern in (rules[1].handles[0], rules[2].handles[1]):
+        assert re.match(pattern, 'box/handle0') and re.match(pattern, 'box/handle2')
+        assert not re.match(pattern, 'box/handle1') and not re.match(pattern, 'box2/handle0')
+        assert not re.match(pattern, 'box/handle00')
+
+    rules = builder.rules()
+    assert len(rules) == 3
+    assert re.match(rules[1].handles[0], 'box2/handle1') and not re.match(rules[1].handles[0], 'box/handle1')
+
+
+def test_subproblem_graph_locks_other_objects(scene):
+    builder = build_scene(scene).load()
+    ps = FakeProblemSolver()
+    q = np.arange(builder.robot.nq, dtype=np.float64)
+    cg = builder.build_graph(ps, graph_name='sub', objects=['box2'], q_locked=q, validate=False)
+
+    factory, = ConstraintGraphFactory.instances
+    assert factory.calls['grippers'] == ['panda/gripper']
+    assert factory.calls['objects'] == (['box2'], [['box2/handle0', 'box2/handle1', 'box2/handle2']],
+                                        [['box2/surface']])
+    assert len(factory.calls['rules']) == 2
+    assert ps.locked_joints == {'lock_box': ('box/root_joint', list(q[9:16]))}
+    assert [c.numConstraints for c in cg.constraints] == [['lock_box']]
+    assert cg.initialized and cg.name == 'sub'
+
+    with pytest.raises(AssertionError):
+        builder.build_graph(ps, objects=['box2'], validate=False)
+
+
+def test_full_graph_has_no_locked_joints(scene):
+    builder = build_scene(scene).load()
+    ps = FakeProblemSolver()
+    cg = builder.build_graph(ps, validate=False)
+    assert ConstraintGraphFactory.instances[0].calls['objects'][0] == ['box', 'box2']
+    assert ps.locked_joints == {} and cg.constraints == []
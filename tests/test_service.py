@@ -0,0 +1,223 @@
+import json
+import time
+import socket
+import asyncio
+import numpy as np
+import pytest
+
+import service
+from service import PlanningService
+
+
+class FakeServer:
+    def __init__(self, host=None, port=None) -> None:
+        super().__init__()
+        self.host, self.port = host, port
+
+    def kill(self):
+        pass
+
+
+class FakeProblem:
+    def __init__(self) -> None:
+        super().__init__()
+        self.interrupted = False
+
+    def interruptPathPlanning(self):
+        self.interrupted = True
+
+
+class FakeBasic:
+    def __init__(self) -> None:
+        super().__init__()
+        self.problem = FakeProblem()
+
+
+class FakeProblemSolver:
+    def __init__(self) -> None:
+        super().__init__()
+        self.hppcorba = FakeBasic()
+
+    def pathLength(self, path_id):
+        return 1.
+
+
+class FakeTask:
+    def __init__(self, render=True, nq=3, progress_file=None) -> None:
+        """
+        Task whose solve takes q_init[0] seconds and is interrupted unless q_init[1] is set; the path has nq columns
+        filled by the path parameter. Number of discretized chunks is written to progress_file.
+        """
+        super().__init__()
+        self.ps = FakeProblemSolver()
+        self.nq = nq
+        self.progress_file = progress_file
+        self.chunks = 0
+
+    def solve(self, q_init, q_goal):
+        problem = self.ps.hppcorba.problem
+        problem.interrupted = False
+        end = time.perf_counter() + q_init[0]
+        while time.perf_counter() < end:
+            if problem.interrupted and not q_init[1]:
+                raise RuntimeError('interrupted')
+            time.sleep(0.01)
+        return 0
+
+    def discretize_path(self, path_id, fps=None, params=None):
+        self.chunks += 1
+        if self.progress_file is not None:
+            with open(self.progress_file, 'w') as f:
+                f.write(str(self.chunks))
+        return np.repeat(np.asarray(params)[:, None], self.nq, axis=1)
+
+    def direct_path(self, q_from, q_to, fps=10, validate=True):
+        return np.linspace(q_from, q_to, 3) if validate else None
+
+    def sample_transition(self, transition, q_from, n_samples, max_attempts):
+        return np.zeros((n_samples, len(q_from))), dict(attempts=max_attempts, transition=transition)
+
+    def project_configurations(self, configs, node, check_collisions):
+        configs = np.asarray(configs)
+        return dict(configs=configs, success=np.ones(len(configs), dtype=bool))
+
+
+class Client:
+    def __init__(self, reader, writer, path) -> None:
+        super().__init__()
+        self.reader, self.writer, self.path = reader, writer, path
+
+    def send(self, **request):
+        self.writer.write(json.dumps(request).encode() + b'\n')
+
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 10.))
+
+    async def receive_until_closed(self, request_id):
+        """ Return messages of the request up to its closing message. """
+        messages = []
+        while not messages or messages[-1]['type'] in ('frames', 'result'):
+            message = await self.receive()
+            if message['id'] == request_id:
+                messages.append(message)
+        return messages
+
+    def close(self):
+        self.writer.close()
+
+
+def run_service(tmp_path, test, **kwargs):
+    """ Start the service with fake tasks, run test(service, client) against it and shut the service down. """
+    async def main():
+        svc = PlanningService(base_port=0, task_factory=FakeTask, **kwargs)
+        await svc.start()
+        path = str(tmp_path.joinpath('service.sock'))
+        server = asyncio.ensure_future(svc.serve(path=path))
+        while not tmp_path.joinpath('service.sock').exists():
+            await asyncio.sleep(0.01)
+        client = Client(*await asyncio.open_unix_connection(path, limit=2 ** 26), path)
+        try:
+            await test(svc, client)
+        finally:
+            client.close()
+            server.cancel()
+            await svc.shutdown()
+
+    asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def fake_servers(monkeypatch):
+    monkeypatch.setattr(service, 'CorbaServer', FakeServer)
+
+
+def test_protocol(tmp_path):
+    async def test(svc, client):
+        client.send(id=1, type='plan', q_init=[0., 0.], q_goal=[1., 1.], fps=10, chunk_frames=4)
+        messages = await client.receive_until_closed(1)
+        assert [m['type'] for m in messages] == ['frames'] * 3 + ['done']
+        frames = np.concatenate([m['frames'] for m in messages[:-1]])
+        assert frames.shape == (10, 3) and np.allclose(frames[:, 0], np.linspace(0., 1., 10))
+
+        client.send(id=2, type='direct_path', q_from=[0., 0.], q_to=[1., 1.])
+        assert [m['type'] for m in await client.receive_until_closed(2)] == ['result', 'frames', 'done']
+        client.send(id=3, type='direct_path', q_from=[0., 0.], q_to=[1., 1.], validate=False)
+        assert [m.get('success') for m in await client.receive_until_closed(3)] == [False, None]
+
+        client.send(id=4, type='sample', transition='Loop | f', q_from=[0., 0.], n_samples=2)
+        result, done = await client.receive_until_closed(4)
+        assert result['samples'] == [[0., 0.]] * 2 and result['stats']['transition'] == 'Loop | f'
+        client.send(id=5, type='project', configs=[[1., 2.]], node='free')
+        assert (await client.receive_until_closed(5))[0]['success'] == [True]
+
+        client.send(id=6, type='unknown')
+        assert await client.receive() == dict(id=6, type='error', message='Unknown request type: unknown')
+        client.writer.write(b'not json\n')
+        assert (await client.receive())['type'] == 'error'
+        client.send(id=7, type='sample', transition='Loop | f', q_from=[0.], n_samples=1, unknown_argument=1)
+        assert (await client.receive_until_closed(7))[-1]['type'] == 'error'
+        assert svc.stats['done'] == 5 and svc.stats['error'] == 1
+
+    run_service(tmp_path, test)
+
+
+def test_short_requests_are_not_delayed_by_long_ones(tmp_path):
+    async def test(svc, client):
+        client.send(id=1, type='plan', q_init=[2., 0.], q_goal=[0., 0.])
+        t0 = time.perf_counter()
+        client.send(id=2, type='sample', transition='Loop | f', q_from=[0.], n_samples=1)
+        assert [m['type'] for m in await client.receive_until_closed(2)] == ['result', 'done']
+        assert time.perf_counter() - t0 < 1.
+        assert (await client.receive_until_closed(1))[-1]['type'] == 'done'
+
+    run_service(tmp_path, test)
+
+
+def test_cancel_timeout_and_restart(tmp_path):
+    async def test(svc, client):
+        # interruptible solves are cancelled or time out without restarting the worker
+        client.send(id=1, type='plan', q_init=[30., 0.], q_goal=[0., 0.])
+        client.send(id=2, type='plan', q_init=[30., 0.], q_goal=[0., 0.])
+        await asyncio.sleep(0.2)
+        client.send(id=2, type='cancel')
+        client.send(id=1, type='cancel')
+        assert await client.receive_until_closed(2) == [dict(id=2, type='cancelled')]
+        assert await client.receive_until_closed(1) == [dict(id=1, type='cancelled')]
+        client.send(id=3, type='plan', q_init=[30., 0.], q_goal=[0., 0.], timeout=0.2)
+        assert await client.receive_until_closed(3) == [dict(id=3, type='timeout')]
+        client.send(id=4, type='plan', q_init=[0., 0.], q_goal=[0., 0.])
+        assert (await client.receive_until_closed(4))[-1]['type'] == 'done'
+        assert svc.stats['restarts'] == 0
+
+        # solve ignoring the interruption is killed after kill_after and the worker is restarted
+        client.send(id=5, type='plan', q_init=[30., 1.], q_goal=[0., 0.], timeout=0.2)
+        assert await client.receive_until_closed(5) == [dict(id=5, type='timeout')]
+        client.send(id=6, type='plan', q_init=[0., 0.], q_goal=[0., 0.])
+        assert (await client.receive_until_closed(6))[-1]['type'] == 'done'
+        assert svc.stats['restarts'] == 1
+
+    run_service(tmp_path, test, kill_after=0.5)
+
+
+def test_slow_client_pauses_worker(tmp_path):
+    progress_file = tmp_path.joinpath('progress')
+
+    def read_lines(sock, n):
+        with sock.makefile('rb') as f:
+            return [json.loads(f.readline()) for _ in range(n)]
+
+    async def test(svc, client):
+        # plain socket that is not read, unlike asyncio streams which buffer incoming data; every chunk of 1000
+        # frames is a message of about 2 MB, larger than the socket buffers
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(client.path)
+        request = dict(id=1, type='plan', q_init=[0., 0.], q_goal=[0., 0.], fps=50000, chunk_frames=1000)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        await asyncio.sleep(1.)
+        assert int(progress_file.read_text()) <= svc.window + 2
+        messages = await asyncio.get_event_loop().run_in_executor(None, read_lines, sock, 51)
+        sock.close()
+        assert [m['type'] for m in messages] == ['frames'] * 50 + ['done']
+        assert int(progress_file.read_text()) == 50
+
+    run_service(tmp_path, test, window=2, task_kwargs=dict(nq=100, progress_file=str(progress_file)))
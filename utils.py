@@ -1,3 +1,5 @@
+import os
+import pathlib
 import numpy as np
 import quaternion as npq
 
@@ -32,4 +34,42 @@ def generate_joint_bounds_unlimited_rot(min_pos=None, max_pos=None):
     pos_bound = np.concatenate([*zip(min_pos, max_pos)])
     rot_bound = np.array([-1.0001, 1.0001] * 4)
 
-    return np.concatenate([pos_bound, rot_bound]).tolist()
\ No newline at end of file
+    return np.concatenate([pos_bound, rot_bound]).tolist()
+
+
+def get_cache_path(*parts):
+    """
+    Return path inside the cache directory of this project, the directory is created if it does not exist.
+    The cache directory is given by HPP_TUTORIAL_CACHE environment variable and defaults to ~/.cache/hpp_tutorial.
+
+    :param parts: subdirectories inside the cache directory
+    :return: pathlib.Path of the directory
+    """
+    root = os.environ.get('HPP_TUTORIAL_CACHE', pathlib.Path.home().joinpath('.cache', 'hpp_tutorial'))
+    path = pathlib.Path(root).joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def write_file_atomic(filename, text):
+    """
+    Write text to the file such that concurrent readers never see a partially written file.
+    """
+    filename = pathlib.Path(filename)
+    tmp = filename.with_name(f'.{filename.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, filename)
+
+
+def sampling_stats(attempts, projection_failures, collision_failures):
+    """
+    Summarize sampling of transition configurations.
+
+    :return: dictionary with the given counts and acceptance rates of projection, collision checking and overall
+    """
+    projected = attempts - projection_failures
+    return dict(attempts=attempts, projection_failures=projection_failures, collision_failures=collision_failures,
+                projection_acceptance=projected / max(attempts, 1),
+                collision_acceptance=(projected - collision_failures) / max(projected, 1),
+                acceptance=(projected - collision_failures) / max(attempts, 1))